@@ -0,0 +1,170 @@
+# ==============================================================
+# 📮 ReValix Rule-Based US Address Canonicalizer
+# Deterministic street-suffix / unit / state / ZIP normalization so
+# most addresses never need the GPT normalization round-trip
+# ==============================================================
+
+import re
+
+# Bump when a change here alters results, so cached normalizations are recomputed.
+RULES_VERSION = 2
+
+# --------------------------------------------------------------
+# LOOKUP TABLES (USPS Publication 28 abbreviations)
+# --------------------------------------------------------------
+STATES = {
+    "ALABAMA": "AL", "ALASKA": "AK", "ARIZONA": "AZ", "ARKANSAS": "AR", "CALIFORNIA": "CA",
+    "COLORADO": "CO", "CONNECTICUT": "CT", "DELAWARE": "DE", "DISTRICT OF COLUMBIA": "DC",
+    "FLORIDA": "FL", "GEORGIA": "GA", "HAWAII": "HI", "IDAHO": "ID", "ILLINOIS": "IL",
+    "INDIANA": "IN", "IOWA": "IA", "KANSAS": "KS", "KENTUCKY": "KY", "LOUISIANA": "LA",
+    "MAINE": "ME", "MARYLAND": "MD", "MASSACHUSETTS": "MA", "MICHIGAN": "MI", "MINNESOTA": "MN",
+    "MISSISSIPPI": "MS", "MISSOURI": "MO", "MONTANA": "MT", "NEBRASKA": "NE", "NEVADA": "NV",
+    "NEW HAMPSHIRE": "NH", "NEW JERSEY": "NJ", "NEW MEXICO": "NM", "NEW YORK": "NY",
+    "NORTH CAROLINA": "NC", "NORTH DAKOTA": "ND", "OHIO": "OH", "OKLAHOMA": "OK", "OREGON": "OR",
+    "PENNSYLVANIA": "PA", "RHODE ISLAND": "RI", "SOUTH CAROLINA": "SC", "SOUTH DAKOTA": "SD",
+    "TENNESSEE": "TN", "TEXAS": "TX", "UTAH": "UT", "VERMONT": "VT", "VIRGINIA": "VA",
+    "WASHINGTON": "WA", "WEST VIRGINIA": "WV", "WISCONSIN": "WI", "WYOMING": "WY",
+    "PUERTO RICO": "PR", "GUAM": "GU", "VIRGIN ISLANDS": "VI",
+}
+STATE_CODES = set(STATES.values())
+
+STREET_SUFFIXES = {
+    "ALLEY": "Aly", "ALY": "Aly", "AVENUE": "Ave", "AVE": "Ave", "AV": "Ave", "BOULEVARD": "Blvd",
+    "BLVD": "Blvd", "BEND": "Bnd", "BND": "Bnd", "BYPASS": "Byp", "CIRCLE": "Cir", "CIR": "Cir",
+    "COURT": "Ct", "CT": "Ct", "COVE": "Cv", "CV": "Cv", "CREEK": "Crk", "CROSSING": "Xing",
+    "DRIVE": "Dr", "DR": "Dr", "EXPRESSWAY": "Expy", "EXPY": "Expy", "FREEWAY": "Fwy", "FWY": "Fwy",
+    "GROVE": "Grv", "HEIGHTS": "Hts", "HIGHWAY": "Hwy", "HWY": "Hwy", "HILL": "Hl", "HOLLOW": "Holw",
+    "JUNCTION": "Jct", "LANE": "Ln", "LN": "Ln", "LOOP": "Loop", "MALL": "Mall", "MANOR": "Mnr",
+    "MEADOWS": "Mdws", "MOTORWAY": "Mtwy", "PARK": "Park", "PARKWAY": "Pkwy", "PKWY": "Pkwy",
+    "PASS": "Pass", "PATH": "Path", "PIKE": "Pike", "PLACE": "Pl", "PL": "Pl", "PLAZA": "Plz",
+    "PLZ": "Plz", "POINT": "Pt", "PT": "Pt", "RIDGE": "Rdg", "ROAD": "Rd", "RD": "Rd", "ROUTE": "Rte",
+    "RTE": "Rte", "ROW": "Row", "RUN": "Run", "SQUARE": "Sq", "SQ": "Sq", "STREET": "St", "ST": "St",
+    "TERRACE": "Ter", "TER": "Ter", "TRACE": "Trce", "TRAIL": "Trl", "TRL": "Trl", "TURNPIKE": "Tpke",
+    "VIEW": "Vw", "VISTA": "Vis", "WALK": "Walk", "WAY": "Way", "WY": "Way",
+}
+
+DIRECTIONALS = {
+    "NORTH": "N", "SOUTH": "S", "EAST": "E", "WEST": "W", "NORTHEAST": "NE", "NORTHWEST": "NW",
+    "SOUTHEAST": "SE", "SOUTHWEST": "SW", "N": "N", "S": "S", "E": "E", "W": "W",
+    "NE": "NE", "NW": "NW", "SE": "SE", "SW": "SW",
+}
+
+UNIT_DESIGNATORS = {
+    "APARTMENT": "Apt", "APT": "Apt", "SUITE": "Ste", "STE": "Ste", "UNIT": "Unit", "BUILDING": "Bldg",
+    "BLDG": "Bldg", "FLOOR": "Fl", "FL": "Fl", "ROOM": "Rm", "RM": "Rm", "LOT": "Lot", "SPACE": "Spc",
+    "TRAILER": "Trlr", "#": "#",
+}
+
+ZIP_RE = re.compile(r"(\d{5})(?:[-\s]?(\d{4}))?$")
+HOUSE_NUMBER_RE = re.compile(r"^\d+[A-Z]?(?:-\d+[A-Z]?)?$|^\d+/\d+$")
+COUNTRY_RE = re.compile(r"[,\s]+(USA|U\.S\.A\.|US|UNITED STATES(?: OF AMERICA)?)$")
+
+# --------------------------------------------------------------
+# HELPERS
+# --------------------------------------------------------------
+def _title(word):
+    if re.match(r"^\d+(ST|ND|RD|TH)$", word):
+        return word.lower()     # ordinals: 5th Ave
+    return word if any(c.isdigit() for c in word) else word.capitalize()
+
+def _split_state_zip(text):
+    """Strip ``STATE ZIP`` off the end of ``text``; return (rest, state, zip)."""
+    zip_code = None
+    m = ZIP_RE.search(text)
+    if m:
+        zip_code = m.group(1) + (f"-{m.group(2)}" if m.group(2) else "")
+        text = text[:m.start()].rstrip(" ,")
+    words = text.replace(",", " , ").split()
+    # Longest full state name first ("WEST VIRGINIA" before "VIRGINIA").
+    for n in (4, 3, 2, 1):
+        if len(words) < n:
+            continue
+        tail = " ".join(words[-n:]).replace(".", "")
+        state = STATES.get(tail) or (tail if n == 1 and tail in STATE_CODES else None)
+        if state:
+            rest = " ".join(words[:-n]).replace(" , ", ", ").strip(" ,")
+            return rest, state, zip_code
+    return text, None, zip_code
+
+def _format_street(words):
+    """Canonical street line from upper-cased words, or None when it doesn't look like one."""
+    if len(words) < 2 or not HOUSE_NUMBER_RE.match(words[0]):
+        return None
+    out = [words[0]]
+    i = 1
+    unit_at = next((j for j in range(i, len(words)) if words[j] in UNIT_DESIGNATORS or words[j].startswith("#")), len(words))
+    # A directional directly followed by the suffix is the street name itself ("North St", "West St Ext").
+    is_name = i + 1 < unit_at and words[i + 1] in STREET_SUFFIXES \
+        and (i + 2 == unit_at or words[i + 2] not in STREET_SUFFIXES)
+    if words[i] in DIRECTIONALS and i + 1 < len(words) and not is_name:
+        out.append(DIRECTIONALS[words[i]])
+        i += 1
+    name = words[i:unit_at]
+    if not name:
+        return None
+    if len(name) > 1 and name[-1] in DIRECTIONALS:
+        post_dir = DIRECTIONALS[name[-1]]
+        name = name[:-1]
+    else:
+        post_dir = None
+    if len(name) > 1 and name[-1] in STREET_SUFFIXES:
+        name = [_title(w) for w in name[:-1]] + [STREET_SUFFIXES[name[-1]]]
+    else:
+        name = [_title(w) for w in name]
+    out.extend(name)
+    if post_dir:
+        out.append(post_dir)
+    unit = words[unit_at:]
+    if unit:
+        designator = unit[0]
+        if designator.startswith("#") and len(designator) > 1:
+            unit = ["#", designator[1:]] + unit[1:]
+            designator = "#"
+        if len(unit) < 2:
+            return None
+        out.append(UNIT_DESIGNATORS[designator])
+        out.extend(unit[1:])
+    return " ".join(out)
+
+# --------------------------------------------------------------
+# PUBLIC API
+# --------------------------------------------------------------
+def canonicalize_address(raw_address):
+    """``"123 Main St Apt 4, Springfield, IL 62704"`` for inputs parsed with confidence, else None.
+
+    Confident means: house number, street name, city, a known state and a
+    5-digit ZIP were all found. Anything else is left to the GPT normalizer.
+    """
+    text = " ".join(str(raw_address or "").upper().replace("\n", ", ").split())
+    text = COUNTRY_RE.sub("", text).strip(" ,.")
+    if not text:
+        return None
+    rest, state, zip_code = _split_state_zip(text)
+    if not state or not zip_code:
+        return None
+
+    parts = [p.strip() for p in rest.split(",") if p.strip()]
+    if len(parts) >= 2:
+        city = parts[-1]
+        street_words = " ".join(parts[:-1]).replace(".", "").split()
+    elif len(parts) == 1:
+        # No commas: the street ends at its suffix (plus any directional/unit) and the city follows.
+        # With two candidates ("Main St Park City") the split is a guess, so leave it to GPT.
+        words = parts[0].replace(".", "").split()
+        candidates = [i for i, w in enumerate(words[:-1]) if i > 1 and w in STREET_SUFFIXES]
+        if len(candidates) != 1:
+            return None
+        end = candidates[0] + 1
+        if end < len(words) - 1 and words[end] in DIRECTIONALS:
+            end += 1
+        if end < len(words) - 1 and (words[end] in UNIT_DESIGNATORS or words[end].startswith("#")):
+            end += 1 if words[end].startswith("#") and len(words[end]) > 1 else 2
+        street_words, city = words[:end], " ".join(words[end:])
+    else:
+        return None
+
+    street = _format_street(street_words)
+    if not street or not city or any(c.isdigit() for c in city):
+        return None
+    city = " ".join(_title(w) for w in city.replace(".", "").split())
+    return f"{street}, {city}, {state} {zip_code}"
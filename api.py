@@ -0,0 +1,333 @@
+# ==============================================================
+# 🌐 ReValix Report API
+# Headless JSON API over the enrichment pipeline: saved reports are
+# served from memory/Mongo with ETags and gzip, misses become jobs
+#
+#   python api.py --port 8080
+#   curl -H 'Accept-Encoding: gzip' 'localhost:8080/v1/reports?address=...'
+# ==============================================================
+
+import argparse, asyncio, gzip, hashlib, json, os, time
+from collections import OrderedDict
+from urllib.parse import quote
+from aiohttp import web
+
+from connections import ConnectionManager
+from jobs import ACTIVE_STATUSES, JobStore, JobWorkers
+from pipeline import collection, normalize_address_local
+from store import address_key, find_report, find_reports, records_from_document
+
+API_TOKEN = os.getenv("API_TOKEN")             # when set, every /v1 call needs "Authorization: Bearer <token>"
+API_CACHE_SECONDS = float(os.getenv("API_CACHE_SECONDS", "10"))
+API_CACHE_ENTRIES = int(os.getenv("API_CACHE_ENTRIES", "10000"))
+API_MAX_WAIT = 120.0                           # longest ``wait`` a POST may block for a job
+API_BULK_MAX = 500
+GZIP_MIN_BYTES = 1024
+
+WORKERS = web.AppKey("workers", JobWorkers)
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+def dumps(data):
+    return json.dumps(data, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# --------------------------------------------------------------
+# REPORT BODIES
+# --------------------------------------------------------------
+def report_body(doc):
+    return {
+        "address": doc.get("address"),
+        "apn": doc.get("apn"),
+        "fips": doc.get("fips"),
+        "updated_at": doc.get("updated_at"),
+        "fields": [{"field": r["Field"], "value": r["Value"], "source": r.get("Source"), "updated": r.get("Updated")}
+                   for r in records_from_document(doc)],
+    }
+
+class CachedReport:
+    """One serialized report: body bytes, its ETag and (made on first use) the gzipped body."""
+
+    def __init__(self, key, doc):
+        self.body = dumps(report_body(doc))
+        # The stored updated_at moves on every write, so it identifies the version.
+        version = doc.get("updated_at") or hashlib.sha1(self.body).hexdigest()
+        self.etag = 'W/"%s"' % hashlib.sha1(f"{key}|{_json_default(version)}".encode("utf-8")).hexdigest()[:20]
+        self.expires = time.monotonic() + API_CACHE_SECONDS
+        self._gzipped = None
+
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, 6)
+        return self._gzipped
+
+class ReportCache:
+    """LRU of CachedReport by address key, each kept ``API_CACHE_SECONDS``.
+
+    Repeat reads cost no Mongo round trip and no re-serialization; a job
+    finishing in this process drops its entry at once.
+    """
+
+    def __init__(self, max_entries=API_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry.expires < time.monotonic():
+            self.entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, doc):
+        entry = self.entries[key] = CachedReport(key, doc)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+    def drop(self, key):
+        self.entries.pop(key, None)
+
+REPORTS = web.AppKey("reports", ReportCache)
+
+def report_address(address):
+    """The normalized address ``address`` is saved under: the address cache (GPT answers included), else the rules."""
+    return normalize_address_local(address) or address
+
+async def lookup(app, address, normalized=False):
+    """(CachedReport for ``address``, served from memory?); (None, False) when it was never generated.
+
+    ``address`` is mapped to its normalized form first unless ``normalized``.
+    """
+    if not normalized:
+        address = await asyncio.to_thread(report_address, address)
+    key = address_key(address)
+    entry = app[REPORTS].get(key)
+    if entry is not None:
+        return entry, True
+    doc = await asyncio.to_thread(find_report, collection, address)
+    if doc is None:
+        return None, False
+    return app[REPORTS].put(key, doc), False
+
+# --------------------------------------------------------------
+# RESPONSES
+# --------------------------------------------------------------
+def accepts_gzip(request):
+    return "gzip" in request.headers.get("Accept-Encoding", "").lower()
+
+def send_bytes(request, body, status=200, headers=None, gzipped=None):
+    """JSON bytes, gzip-encoded when the client accepts it and the body is worth it."""
+    headers = {"Content-Type": "application/json; charset=utf-8", "Vary": "Accept-Encoding", **(headers or {})}
+    if len(body) >= GZIP_MIN_BYTES and accepts_gzip(request):
+        body = gzipped() if gzipped else gzip.compress(body, 6)
+        headers["Content-Encoding"] = "gzip"
+    return web.Response(body=body, status=status, headers=headers)
+
+def send_json(request, data, status=200, headers=None):
+    return send_bytes(request, dumps(data), status, headers)
+
+def send_report(request, entry, cache_status):
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache", "X-Cache": cache_status}
+    match = request.headers.get("If-None-Match", "")
+    if match.strip() == "*" or entry.etag in [t.strip() for t in match.split(",")]:
+        return web.Response(status=304, headers=headers)
+    return send_bytes(request, entry.body, headers=headers, gzipped=entry.gzipped)
+
+def error(request, status, message):
+    return send_json(request, {"error": message}, status)
+
+async def read_json(request):
+    try:
+        data = await request.json()
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+def job_summary(job):
+    """Public view of a job row (the result without its records)."""
+    result = dict(job["result"] or {})
+    result.pop("records", None)
+    out = {
+        "job_id": job["id"],
+        "address": job["address"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "error": job["error"],
+        "status_url": f"/v1/jobs/{job['id']}",
+        "result": result or None,
+    }
+    if result.get("normalized"):
+        out["report_url"] = f"/v1/reports?address={quote(result['normalized'])}"
+    return out
+
+# --------------------------------------------------------------
+# HANDLERS
+# --------------------------------------------------------------
+routes = web.RouteTableDef()
+
+@routes.get("/healthz")
+async def health(request):
+    counts = await asyncio.to_thread(request.app[WORKERS].store.counts)
+    cache = request.app[REPORTS]
+    return send_json(request, {"ok": True, "jobs": counts,
+                               "report_cache": {"entries": len(cache.entries), "hits": cache.hits, "misses": cache.misses}})
+
+@routes.get("/v1/reports")
+async def get_report(request):
+    """Saved report for ``?address=``; 304 when ``If-None-Match`` has its ETag, 404 if never generated."""
+    address = request.query.get("address", "").strip()
+    if not address:
+        return error(request, 400, "address is required")
+    entry, cached = await lookup(request.app, address)
+    if entry is None:
+        return error(request, 404, "no saved report for this address; POST /v1/reports to generate one")
+    return send_report(request, entry, "hit" if cached else "miss")
+
+@routes.post("/v1/reports")
+async def create_report(request):
+    """``{"address", "refresh": false, "wait": 0}``: the saved report, or a job generating it.
+
+    Without ``refresh`` a saved report is returned as is. Otherwise a job is
+    queued (an incremental run: a refresh only re-asks stale and NotFound
+    fields); with ``wait`` seconds the call blocks for it and returns the
+    report, else (or on timeout) 202 with the job.
+    """
+    data = await read_json(request)
+    address = str((data or {}).get("address") or "").strip()
+    if not address:
+        return error(request, 400, 'JSON body with "address" is required')
+    try:
+        wait = min(max(float(data.get("wait") or 0), 0.0), API_MAX_WAIT)
+    except (TypeError, ValueError):
+        return error(request, 400, '"wait" must be a number of seconds')
+
+    if not data.get("refresh"):
+        entry, cached = await lookup(request.app, address)
+        if entry is not None:
+            return send_report(request, entry, "hit" if cached else "miss")
+
+    workers = request.app[WORKERS]
+    job_id = await asyncio.to_thread(workers.submit, address, incremental=True)
+    job = await wait_for_job(workers.store, job_id, wait)
+    if job["status"] == "done":
+        normalized = job["result"]["normalized"]
+        request.app[REPORTS].drop(address_key(normalized))
+        entry, _ = await lookup(request.app, normalized, normalized=True)
+        if entry is not None:
+            return send_report(request, entry, "miss")
+    if job["status"] == "failed":
+        return send_json(request, job_summary(job), 502)
+    return send_json(request, job_summary(job), 202, {"Location": f"/v1/jobs/{job_id}"})
+
+async def wait_for_job(store, job_id, wait):
+    """The job once it finished, or as it is after ``wait`` seconds."""
+    deadline = time.monotonic() + wait
+    while True:
+        job = await asyncio.to_thread(store.get, job_id)
+        if job["status"] not in ACTIVE_STATUSES or time.monotonic() >= deadline:
+            return job
+        await asyncio.sleep(min(0.25, max(0.0, deadline - time.monotonic())))
+
+@routes.post("/v1/reports/bulk")
+async def bulk_reports(request):
+    """``{"addresses": [...], "refresh": false}``: saved reports inline, a queued job for each of the rest.
+
+    Saved reports are read in one Mongo query; their serialized bodies are
+    spliced into the response as they are.
+    """
+    data = await read_json(request)
+    addresses = (data or {}).get("addresses")
+    if not isinstance(addresses, list) or not all(isinstance(a, str) for a in addresses):
+        return error(request, 400, 'JSON body with "addresses": [string, ...] is required')
+    addresses = list(dict.fromkeys(a.strip() for a in addresses if a.strip()))
+    if len(addresses) > API_BULK_MAX:
+        return error(request, 413, f"at most {API_BULK_MAX} addresses per request")
+
+    cache = request.app[REPORTS]
+    entries = {}
+    if not data.get("refresh"):
+        normalized = await asyncio.to_thread(lambda: {a: report_address(a) for a in addresses})
+        keys = {a: address_key(normalized[a]) for a in addresses}
+        entries = {a: cache.get(k) for a, k in keys.items()}
+        missing = [a for a, e in entries.items() if e is None]
+        if missing:
+            docs = await asyncio.to_thread(find_reports, collection, [normalized[a] for a in missing])
+            for a in missing:
+                if keys[a] in docs:
+                    entries[a] = cache.put(keys[a], docs[keys[a]])
+
+    workers = request.app[WORKERS]
+    parts = []
+    for a in addresses:
+        entry = entries.get(a)
+        if entry is not None:
+            parts.append(dumps({"address": a, "status": "cached", "etag": entry.etag})[:-1]
+                         + b',"report":' + entry.body + b"}")
+        else:
+            job_id = await asyncio.to_thread(workers.submit, a, incremental=True)
+            job = await asyncio.to_thread(workers.store.get, job_id)
+            parts.append(dumps(job_summary(job)))
+    return send_bytes(request, b'{"results":[' + b",".join(parts) + b"]}")
+
+@routes.get("/v1/jobs/{job_id}")
+async def get_job(request):
+    job = await asyncio.to_thread(request.app[WORKERS].store.get, request.match_info["job_id"])
+    if job is None:
+        return error(request, 404, "unknown job")
+    return send_json(request, job_summary(job))
+
+# --------------------------------------------------------------
+# APP
+# --------------------------------------------------------------
+@web.middleware
+async def guard(request, handler):
+    """Bearer-token check (when API_TOKEN is set) and JSON errors instead of HTML tracebacks."""
+    if API_TOKEN and request.path.startswith("/v1/") \
+            and request.headers.get("Authorization", "") != f"Bearer {API_TOKEN}":
+        return error(request, 401, "missing or wrong bearer token")
+    try:
+        return await handler(request)
+    except web.HTTPException:
+        raise
+    except Exception as e:
+        print("API error:", e)
+        return error(request, 500, "internal error")
+
+def make_app(workers=None):
+    """The aiohttp app; without ``workers`` it starts its own ConnectionManager and JobWorkers."""
+    app = web.Application(middlewares=[guard])
+    app[REPORTS] = ReportCache()
+    app.add_routes(routes)
+    if workers is not None:
+        app[WORKERS] = workers
+        return app
+
+    async def start_workers(app):
+        conns = await asyncio.to_thread(ConnectionManager)
+        app[WORKERS] = await asyncio.to_thread(lambda: JobWorkers(JobStore(), conns).start())
+
+    async def stop_workers(app):
+        await asyncio.to_thread(app[WORKERS].conns.close)
+
+    app.on_startup.append(start_workers)
+    app.on_cleanup.append(stop_workers)
+    return app
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the ReValix report API.")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8080")))
+    args = parser.parse_args(argv)
+    web.run_app(make_app(), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
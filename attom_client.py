@@ -0,0 +1,107 @@
+# ==============================================================
+# 🏠 ReValix Async ATTOM Client
+# Pooled aiohttp session + token-bucket rate limit + jittered retry
+# ==============================================================
+
+import asyncio, aiohttp, random, time
+
+ATTOM_BASE_URL = "https://api.gateway.attomdata.com/propertyapi/v1.0.0"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# --------------------------------------------------------------
+# RATE LIMITER
+# --------------------------------------------------------------
+class TokenBucket:
+    """Async token bucket: ``rate`` requests per second with bursts up to ``capacity``."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+# --------------------------------------------------------------
+# CLIENT
+# --------------------------------------------------------------
+class AttomClient:
+    """Shared ATTOM client; create once and reuse for every lookup.
+
+    ``rate_per_sec``/``burst`` should match the ATTOM plan's throttle; 429s
+    and 5xx responses are retried with exponential backoff plus full jitter.
+    """
+
+    def __init__(self, api_key, rate_per_sec=5, burst=10, max_connections=20, max_retries=4,
+                 backoff_base=0.5, backoff_max=20.0, timeout=30, session=None):
+        self.api_key = api_key
+        self.bucket = TokenBucket(rate_per_sec, burst)
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session = session
+        self._owns_session = session is None
+
+    async def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def __aenter__(self):
+        await self.session()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def get_json(self, path, params):
+        """GET ``{ATTOM_BASE_URL}/{path}`` and return the decoded JSON body."""
+        session = await self.session()
+        headers = {"apikey": self.api_key, "accept": "application/json"}
+        url = f"{ATTOM_BASE_URL}/{path}"
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                async with session.get(url, params=params, headers=headers) as res:
+                    if res.status in RETRY_STATUSES and attempt < self.max_retries:
+                        await asyncio.sleep(self._backoff(attempt, res.headers.get("Retry-After")))
+                        continue
+                    res.raise_for_status()
+                    return await res.json(content_type=None)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+
+    async def basic_profile(self, address):
+        """Return the ``property`` list from property/basicprofile for a one-line address."""
+        parts = address.split(",")
+        address1, address2 = parts[0].strip(), ",".join(parts[1:]).strip()
+        data = await self.get_json("property/basicprofile", {"address1": address1, "address2": address2})
+        return data.get("property", [])
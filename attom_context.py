@@ -0,0 +1,72 @@
+# ==============================================================
+# 🎯 ReValix ATTOM Context Selection
+# Pass each GPT chunk only the ATTOM attributes related to its fields
+# ==============================================================
+
+import re
+import pandas as pd
+
+from attom_spec import ATTOM_COLUMN_BLOCKS
+from chunking import assign_groups
+
+# --------------------------------------------------------------
+# CONTEXT BLOCKS (columns per block come from attom_spec.ATTOM_SPEC)
+# --------------------------------------------------------------
+# Always sent: enough to identify the property and its basic shape.
+CORE_COLUMNS = ["Address OneLine", "Property Type", "Property Subtype", "Year Built", "Building Size"]
+
+# Field group (chunking.FIELD_GROUP_STARTS) → ATTOM blocks worth showing for it.
+GROUP_BLOCKS = {
+    "Identification": ["identifier", "summary", "sale"],
+    "Location": ["address", "area", "location", "identifier"],
+    "Land & Site": ["lot", "area", "location", "summary"],
+    "Building": ["building", "summary", "utilities"],
+    "Interior & Systems": ["building", "utilities"],
+    "Occupancy": ["owner", "summary"],
+    "Unit": ["building", "summary"],
+    "Unit Lease": ["owner"],
+    "Ownership & Title": ["owner", "sale", "mortgage", "identifier"],
+    "Transfer": ["sale", "owner", "mortgage"],
+    "Valuation": ["assessment", "sale", "tax"],
+    "Income": ["assessment", "sale"],
+    "Financing": ["mortgage", "sale"],
+    "Tax": ["tax", "assessment", "area"],
+    "Amenities": ["building", "utilities"],
+    "Market": ["area", "sale", "assessment"],
+    "Market Supply": ["area", "building"],
+    "Market Economy": ["area"],
+    "Demographics": ["area", "location"],
+    "AI Scores": ["building", "assessment", "sale", "summary"],
+}
+
+STOPWORDS = {"of", "the", "and", "or", "no", "id", "type", "value", "rate", "name", "total", "current", "market"}
+
+def _words(text):
+    return {w for w in re.findall(r"[a-z]+", text.lower()) if len(w) > 2 and w not in STOPWORDS}
+
+# --------------------------------------------------------------
+# SELECTION
+# --------------------------------------------------------------
+def select_attom_columns(fields, columns, groups=None):
+    """ATTOM columns relevant to ``fields``: core + group blocks + shared significant words."""
+    wanted = list(CORE_COLUMNS)
+    for group in dict.fromkeys(assign_groups(fields, groups)):
+        for block in GROUP_BLOCKS.get(group, []):
+            wanted.extend(ATTOM_COLUMN_BLOCKS[block])
+    field_words = set().union(*(_words(f) for f in fields)) if fields else set()
+    wanted.extend(c for c in columns if _words(c) & field_words)
+    available = set(columns)
+    return [c for c in dict.fromkeys(wanted) if c in available]
+
+def compact_attom_context(df_attom, fields, groups=None):
+    """``Key=value; ...`` over the relevant, non-empty ATTOM attributes, or "None"."""
+    if df_attom is None or df_attom.empty:
+        return "None"
+    row = df_attom.iloc[0]
+    parts = []
+    for col in select_attom_columns(fields, list(df_attom.columns), groups):
+        val = row[col]
+        if val is None or (not isinstance(val, (list, dict)) and pd.isna(val)) or str(val).strip() == "":
+            continue
+        parts.append(f"{col}={val}")
+    return "; ".join(parts) if parts else "None"
@@ -0,0 +1,205 @@
+# ==============================================================
+# 🗺️ ReValix ATTOM Path Spec
+# One declarative table of ATTOM basicprofile paths, compiled into a
+# prefix-trie extractor that flattens payloads into columns
+# ==============================================================
+
+import itertools
+import pandas as pd
+
+# --------------------------------------------------------------
+# SPEC: block → [(flattened column, ATTOM path, report fields it fills)]
+# --------------------------------------------------------------
+# Blocks are the context blocks attom_context shows per field group.
+# "Property Type" and "Property Subtype" are crossed on purpose: ATTOM's
+# propSubType is what the report template calls the property type.
+ATTOM_SPEC = {
+    "address": [
+        ("Address Country",    "address.country",     ["Country"]),
+        ("Address State",      "address.countrySubd", ["State"]),
+        ("Address Line 1",     "address.line1",       ["Address Line 1"]),
+        ("Address Line 2",     "address.line2",       ["Address Line 2"]),
+        ("Address City",       "address.locality",    ["City"]),
+        ("Address Match Code", "address.matchCode",   ["Address Match Code"]),
+        ("Address OneLine",    "address.oneLine",     ["Full Address"]),
+        ("Postal Code 1",      "address.postal1",     ["Postal Code"]),
+        ("Postal Code 2",      "address.postal2",     ["Secondary Postal Code"]),
+        ("Postal Code 3",      "address.postal3",     []),
+    ],
+    "area": [
+        ("Census Block Group",    "area.censusBlockGroup", ["Census Block Group"]),
+        ("Census Tract Ident",    "area.censusTractIdent", ["Census Tract"]),
+        ("Country Sec Subd",      "area.countrySecSubd",   ["County Subdivision"]),
+        ("Subdivision Name",      "area.subdName",         ["Subdivision Name"]),
+        ("Subdivision Tract Num", "area.subdTractNum",     ["Subdivision Tract Number"]),
+    ],
+    "assessment": [
+        ("Appraised Value",            "assessment.appraised",              ["Current Appraised Value"]),
+        ("Assessed Improvement Value", "assessment.assessed.assdImprValue", ["Improvements Assessed Value"]),
+        ("Assessed Land Value",        "assessment.assessed.assdLandValue", ["Land Assessed Value"]),
+        ("Assessed Total Value",       "assessment.assessed.assdTtlValue",  ["Assessed Value"]),
+        ("Delinquent Year",            "assessment.delinquentyear",         ["Delinquent Year"]),
+        ("Improvement Percent",        "assessment.improvementPercent",     ["Improvement Percent"]),
+        ("Market Improvement Value",   "assessment.market.mktImprValue",    ["Current Improvements Value"]),
+        ("Market Land Value",          "assessment.market.mktLandValue",    ["Current Land Value"]),
+        ("Market Total Value",         "assessment.market.mktTtlValue",     ["Current Market Value"]),
+    ],
+    "mortgage": [
+        ("First Mortgage Amount",             "assessment.mortgage.FirstConcurrent.amount",                   ["First Mortgage Amount"]),
+        ("First Mortgage Lender First Name",  "assessment.mortgage.FirstConcurrent.lenderFirstName",          ["First Mortgage Lender First Name"]),
+        ("First Mortgage Lender Last Name",   "assessment.mortgage.FirstConcurrent.lenderLastName",           ["First Mortgage Lender Last Name"]),
+        ("First Mortgage Document Number",    "assessment.mortgage.FirstConcurrent.trustDeedDocumentNumber",  ["First Mortgage Document Number"]),
+        ("Second Mortgage Amount",            "assessment.mortgage.SecondConcurrent.amount",                  ["Second Mortgage Amount"]),
+        ("Second Mortgage Lender First Name", "assessment.mortgage.SecondConcurrent.lenderFirstName",         ["Second Mortgage Lender First Name"]),
+        ("Second Mortgage Lender Last Name",  "assessment.mortgage.SecondConcurrent.lenderLastName",          ["Second Mortgage Lender Last Name"]),
+        ("Second Mortgage Document Number",   "assessment.mortgage.SecondConcurrent.trustDeedDocumentNumber", ["Second Mortgage Document Number"]),
+    ],
+    "owner": [
+        ("Absentee Owner Status",     "assessment.owner.absenteeOwnerStatus",   ["Absentee Owner Status"]),
+        ("Corporate Owner Indicator", "assessment.owner.corporateIndicator",    ["Corporate Owner Indicator"]),
+        ("Mailing Address OneLine",   "assessment.owner.mailingAddressOneLine", ["Mailing Address"]),
+        ("Owner 1 Name",              "assessment.owner.owner1.fullName",       ["Owner 1 Name"]),
+        ("Owner 2 Name",              "assessment.owner.owner2.fullName",       ["Owner 2 Name"]),
+        ("Owner 3 Name",              "assessment.owner.owner3.fullName",       ["Owner 3 Name"]),
+        ("Owner 4 Name",              "assessment.owner.owner4.fullName",       ["Owner 4 Name"]),
+    ],
+    "tax": [
+        ("Tax Amount",          "assessment.tax.taxAmt",                  ["Property Tax"]),
+        ("Tax Year",            "assessment.tax.taxYear",                 ["Current Tax Year"]),
+        ("Tax Exemption",       "assessment.tax.exemption",               ["Tax Exemption"]),
+        ("Homeowner Exemption", "assessment.tax.exemptiontype.Homeowner", ["Homeowner Exemption"]),
+        ("Veteran Exemption",   "assessment.tax.exemptiontype.Veteran",   ["Veteran Exemption"]),
+    ],
+    "building": [
+        ("Building Condition",        "building.construction.condition",        ["Building Condition"]),
+        ("Construction Type",         "building.construction.constructionType", ["Construction Type"]),
+        ("Foundation Type",           "building.construction.foundationType",   ["Foundation"]),
+        ("Frame Type",                "building.construction.frameType",        ["Structural System"]),
+        ("Basement Finished Percent", "building.interior.bsmtFinishedPercent",  ["Basement Finished Percent"]),
+        ("Basement Size",             "building.interior.bsmtSize",             ["Basement Size"]),
+        ("Fireplace Count",           "building.interior.fplcCount",            ["Fireplace Count"]),
+        ("Fireplace Type",            "building.interior.fplcType",             ["Fireplace Type"]),
+        ("Garage Type",               "building.parking.garageType",            ["Garage Type"]),
+        ("Parking Size",              "building.parking.prkgSize",              ["Parking Size"]),
+        ("Bedrooms",                  "building.rooms.beds",                    ["Total Bedroom"]),
+        ("Bathrooms Total",           "building.rooms.bathsTotal",              ["Total Bath"]),
+        ("Rooms Total",               "building.rooms.roomsTotal",              ["Total Rooms"]),
+        ("Building Size",             "building.size.bldgSize",                 ["Building Area", "RBA"]),
+        ("Living Size",               "building.size.livingSize",               ["NRA"]),
+        ("Gross Size",                "building.size.grossSize",                ["GBA"]),
+        ("Building Levels",           "building.summary.levels",                ["Building Levels", "Stories"]),
+        ("Building View",             "building.summary.view",                  ["Building View"]),
+        ("Building View Code",        "building.summary.viewCode",              ["Building View Code"]),
+    ],
+    "lot": [
+        ("Lot Number",  "lot.lotNum",     ["Lot Number"]),
+        ("Lot Size 1",  "lot.lotSize1",   ["Land Area(Acre)"]),
+        ("Lot Size 2",  "lot.lotSize2",   ["Lot Size (Alt)"]),
+        ("Zoning Type", "lot.zoningType", ["Land Use Compliance / Zoning"]),
+    ],
+    "sale": [
+        ("Sale Amount",           "sale.saleAmountData.saleAmt",     ["Purchase Price / Sale Price"]),
+        ("Sale Record Date",      "sale.saleAmountData.saleRecDate", ["Purchase Date / Sale Date"]),
+        ("Sale Document Number",  "sale.saleAmountData.saleDocNum",  ["Sale Document Number"]),
+        ("Sale Transaction Date", "sale.saleTransDate",              ["Sale Transaction Date"]),
+        ("Sale Transaction ID",   "sale.transactionIdent",           ["Sale Transaction ID"]),
+    ],
+    "summary": [
+        ("Property Type",     "summary.propType",    ["Property Subtype"]),
+        ("Property Subtype",  "summary.propSubType", ["Property Type"]),
+        ("Property Land Use", "summary.propLandUse", ["Property Land Use"]),
+        ("Year Built",        "summary.yearBuilt",   ["Year Built"]),
+        ("Legal Description", "summary.legal1",      ["Legal Description"]),
+    ],
+    "location": [
+        ("Latitude",     "location.latitude",  ["Latitude"]),
+        ("Longitude",    "location.longitude", ["Longitude"]),
+        ("GeoID",        "location.geoid",     ["Geo ID"]),
+        ("Geo Accuracy", "location.accuracy",  ["Geo Accuracy"]),
+    ],
+    "identifier": [
+        ("Identifier ID", "identifier.Id",      ["Identifier ID"]),
+        ("APN",           "identifier.apn",     ["Property ID"]),
+        ("ATTOM ID",      "identifier.attomId", []),
+        ("FIPS Code",     "identifier.fips",    ["FIPS Code"]),
+    ],
+    "utilities": [
+        ("Cooling Type", "utilities.coolingType", ["Cooling"]),
+        ("Heating Type", "utilities.heatingType", ["Heating"]),
+        ("Energy Type",  "utilities.energyType",  ["Energy Type"]),
+        ("Wall Type",    "utilities.wallType",    ["Wall Type"]),
+    ],
+    "vintage": [
+        ("Last Modified Date", "vintage.lastModified", ["Last Modified Date"]),
+        ("Publication Date",   "vintage.pubDate",      ["Publication Date"]),
+    ],
+}
+
+ATTOM_COLUMNS = [column for rows in ATTOM_SPEC.values() for column, _, _ in rows]
+ATTOM_PATHS = {column: path for rows in ATTOM_SPEC.values() for column, path, _ in rows}
+ATTOM_COLUMN_BLOCKS = {block: [column for column, _, _ in rows] for block, rows in ATTOM_SPEC.items()}
+
+# Report field → flattened ATTOM column. Report fields not listed here can never
+# come from ATTOM, so the pipeline's first GPT pass asks for them without waiting
+# for it (and without its context; the retry pass adds that).
+ATTOM_FIELD_MAP = {field: column for rows in ATTOM_SPEC.values() for column, _, fields in rows for field in fields}
+
+# --------------------------------------------------------------
+# COMPILED EXTRACTOR
+# --------------------------------------------------------------
+class AttomExtractor:
+    """Flattens ATTOM property payloads along ``{column: "dotted.path"}``.
+
+    The paths are compiled once into a prefix trie and then into one Python
+    function with a nested ``if`` per trie node, so every nested object
+    (``assessment``, ``assessment.assessed``, ...) is looked up once per
+    payload however many columns read from it, and missing blocks are
+    skipped whole. ``columns(payloads)`` returns ``{column: [value, ...]}``
+    with None where a path is absent, as ``safe_get`` did.
+    """
+
+    def __init__(self, paths=None):
+        paths = ATTOM_PATHS if paths is None else paths
+        self.names = list(paths)
+        self.trie = {}
+        for i, path in enumerate(paths.values()):
+            node = self.trie
+            keys = path.split(".")
+            for key in keys[:-1]:
+                node = node.setdefault(key, ([], {}))[1]
+            node.setdefault(keys[-1], ([], {}))[0].append(i)
+        self._extract = self._compile()
+
+    def _compile(self):
+        lines = ["def extract(payloads, out):",
+                 "    for row, n0 in enumerate(payloads):",
+                 "        if not isinstance(n0, dict):",
+                 "            continue"]
+        node_ids = itertools.count(1)
+
+        def emit(node, obj, indent):
+            for key, (cols, children) in node.items():
+                lines.append(f"{indent}v = {obj}.get({key!r})")
+                lines.append(f"{indent}if v is not None:")
+                lines.extend(f"{indent}    out[{c}][row] = v" for c in cols)
+                if children:
+                    child = f"n{next(node_ids)}"
+                    lines.append(f"{indent}    if isinstance(v, dict):")
+                    lines.append(f"{indent}        {child} = v")
+                    emit(children, child, indent + "        ")
+
+        emit(self.trie, "n0", "        ")
+        namespace = {}
+        exec(compile("\n".join(lines), "<attom_spec extractor>", "exec"), namespace)
+        return namespace["extract"]
+
+    def columns(self, payloads):
+        payloads = payloads if isinstance(payloads, list) else list(payloads)
+        out = [[None] * len(payloads) for _ in self.names]
+        self._extract(payloads, out)
+        return dict(zip(self.names, out))
+
+    def frame(self, payloads):
+        return pd.DataFrame(self.columns(payloads), columns=self.names)
+
+attom_extractor = AttomExtractor()
@@ -0,0 +1,190 @@
+# ==============================================================
+# 📦 ReValix Batch Portfolio Enrichment
+# Enrich thousands of addresses from a CSV/XLSX with bounded concurrency
+#
+#   python batch.py portfolio.xlsx --concurrency 32
+# ==============================================================
+
+import argparse, asyncio, aiohttp, hashlib, json, os, time
+from contextlib import AsyncExitStack
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from pipeline import (
+    UpstreamLimits, address_cache, attom_cache, county_directory, enrich_property, ensure_collection_indexes,
+    collection, gpt_cache, make_attom_client, openai_scheduler,
+)
+from writer import BulkWriter
+
+CHECKPOINT_DIR = ".batch_progress"
+
+# --------------------------------------------------------------
+# INPUT
+# --------------------------------------------------------------
+def read_portfolio(source, filename=None):
+    """Return the list of raw addresses in a CSV/XLSX file (path or upload buffer)."""
+    name = (filename or str(source)).lower()
+    if name.endswith((".xlsx", ".xls")):
+        df = pd.read_excel(source, dtype=str)
+    else:
+        df = pd.read_csv(source, dtype=str)
+
+    address_cols = [c for c in df.columns if str(c).strip().lower() in ("address", "property address", "full address")]
+    col = address_cols[0] if address_cols else df.columns[0]
+    addresses = df[col].dropna().astype(str).str.strip()
+    return [a for a in addresses.tolist() if a]
+
+def default_checkpoint_path(addresses):
+    """Checkpoint file derived from the portfolio contents, so re-uploads resume."""
+    digest = hashlib.sha1("\n".join(addresses).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CHECKPOINT_DIR, f"{digest}.jsonl")
+
+# --------------------------------------------------------------
+# CHECKPOINT (append-only JSONL, one line per finished address)
+# --------------------------------------------------------------
+def load_completed(checkpoint_path):
+    done = set()
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line after a crash
+                if entry.get("status") == "done":
+                    done.add(entry["address"])
+    return done
+
+def append_checkpoint(fh, entry):
+    fh.write(json.dumps(entry) + "\n")
+    fh.flush()
+    os.fsync(fh.fileno())
+
+# --------------------------------------------------------------
+# RUNNER
+# --------------------------------------------------------------
+async def run_batch(addresses, concurrency=8, openai_limit=32, attom_limit=4, mongo_limit=4,
+                    checkpoint_path=None, on_progress=None, incremental=False, session=None, attom=None,
+                    limits=None):
+    """Enrich ``addresses`` with ``concurrency`` properties in flight at once.
+
+    Addresses already marked done in ``checkpoint_path`` are skipped, so a
+    crashed run picks up where it stopped. ``on_progress(done, total, entry)``
+    is called after every address. With ``incremental`` saved reports only
+    get their stale or NotFound fields refreshed.
+    Reports are written through one BulkWriter; an address is checkpointed
+    as done only after MongoDB acknowledged its write.
+    ``session``/``attom``/``limits`` reuse a long-lived loop's pools and caps
+    (the app's ConnectionManager); left out, the run opens and closes its own.
+    """
+    checkpoint_path = checkpoint_path or default_checkpoint_path(addresses)
+    os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+    completed = load_completed(checkpoint_path)
+    pending = [a for a in dict.fromkeys(addresses) if a not in completed]
+    total = len(completed) + len(pending)
+    summary = {"total": total, "skipped": len(completed), "done": 0, "failed": 0, "checkpoint": checkpoint_path}
+
+    if limits is None:
+        # Blocking steps (sync OpenAI/Mongo clients) run in threads; size the
+        # pool so the upstream semaphores, not the executor, are the bottleneck.
+        # A shared loop keeps its own executor and caps.
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=openai_limit + attom_limit + mongo_limit))
+        limits = UpstreamLimits(openai=openai_limit, attom=attom_limit, mongo=mongo_limit)
+
+    await asyncio.to_thread(ensure_collection_indexes)
+    queue = asyncio.Queue()
+    for a in pending:
+        queue.put_nowait(a)
+
+    writer = BulkWriter(collection, max_batch=max(1, concurrency) * 4, max_delay=1.0)
+    with open(checkpoint_path, "a", encoding="utf-8") as fh:
+        async with AsyncExitStack() as owned:
+            if session is None:
+                session = await owned.enter_async_context(
+                    aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=openai_limit))
+                )
+            if attom is None:
+                attom = await owned.enter_async_context(make_attom_client())
+
+            async def worker():
+                while True:
+                    try:
+                        raw_addr = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    started = time.monotonic()
+                    entry = {"address": raw_addr}
+                    try:
+                        result = await enrich_property(session, attom, raw_addr, limits, incremental=incremental,
+                                                       writer=writer)
+                        if result["saved"] is not None:
+                            # Checkpoint only what MongoDB acknowledged.
+                            await asyncio.wrap_future(result["saved"])
+                        df_final = result["df_final"]
+                        entry.update({
+                            "status": "done",
+                            "normalized": result["normalized"],
+                            "filled": int((df_final["Value"] != "NotFound").sum()),
+                            "refreshed": result["refreshed"],
+                        })
+                        summary["done"] += 1
+                    except Exception as e:
+                        entry.update({"status": "error", "error": str(e)})
+                        summary["failed"] += 1
+                    entry["seconds"] = round(time.monotonic() - started, 2)
+                    entry["finished_at"] = datetime.now(timezone.utc).isoformat()
+                    append_checkpoint(fh, entry)
+                    if on_progress:
+                        on_progress(summary["skipped"] + summary["done"] + summary["failed"], total, entry)
+
+            try:
+                await asyncio.gather(*[worker() for _ in range(max(1, concurrency))])
+            finally:
+                await asyncio.to_thread(writer.close)
+
+    summary["gpt_cache"] = gpt_cache.stats()
+    summary["attom_cache"] = attom_cache.stats()
+    summary["address_cache"] = address_cache.stats()
+    summary["county_directory"] = county_directory.stats()
+    summary["openai"] = openai_scheduler.stats()
+    summary["mongo"] = writer.stats()
+    return summary
+
+# --------------------------------------------------------------
+# CLI
+# --------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Enrich a portfolio of property addresses.")
+    parser.add_argument("portfolio", help="CSV or XLSX file with an 'address' column (or addresses in the first column)")
+    parser.add_argument("--concurrency", type=int, default=8, help="properties processed at once")
+    parser.add_argument("--openai-limit", type=int, default=32, help="max concurrent OpenAI requests")
+    parser.add_argument("--attom-limit", type=int, default=4, help="max concurrent ATTOM requests")
+    parser.add_argument("--mongo-limit", type=int, default=4, help="max concurrent Mongo writes")
+    parser.add_argument("--incremental", action="store_true", help="only refresh stale or NotFound fields of saved reports")
+    parser.add_argument("--checkpoint", help="progress file used to resume (default: derived from the portfolio)")
+    args = parser.parse_args(argv)
+
+    addresses = read_portfolio(args.portfolio)
+
+    def print_progress(done, total, entry):
+        status = entry["status"] if entry["status"] == "done" else f"error: {entry.get('error')}"
+        print(f"[{done}/{total}] {entry['address']} ({entry['seconds']}s) {status}", flush=True)
+
+    summary = asyncio.run(run_batch(
+        addresses,
+        concurrency=args.concurrency,
+        openai_limit=args.openai_limit,
+        attom_limit=args.attom_limit,
+        mongo_limit=args.mongo_limit,
+        checkpoint_path=args.checkpoint,
+        on_progress=print_progress,
+        incremental=args.incremental,
+    ))
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
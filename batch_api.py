@@ -0,0 +1,368 @@
+# ==============================================================
+# 🌙 ReValix Overnight Enrichment via the OpenAI Batch API
+# Build every fetch_section prompt for a portfolio into JSONL batch
+# files, submit, poll, then parse_section + merge_all_batch the results
+#
+#   python batch_api.py portfolio.xlsx --run-dir batch_runs/march
+#   python batch_api.py --run-dir batch_runs/march          (resume)
+#   python batch_api.py portfolio.csv --fake-dir /tmp/fake  (offline)
+# ==============================================================
+
+import argparse, asyncio, json, os, shutil, time, uuid
+import pandas as pd
+from datetime import datetime
+
+from batch import read_portfolio
+from writer import BulkWriter
+from pipeline import (
+    UpstreamLimits, ask_county_site, attom_fips, chunk_fields, client, collection, fetch_attom_data_async, fill_rate_stats,
+    first_pass_context, flatten_attom, gpt_cache, load_field_template, lookup_county_site, make_attom_client,
+    map_attom_to_fields, merge_all_batch, merge_answered_batch, missing_mapped_fields, normalize_address, normalize_address_local,
+    parse_section, section_cache_key, section_payload, unmapped_fields,
+)
+
+CHAT_ENDPOINT = "/v1/chat/completions"
+MAX_REQUESTS_PER_FILE = 50000      # OpenAI Batch API per-file request limit
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# --------------------------------------------------------------
+# TRANSPORTS
+# --------------------------------------------------------------
+class OpenAIBatchTransport:
+    """Real Batch API: Files upload + Batches create/retrieve."""
+
+    def __init__(self, openai_client=None, completion_window="24h"):
+        self.client = openai_client or client
+        self.completion_window = completion_window
+
+    def upload(self, path):
+        with open(path, "rb") as f:
+            return self.client.files.create(file=f, purpose="batch").id
+
+    def create(self, input_file_id):
+        batch = self.client.batches.create(
+            input_file_id=input_file_id, endpoint=CHAT_ENDPOINT, completion_window=self.completion_window
+        )
+        return batch.id
+
+    def status(self, batch_id):
+        b = self.client.batches.retrieve(batch_id)
+        return {"status": b.status, "output_file_id": b.output_file_id, "error_file_id": b.error_file_id}
+
+    def download(self, file_id, dest):
+        with open(dest, "w", encoding="utf-8") as f:
+            f.write(self.client.files.content(file_id).text)
+
+
+def echo_not_found(body):
+    """Default fake responder: every field asked answered NotFound, in the format the request asks for.
+
+    A ``response_format`` request (SECTION_RESPONSE_MODE "json") gets a
+    schema-shaped object with null values; otherwise a markdown table.
+    """
+    schema = ((body.get("response_format") or {}).get("json_schema") or {}).get("schema")
+    if schema:
+        return json.dumps({f: {"value": None, "source": "Fake Batch"} for f in schema["required"]})
+    prompt = body["messages"][0]["content"]
+    block = prompt.split("The following fields are needed:\n", 1)[-1].split("\n\nATTOM verified info", 1)[0]
+    fields = [line.split(": ", 1)[0].strip() for line in block.splitlines() if line.strip()]
+    return "| Field | Value | Source |\n" + "\n".join(f"| {f} | NotFound | Fake Batch |" for f in fields)
+
+
+class FileBatchTransport:
+    """File-based stand-in for the Batch API, for tests and offline runs.
+
+    Batches complete on the first status check; each request body is answered
+    by ``responder(body) -> content`` (``echo_not_found`` by default).
+    """
+
+    def __init__(self, root, responder=echo_not_found):
+        self.root = root
+        self.responder = responder
+        os.makedirs(os.path.join(root, "files"), exist_ok=True)
+        os.makedirs(os.path.join(root, "batches"), exist_ok=True)
+
+    def _file(self, file_id):
+        return os.path.join(self.root, "files", f"{file_id}.jsonl")
+
+    def _batch(self, batch_id):
+        return os.path.join(self.root, "batches", f"{batch_id}.json")
+
+    def upload(self, path):
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        shutil.copyfile(path, self._file(file_id))
+        return file_id
+
+    def create(self, input_file_id):
+        batch_id = f"batch-{uuid.uuid4().hex[:12]}"
+        with open(self._batch(batch_id), "w") as f:
+            json.dump({"input_file_id": input_file_id, "status": "in_progress"}, f)
+        return batch_id
+
+    def status(self, batch_id):
+        with open(self._batch(batch_id)) as f:
+            batch = json.load(f)
+        if batch["status"] == "in_progress":
+            output_file_id = f"file-{uuid.uuid4().hex[:12]}"
+            with open(self._file(batch["input_file_id"]), encoding="utf-8") as src, \
+                 open(self._file(output_file_id), "w", encoding="utf-8") as out:
+                for line in src:
+                    req = json.loads(line)
+                    content = self.responder(req["body"])
+                    out.write(json.dumps({
+                        "id": f"resp-{uuid.uuid4().hex[:8]}",
+                        "custom_id": req["custom_id"],
+                        "response": {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}},
+                        "error": None,
+                    }) + "\n")
+            batch.update({"status": "completed", "output_file_id": output_file_id})
+            with open(self._batch(batch_id), "w") as f:
+                json.dump(batch, f)
+        return {"status": batch["status"], "output_file_id": batch.get("output_file_id"), "error_file_id": None}
+
+    def download(self, file_id, dest):
+        shutil.copyfile(self._file(file_id), dest)
+
+# --------------------------------------------------------------
+# RUN DIRECTORY STATE
+# --------------------------------------------------------------
+def _state_path(run_dir):
+    return os.path.join(run_dir, "state.json")
+
+def load_state(run_dir):
+    with open(_state_path(run_dir)) as f:
+        return json.load(f)
+
+def save_state(run_dir, state):
+    tmp = _state_path(run_dir) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, _state_path(run_dir))
+
+# --------------------------------------------------------------
+# STEP 1: PREPARE (normalize, ATTOM, county; write request files)
+# --------------------------------------------------------------
+async def prepare_run(addresses, run_dir, concurrency=16, openai_limit=16, attom_limit=4):
+    """Resolve per-address context and write Batch API request files + manifest."""
+    os.makedirs(run_dir, exist_ok=True)
+    limits = UpstreamLimits(openai=openai_limit, attom=attom_limit)
+    fill_rates = await asyncio.to_thread(fill_rate_stats.get)
+    df_fields = load_field_template()
+    prepared = [None] * len(addresses)
+    queue = asyncio.Queue()
+    for item in enumerate(addresses):
+        queue.put_nowait(item)
+
+    async with make_attom_client() as attom:
+
+        async def prepare_one(raw_addr):
+            normalized = await asyncio.to_thread(normalize_address_local, raw_addr)
+            if not normalized:
+                async with limits.openai:
+                    normalized = await asyncio.to_thread(normalize_address, raw_addr)
+
+            async with limits.attom:
+                attom_data = await fetch_attom_data_async(attom, normalized)
+            df_attom = flatten_attom(attom_data)
+            df_map = map_attom_to_fields(df_attom)
+            county_site = await asyncio.to_thread(lookup_county_site, normalized, df_attom)
+            if not county_site:
+                async with limits.openai:
+                    county_site = await asyncio.to_thread(ask_county_site, normalized, df_attom)
+            # The chunk plan and context of enrich_normalized, so both paths share section cache entries.
+            chunks = (chunk_fields(unmapped_fields(df_fields), None, fill_rates)
+                      + chunk_fields(missing_mapped_fields(df_fields, df_map), None, fill_rates))
+            return normalized, county_site, df_attom, df_map, chunks
+
+        async def worker():
+            while True:
+                try:
+                    idx, raw_addr = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    prepared[idx] = await prepare_one(raw_addr)
+                except Exception as e:
+                    print(f"Prepare error for {raw_addr}: {e}")
+
+        await asyncio.gather(*[worker() for _ in range(max(1, concurrency))])
+
+    files, n_requests, out = [], 0, None
+    with open(os.path.join(run_dir, "manifest.jsonl"), "w", encoding="utf-8") as manifest:
+        for idx, raw_addr in enumerate(addresses):
+            if prepared[idx] is None:
+                manifest.write(json.dumps({"idx": idx, "address": raw_addr, "error": "prepare failed"}) + "\n")
+                continue
+            normalized, county_site, df_attom, df_map, chunks = prepared[idx]
+            entry = {"idx": idx, "address": raw_addr, "normalized": normalized, "county_site": county_site,
+                     "fips": attom_fips(df_attom), "attom_map": json.loads(df_map.to_json(orient="records")), "cached": [], "pending": {}}
+            for n, chunk in enumerate(chunks):
+                cached = gpt_cache.get(section_cache_key(normalized, chunk))
+                if cached is not None:
+                    entry["cached"].append(cached)
+                    continue
+                if out is None or n_requests % MAX_REQUESTS_PER_FILE == 0:
+                    if out:
+                        out.close()
+                    files.append(f"requests-{len(files):03d}.jsonl")
+                    out = open(os.path.join(run_dir, files[-1]), "w", encoding="utf-8")
+                custom_id = f"{idx}-{n}"
+                out.write(json.dumps({
+                    "custom_id": custom_id, "method": "POST", "url": CHAT_ENDPOINT,
+                    "body": section_payload(normalized, chunk, county_site, first_pass_context(chunk, df_attom)),
+                }) + "\n")
+                entry["pending"][custom_id] = chunk
+                n_requests += 1
+            manifest.write(json.dumps(entry) + "\n")
+    if out:
+        out.close()
+
+    state = {"created_at": datetime.now().isoformat(), "addresses": len(addresses), "requests": n_requests,
+             "batches": [{"input": name} for name in files]}
+    save_state(run_dir, state)
+    return state
+
+# --------------------------------------------------------------
+# STEP 2: SUBMIT + POLL
+# --------------------------------------------------------------
+def submit_batches(run_dir, transport):
+    state = load_state(run_dir)
+    for b in state["batches"]:
+        if "batch_id" not in b:
+            b["file_id"] = transport.upload(os.path.join(run_dir, b["input"]))
+            b["batch_id"] = transport.create(b["file_id"])
+            b["status"] = "submitted"
+            save_state(run_dir, state)
+    return state
+
+def poll_batches(run_dir, transport, poll_seconds=60, timeout=None, on_status=None):
+    """Wait for every batch to reach a terminal status and download its output.
+
+    Expired and cancelled batches keep the answers they finished, so their
+    output is downloaded too.
+    """
+    started = time.monotonic()
+    while True:
+        state = load_state(run_dir)
+        pending = [b for b in state["batches"] if b.get("status") not in TERMINAL_STATUSES]
+        for b in pending:
+            info = transport.status(b["batch_id"])
+            b["status"] = info["status"]
+            if info["status"] in TERMINAL_STATUSES and info.get("output_file_id"):
+                b["output"] = b["input"].replace("requests-", "output-")
+                transport.download(info["output_file_id"], os.path.join(run_dir, b["output"]))
+            save_state(run_dir, state)
+        if on_status:
+            on_status(state)
+        if all(b.get("status") in TERMINAL_STATUSES for b in state["batches"]):
+            return state
+        if timeout and time.monotonic() - started > timeout:
+            raise TimeoutError(f"Batches still running after {timeout}s; resume later with the same run dir")
+        time.sleep(poll_seconds)
+
+# --------------------------------------------------------------
+# STEP 3: PARSE + MERGE
+# --------------------------------------------------------------
+def read_outputs(run_dir, state):
+    contents = {}
+    for b in state["batches"]:
+        if not b.get("output"):
+            continue
+        with open(os.path.join(run_dir, b["output"]), encoding="utf-8") as f:
+            for line in f:
+                item = json.loads(line)
+                response = item.get("response") or {}
+                if item.get("error") or response.get("status_code") != 200:
+                    continue
+                choices = (response.get("body") or {}).get("choices") or [{}]
+                contents[item["custom_id"]] = choices[0].get("message", {}).get("content", "")
+    return contents
+
+def finalize_run(run_dir, merge_size=200):
+    """Merge batch answers into property_results; also seed the GPT section cache.
+
+    Properties are merged ``merge_size`` at a time in one vectorized pass (merge_engine.py).
+    A property with a failed or missing request only gets the values it was
+    answered (merge_answered_batch), so a lost answer never replaces a saved value.
+    """
+    state = load_state(run_dir)
+    contents = read_outputs(run_dir, state)
+    df_fields = load_field_template()
+    summary = {"merged": 0, "partial": 0, "failed_requests": 0, "skipped_addresses": 0}
+    writer = BulkWriter(collection)
+    pending, partial, fips = [], [], {}
+
+    def flush():
+        summary["merged"] += len(merge_all_batch(pending, df_fields, writer=writer, fips=fips))
+        summary["partial"] += len(merge_answered_batch(partial, df_fields, writer=writer, fips=fips))
+
+    with open(os.path.join(run_dir, "manifest.jsonl"), encoding="utf-8") as manifest:
+        for line in manifest:
+            entry = json.loads(line)
+            if entry.get("error"):
+                summary["skipped_addresses"] += 1
+                continue
+            records, failed = [], 0
+            for content in entry["cached"]:
+                records.extend(parse_section(content))
+            for custom_id, chunk in entry["pending"].items():
+                content = contents.get(custom_id, "")
+                rows = parse_section(content, chunk)
+                if rows:
+                    gpt_cache.set(section_cache_key(entry["normalized"], chunk), content)
+                else:
+                    failed += 1
+                records.extend(rows)
+            summary["failed_requests"] += failed
+            df_map = pd.DataFrame(entry["attom_map"], columns=["Field", "Value", "Source"])
+            df_gpt = pd.DataFrame(records, columns=["Field", "Value", "Source"])
+            (partial if failed else pending).append((entry["normalized"], df_map, df_gpt))
+            fips[entry["normalized"]] = entry.get("fips")
+            if len(pending) + len(partial) >= merge_size:
+                flush()
+                pending, partial, fips = [], [], {}
+    flush()
+    writer.close()
+    summary["mongo"] = writer.stats()
+    state["finalized_at"] = datetime.now().isoformat()
+    state["summary"] = summary
+    save_state(run_dir, state)
+    return summary
+
+# --------------------------------------------------------------
+# ORCHESTRATION + CLI
+# --------------------------------------------------------------
+def run(addresses, run_dir, transport, poll_seconds=60, timeout=None, concurrency=16, on_status=None):
+    """Prepare (unless the run dir already has state), submit, poll and merge."""
+    if not os.path.exists(_state_path(run_dir)):
+        asyncio.run(prepare_run(addresses, run_dir, concurrency=concurrency))
+    submit_batches(run_dir, transport)
+    poll_batches(run_dir, transport, poll_seconds=poll_seconds, timeout=timeout, on_status=on_status)
+    return finalize_run(run_dir)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Enrich a portfolio through the OpenAI Batch API.")
+    parser.add_argument("portfolio", nargs="?", help="CSV/XLSX of addresses (omit to resume --run-dir)")
+    parser.add_argument("--run-dir", default=os.path.join("batch_runs", datetime.now().strftime("%Y%m%d-%H%M%S")))
+    parser.add_argument("--poll-seconds", type=float, default=60)
+    parser.add_argument("--timeout", type=float, help="give up polling after this many seconds (resumable)")
+    parser.add_argument("--concurrency", type=int, default=16, help="addresses prepared at once")
+    parser.add_argument("--fake-dir", help="use the file-based fake Batch endpoint rooted here")
+    args = parser.parse_args(argv)
+
+    if not args.portfolio and not os.path.exists(_state_path(args.run_dir)):
+        parser.error("portfolio is required unless --run-dir points at an existing run")
+    addresses = read_portfolio(args.portfolio) if args.portfolio else []
+    transport = FileBatchTransport(args.fake_dir) if args.fake_dir else OpenAIBatchTransport()
+
+    def print_status(state):
+        counts = pd.Series([b.get("status", "new") for b in state["batches"]]).value_counts().to_dict()
+        print(f"{datetime.now():%H:%M:%S} batches: {counts}", flush=True)
+
+    summary = run(addresses, args.run_dir, transport, poll_seconds=args.poll_seconds, timeout=args.timeout,
+                  concurrency=args.concurrency, on_status=print_status)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# ==============================================================
+# 🔎 Benchmark: Past Reports address search latency
+# Builds an AddressIndex over synthetic saved reports and times
+# fuzzy, prefix (autocomplete), ZIP and APN queries
+#
+#   python benchmarks/bench_address_search.py --count 1000000
+# ==============================================================
+
+import argparse, os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search import AddressIndex
+
+STREETS = ["Main", "Oak", "Pine", "Maple", "Cedar", "Elm", "Washington", "Lake", "Hill", "Sunset",
+           "Park", "Highland", "Jefferson", "Lincoln", "Madison", "Franklin", "Walnut", "Spruce"]
+SUFFIXES = ["St", "Ave", "Blvd", "Dr", "Ct", "Ln", "Rd", "Way"]
+CITIES = [("Denver", "CO", "802"), ("Austin", "TX", "787"), ("Springfield", "IL", "627"),
+          ("Seattle", "WA", "981"), ("Miami", "FL", "331")]
+
+TARGET = ("4529 Winona Ct, Denver, CO 80212", "02194-13-012")
+QUERIES = [
+    ("exact", "4529 Winona Ct, Denver, CO 80212"),
+    ("spelled out", "4529 winona court denver colorado"),
+    ("typo", "4529 winnona ct"),
+    ("autocomplete", "4529 win"),
+    ("no house number", "winona ct denver co 80212"),
+    ("zip", "80212"),
+    ("apn", "02194-13-012"),
+]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=200000, help="synthetic saved reports")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per query")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    streets = STREETS + [f"Name{i}" for i in range(3000)]
+    index = AddressIndex()
+    started = time.perf_counter()
+    for i in range(args.count):
+        city, state, zip3 = rng.choice(CITIES)
+        index.add(f"{rng.randint(1, 9999)} {rng.choice(streets)} {rng.choice(SUFFIXES)}, {city}, {state} "
+                  f"{zip3}{rng.randint(10, 99)}", apn=f"APN-{i:07d}")
+    index.add(*TARGET)
+    print(f"Indexed {len(index):,} reports in {time.perf_counter() - started:.1f}s\n")
+
+    print(f"{'query':<18}{'median ms':>10}{'top hit':>40}")
+    for label, query in QUERIES:
+        times = []
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            hits = index.search(query, limit=10)
+            times.append((time.perf_counter() - t) * 1000)
+        top = f"{hits[0]['address'][:30]} ({hits[0]['score']:.2f})" if hits else "-"
+        print(f"{label:<18}{sorted(times)[len(times) // 2]:>10.2f}{top:>40}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# ==============================================================
+# 📏 Benchmark: section-prompt input tokens per property
+# Full ATTOM row in every chunk (before) vs relevance-selected,
+# compact ATTOM context (after)
+#
+#   python benchmarks/bench_attom_context.py
+# ==============================================================
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import pipeline
+from attom_context import compact_attom_context
+from attom_spec import ATTOM_PATHS
+
+try:
+    import tiktoken
+    _enc = tiktoken.get_encoding("o200k_base")
+    count_tokens = lambda text: len(_enc.encode(text))
+    TOKENIZER = "tiktoken o200k_base"
+except Exception:
+    count_tokens = lambda text: max(1, len(text) // 4)
+    TOKENIZER = "~4 chars/token estimate (pip install tiktoken for exact counts)"
+
+ADDRESS = "4529 Winona Ct, Denver, CO 80212"
+COUNTY_SITE = "https://www.denvergov.org"
+
+def sample_value(key):
+    k = key.lower()
+    if any(w in k for w in ("amt", "amount", "value", "size", "price")):
+        return 412500
+    if any(w in k for w in ("date", "modified")):
+        return "2024-03-15"
+    if any(w in k for w in ("year",)):
+        return 2023
+    if k in ("latitude", "longitude"):
+        return 39.778453
+    return f"Sample {key}"
+
+def sample_attom_property():
+    """ATTOM basicprofile payload with every attom_spec path populated."""
+    prop = {}
+    for path in ATTOM_PATHS.values():
+        keys = path.split(".")
+        node = prop
+        for k in keys[:-1]:
+            node = node.setdefault(k, {})
+        node[keys[-1]] = sample_value(keys[-1])
+    return prop
+
+def prompt_tokens(chunks, attom_text):
+    return sum(
+        count_tokens(pipeline.build_section_prompt(ADDRESS, chunk, COUNTY_SITE, attom_text(chunk)))
+        for chunk in chunks
+    )
+
+def main():
+    df_attom = pipeline.flatten_attom([sample_attom_property()])
+    df_fields = pipeline.load_field_template()
+    mapped = pipeline.map_attom_to_fields(df_attom)["Field"]
+    remaining = df_fields[~df_fields["Field"].isin(mapped)]
+
+    full_row = lambda chunk: str(df_attom.to_dict(orient="records")[0])
+    compact = lambda chunk: compact_attom_context(df_attom, [f for f, _ in chunk], pipeline.FIELD_GROUPS)
+
+    print(f"Tokenizer: {TOKENIZER}")
+    print(f"ATTOM columns: {len(df_attom.columns)}, GPT fields after ATTOM mapping: {len(remaining)}\n")
+    print("Input tokens per property (all section prompts):")
+    print(f"{'chunking':<20}{'chunks':>7}{'before':>10}{'after':>10}{'saved':>8}{'ATTOM ctx before':>19}{'after':>9}")
+    for label, size in (("fixed 10 fields", 10), ("adaptive (plan)", None)):
+        chunks = pipeline.chunk_fields(remaining, size)
+        before = prompt_tokens(chunks, full_row)
+        after = prompt_tokens(chunks, compact)
+        ctx_before = sum(count_tokens(full_row(c)) for c in chunks)
+        ctx_after = sum(count_tokens(compact(c)) for c in chunks)
+        print(f"{label:<20}{len(chunks):>7}{before:>10,}{after:>10,}{1 - after / before:>8.0%}"
+              f"{ctx_before:>19,}{ctx_after:>9,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# ==============================================================
+# 🗺️ Benchmark: flattening ATTOM payloads
+# One safe_get walk per column per property (before) vs the
+# attom_spec prefix-trie extractor into columnar arrays (after)
+#
+#   python benchmarks/bench_attom_flatten.py --properties 5000
+# ==============================================================
+
+import argparse, os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from attom_spec import ATTOM_PATHS, attom_extractor
+
+def safe_get(d, keys):
+    for k in keys:
+        if isinstance(d, dict) and k in d:
+            d = d[k]
+        else:
+            return None
+    return d
+
+def safe_get_flatten(p_list):
+    """The pre-attom_spec flatten_attom: every column re-walks its path from the root."""
+    keyed = [(column, path.split(".")) for column, path in ATTOM_PATHS.items()]
+    rows = []
+    for p in p_list:
+        rows.append({column: safe_get(p, keys) for column, keys in keyed})
+    return pd.DataFrame(rows)
+
+def synthetic_property(rng, i):
+    """Realistic sparsity: whole blocks (mortgage, owner2-4, ...) are often absent."""
+    prop = {}
+    for path in ATTOM_PATHS.values():
+        keys = path.split(".")
+        if rng.random() < 0.25 or (keys[0] == "assessment" and keys[1] == "mortgage" and i % 3):
+            continue
+        node = prop
+        for k in keys[:-1]:
+            node = node.setdefault(k, {})
+        node[keys[-1]] = rng.choice([f"value {i}", i, i * 1.5])
+    return prop
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--properties", type=int, default=5000, help="ATTOM payloads to flatten")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per implementation (best is reported)")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    payloads = [synthetic_property(rng, i) for i in range(args.properties)]
+    print(f"{args.properties:,} payloads x {len(ATTOM_PATHS)} paths\n")
+
+    before, t_before = timed(lambda: safe_get_flatten(payloads), args.repeat)
+    columns, t_columns = timed(lambda: attom_extractor.columns(payloads), args.repeat)
+    after, t_after = timed(lambda: attom_extractor.frame(payloads), args.repeat)
+    pd.testing.assert_frame_equal(before, after)
+
+    print(f"{'flatten':<34}{'total ms':>10}{'us/property':>13}")
+    for label, seconds in [("safe_get per column -> DataFrame", t_before),
+                           ("trie extractor -> columns", t_columns),
+                           ("trie extractor -> DataFrame", t_after)]:
+        print(f"{label:<34}{seconds * 1000:>10.1f}{seconds * 1e6 / args.properties:>13.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# ==============================================================
+# 📝 Benchmark: report writes per second
+# One replace_one round-trip per property (before) vs BulkWriter
+# unordered bulk_write batches (after)
+#
+#   python benchmarks/bench_bulk_writer.py                       # mongomock + simulated RTT
+#   python benchmarks/bench_bulk_writer.py --mongo-uri mongodb://localhost:27017
+# ==============================================================
+
+import argparse, os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import ReplaceOne
+
+from store import ensure_indexes, report_upsert
+from writer import BulkWriter
+
+FIELDS = [f"Field {i}" for i in range(286)]
+
+class LatencyCollection:
+    """mongomock collection that sleeps ``rtt`` seconds per call, like a network round-trip."""
+
+    def __init__(self, collection, rtt):
+        self._collection = collection
+        self.rtt = rtt
+
+    def with_options(self, **kwargs):
+        return self
+
+    def replace_one(self, *args, **kwargs):
+        time.sleep(self.rtt)
+        return self._collection.replace_one(*args, **kwargs)
+
+    def bulk_write(self, requests, **kwargs):
+        # mongomock's bulk API lags pymongo 4's write models; apply them one by one, one RTT total.
+        time.sleep(self.rtt)
+        for op in requests:
+            if isinstance(op, ReplaceOne):
+                self._collection.replace_one(op._filter, op._doc, upsert=op._upsert)
+            else:
+                self._collection.update_one(op._filter, op._doc, upsert=op._upsert)
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+def report_records(i):
+    return [{"Field": f, "Value": f"value {i}-{j}" if j % 3 else "NotFound", "Source": "bench"}
+            for j, f in enumerate(FIELDS)]
+
+def open_collection(args, name):
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        coll = MongoClient(args.mongo_uri)["revalix_bench"][name]
+        coll.drop()
+        ensure_indexes(coll)
+        return coll
+    import mongomock
+    coll = mongomock.MongoClient()["revalix_bench"][name]
+    ensure_indexes(coll)
+    return LatencyCollection(coll, args.rtt_ms / 1000)
+
+def bench_inline(coll, n):
+    """(seconds the enrichment loop is blocked, total seconds, round-trips)."""
+    blocked = 0.0
+    started = time.perf_counter()
+    for i in range(n):
+        _, op = report_upsert(f"{i} Main St, Springfield, IL 62704", report_records(i))
+        t = time.perf_counter()
+        coll.replace_one(op._filter, op._doc, upsert=True)
+        blocked += time.perf_counter() - t
+    return blocked, time.perf_counter() - started, n
+
+def bench_bulk(coll, n, batch):
+    writer = BulkWriter(coll, max_batch=batch, max_delay=0.05)
+    futures = []
+    blocked = 0.0
+    started = time.perf_counter()
+    for i in range(n):
+        key, op = report_upsert(f"{i} Main St, Springfield, IL 62704", report_records(i))
+        t = time.perf_counter()
+        futures.append(writer.submit(op, key))
+        blocked += time.perf_counter() - t
+    writer.close()
+    assert all(f.result() for f in futures)
+    return blocked, time.perf_counter() - started, writer.stats()["batches"]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo-uri", help="benchmark a real mongod instead of mongomock")
+    parser.add_argument("--count", type=int, default=500, help="reports to write")
+    parser.add_argument("--batch", type=int, default=100, help="BulkWriter max_batch")
+    parser.add_argument("--rtt-ms", type=float, default=2.0, help="simulated round-trip time for mongomock")
+    args = parser.parse_args()
+
+    target = args.mongo_uri or f"mongomock + {args.rtt_ms:g} ms simulated round-trip"
+    print(f"Target: {target}; {args.count} reports x {len(FIELDS)} fields\n")
+    rows = [
+        ("replace_one per report", bench_inline(open_collection(args, "inline"), args.count)),
+        (f"BulkWriter (batch {args.batch})", bench_bulk(open_collection(args, "bulk"), args.count, args.batch)),
+    ]
+    print(f"{'writer':<26}{'round-trips':>12}{'loop blocked s':>16}{'total s':>9}{'reports/s':>11}")
+    for label, (blocked, total, trips) in rows:
+        print(f"{label:<26}{trips:>12,}{blocked:>16.3f}{total:>9.2f}{args.count / total:>11,.0f}")
+    if not args.mongo_uri:
+        print("\nmongomock applies each op in Python (~10 ms for a 286-field report), which dominates"
+              "\n'total s'; round-trips and loop-blocked time are what carry over to a real mongod.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# ==============================================================
+# 🚀 Benchmark: cold start and per-rerun overhead of app.py
+# Cold start: importing the core with the clients built eagerly (as
+# import used to) vs lazily. Per rerun: the old module-level Lottie
+# fetches vs LottieAssets, against a local server with a fixed
+# latency, and whole app.py reruns under streamlit.testing
+#
+#   python benchmarks/bench_startup.py --latency-ms 300
+# ==============================================================
+
+import argparse, json, os, statistics, subprocess, sys, tempfile, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("MONGO_URI", "mongodb://127.0.0.1:27017/?serverSelectionTimeoutMS=500")
+
+import requests
+
+# Roughly the size of the two lottiefiles animations.
+ANIMATION = {"v": "5.7.4", "fr": 30, "ip": 0, "op": 90, "w": 400, "h": 400,
+             "layers": [{"ind": i, "ty": 4, "ks": {"o": {"a": 0, "k": 100}}, "shapes": [{"ty": "el"}] * 20}
+                        for i in range(120)]}
+
+IMPORTS = {
+    "import pipeline": "import pipeline",
+    "app.py imports": "import streamlit, streamlit_lottie, batch, connections, jobs, pipeline, search, store, ui_assets",
+}
+# What importing pipeline used to do on top: build both clients.
+EAGER = "; pipeline.client.get(); pipeline.collection.get()"
+
+def serve(latency):
+    body = json.dumps(ANIMATION).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    return {"loading": f"{base}/loading.json", "success": f"{base}/success.json"}
+
+def cold_start(code, repeat):
+    """Median wall time of a fresh interpreter running ``code``."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True)
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+def old_lottie(urls):
+    """The removed module-level code: two blocking fetches, no timeout, on every script run."""
+    return [requests.get(url).json() for url in urls.values()]
+
+def per_rerun(fn, reruns):
+    times = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return times
+
+def app_reruns(script, reruns):
+    """Seconds per AppTest run of ``script`` (the first run includes the imports)."""
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(script, default_timeout=120)
+    times = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - started)
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return times
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=300, help="simulated lottiefiles response time")
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5, help="interpreters per cold-start measurement")
+    args = parser.parse_args()
+
+    print(f"{'cold start':<24}{'eager s':>10}{'lazy s':>10}")
+    for label, code in IMPORTS.items():
+        print(f"{label:<24}{cold_start(code + EAGER, args.repeat):>10.3f}{cold_start(code, args.repeat):>10.3f}")
+
+    urls = serve(args.latency_ms / 1000)
+    import ui_assets
+    with tempfile.TemporaryDirectory() as cache_dir:
+        assets = []
+
+        def new_rerun():
+            # get_lottie_assets() is st.cache_resource: built on the first run only.
+            if not assets:
+                assets.append(ui_assets.LottieAssets(urls, bundle_dir=cache_dir, cache_dir=cache_dir).start())
+            return [assets[0].get(name) for name in urls]
+
+        before = per_rerun(lambda: old_lottie(urls), args.reruns)
+        after = per_rerun(new_rerun, args.reruns)
+    print(f"\nLottie per rerun, {args.latency_ms:g} ms server latency")
+    print(f"{'':<24}{'first s':>10}{'next s':>10}")
+    print(f"{'module-level fetch':<24}{before[0]:>10.3f}{statistics.median(before[1:] or before):>10.3f}")
+    print(f"{'LottieAssets':<24}{after[0]:>10.4f}{statistics.median(after[1:] or after):>10.4f}")
+
+    # Whole-script reruns; "before" is app.py preceded by the old module-level fetches.
+    try:
+        import streamlit.testing.v1  # noqa: F401
+    except ImportError:
+        print("\n(streamlit not installed: skipping app.py reruns)")
+        return
+    ui_assets.LOTTIE_URLS.update(urls)
+    os.environ["LOTTIE_CACHE_DIR"] = tempfile.mkdtemp()
+    with tempfile.TemporaryDirectory() as tmp:
+        before_script = os.path.join(tmp, "app_before.py")
+        with open(before_script, "w", encoding="utf-8") as f:
+            f.write("import runpy, sys, requests\n"
+                    f"sys.path.insert(0, {ROOT!r})\n"
+                    f"[requests.get(u).json() for u in {list(urls.values())!r}]\n"
+                    f"runpy.run_path({os.path.join(ROOT, 'app.py')!r}, run_name='__main__')\n")
+        before = app_reruns(before_script, args.reruns)
+        after = app_reruns(os.path.join(ROOT, "app.py"), args.reruns)
+    # The first run pays the imports, and only the first script measured pays them cold; compare reruns.
+    print(f"\n{'app.py rerun':<24}{'median s':>10}")
+    print(f"{'before':<24}{statistics.median(before[1:] or before):>10.3f}")
+    print(f"{'after':<24}{statistics.median(after[1:] or after):>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# ==============================================================
+# 📡 Benchmark: time to first field from a GPT section
+# Whole completion then parse_output (before) vs stream=True with
+# the incremental TableRowParser (after), against a local fake
+# chat-completions server that emits tokens at a fixed rate
+#
+#   python benchmarks/bench_streaming.py --fields 40 --tokens-per-second 60
+# ==============================================================
+
+import argparse, asyncio, json, os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import aiohttp
+from aiohttp import web
+
+from pipeline import TableRowParser, parse_output
+from scheduler import OpenAIScheduler
+
+def answer_table(fields):
+    lines = ["| Field | Value | Source |", "|---|---|---|"]
+    lines += [f"| Attribute {i} | Value {i} | County records |" for i in range(fields)]
+    return "\n".join(lines) + "\n"
+
+def tokens(text):
+    """~4-character pieces, like the deltas a chat completion streams."""
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+def make_app(content, first_token_delay, token_delay):
+    async def completions(request):
+        payload = await request.json()
+        await asyncio.sleep(first_token_delay)
+        if not payload.get("stream"):
+            await asyncio.sleep(token_delay * len(tokens(content)))
+            return web.json_response({"choices": [{"message": {"content": content}}],
+                                      "usage": {"total_tokens": len(tokens(content))}})
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        for piece in tokens(content):
+            chunk = {"choices": [{"delta": {"content": piece}}]}
+            await resp.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await asyncio.sleep(token_delay)
+        await resp.write(b'data: {"choices": [], "usage": {"total_tokens": 1}}\n\ndata: [DONE]\n\n')
+        return resp
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", completions)
+    return app
+
+async def run(args):
+    content = answer_table(args.fields)
+    runner = web.AppRunner(make_app(content, args.first_token_ms / 1000, 1 / args.tokens_per_second))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v1/chat/completions"
+    payload = {"model": "bench", "messages": [{"role": "user", "content": "fields"}]}
+    scheduler = OpenAIScheduler(rpm=100000, tpm=10 ** 9)
+
+    async with aiohttp.ClientSession() as session:
+        started = time.perf_counter()
+        rows = parse_output(await scheduler.chat(session, payload, {}, url=url))
+        blocking = (time.perf_counter() - started, time.perf_counter() - started, len(rows))
+
+        parser = TableRowParser()
+        first = []
+
+        def on_delta(text):
+            # parse_output also yields the |---| separator; time the first real field.
+            if any(row["Field"].startswith("Attribute") for row in parser.feed(text)) and not first:
+                first.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        streamed_content = await scheduler.chat_stream(session, payload, {}, on_delta, url=url)
+        parser.close()
+        streaming = (first[0], time.perf_counter() - started, len(parser.rows))
+
+    await runner.cleanup()
+    assert streamed_content == content and parser.rows == parse_output(content)
+    return blocking, streaming
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fields", type=int, default=40, help="table rows in the answer")
+    parser.add_argument("--first-token-ms", type=float, default=600, help="simulated time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=60, help="simulated output speed")
+    args = parser.parse_args()
+
+    blocking, streaming = asyncio.run(run(args))
+    print(f"{args.fields} fields, first token after {args.first_token_ms:g} ms, "
+          f"{args.tokens_per_second:g} tokens/s\n")
+    print(f"{'mode':<26}{'first row s':>12}{'all rows s':>12}{'rows':>6}")
+    for label, (first, total, rows) in [("chat + parse_output", blocking),
+                                        ("chat_stream + row parser", streaming)]:
+        print(f"{label:<26}{first:>12.2f}{total:>12.2f}{rows:>6}")
+
+if __name__ == "__main__":
+    main()
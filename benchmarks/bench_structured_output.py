@@ -0,0 +1,95 @@
+# ==============================================================
+# 🧾 Benchmark: section answers as pipe tables vs strict JSON
+# Rows lost by parse_output on awkward values, output tokens and
+# parse time for the same answers in both formats
+#
+#   python benchmarks/bench_structured_output.py
+# ==============================================================
+
+import json, os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import pipeline
+from structured import JsonFieldParser, parse_structured
+
+try:
+    import tiktoken
+    _enc = tiktoken.get_encoding("o200k_base")
+    count_tokens = lambda text: len(_enc.encode(text))
+    TOKENIZER = "tiktoken o200k_base"
+except Exception:
+    count_tokens = lambda text: max(1, len(text) // 4)
+    TOKENIZER = "~4 chars/token estimate (pip install tiktoken for exact counts)"
+
+SOURCES = ["County Assessor", "Zillow", "Redfin", "County Records", "Realtor.com"]
+# Values a pipe table can't carry on one 3-cell line.
+AWKWARD = ["Lot 4 | Block 2 | Unit C", "Owner: SMITH, JOHN A\nJOINT TENANTS", "Single Family | Residential"]
+
+def answers(chunk, rng):
+    """[(field, value or None, source)] with ~35% NotFound and ~5% awkward values."""
+    out = []
+    for field, _ in chunk:
+        roll = rng.random()
+        if roll < 0.35:
+            out.append((field, None, "N/A"))
+        elif roll < 0.40:
+            out.append((field, rng.choice(AWKWARD), rng.choice(SOURCES)))
+        else:
+            out.append((field, f"{rng.randint(1, 999999)}", rng.choice(SOURCES)))
+    return out
+
+def as_table(rows, padded=False):
+    cells = [("Field", "Value", "Source")] + [(f, v if v is not None else "NotFound", s) for f, v, s in rows]
+    widths = [max(len(c[i]) for c in cells) if padded else 0 for i in range(3)]
+    lines = ["| " + " | ".join(c[i].ljust(widths[i]) for i in range(3)) + " |" for c in cells]
+    lines.insert(1, "|" + "|".join("-" * (w + 2) if padded else "---" for w in widths) + "|")
+    return "Here is the data I found:\n" + "\n".join(lines) + "\n"
+
+def as_json(rows):
+    return json.dumps({f: {"value": v, "source": s} for f, v, s in rows}, separators=(",", ":"))
+
+def timed(fn, items):
+    started = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - started) * 1e6 / len(items)
+
+def main():
+    rng = random.Random(1)
+    df_fields = pipeline.load_field_template()
+    chunks = pipeline.chunk_fields(df_fields, None)
+    sections = [(chunk, answers(chunk, rng)) for chunk in chunks * 20]
+    total_rows = sum(len(rows) for _, rows in sections)
+
+    tables = [as_table(rows) for _, rows in sections]
+    padded = [as_table(rows, padded=True) for _, rows in sections]
+    jsons = [as_json(rows) for _, rows in sections]
+
+    def kept(parsed, rows):
+        wanted = {f: ("NotFound" if v is None else v) for f, v, _ in rows}
+        return sum(1 for r in parsed if wanted.get(r["Field"]) == r["Value"])
+
+    lost_table = total_rows - sum(kept(pipeline.parse_output(t), rows) for t, (_, rows) in zip(tables, sections))
+    lost_json = total_rows - sum(kept(parse_structured(j, [f for f, _ in chunk]), rows)
+                                 for j, (chunk, rows) in zip(jsons, sections))
+
+    def stream(item):
+        parser = JsonFieldParser()
+        for i in range(0, len(item), 16):
+            parser.feed(item[i:i + 16])
+
+    print(f"Tokenizer: {TOKENIZER}")
+    print(f"{len(sections)} section answers, {total_rows:,} field rows\n")
+    print(f"{'format':<24}{'output tokens':>14}{'rows lost':>11}{'parse us/section':>18}")
+    print(f"{'pipe table':<24}{sum(map(count_tokens, tables)):>14,}{lost_table:>11,}"
+          f"{timed(pipeline.parse_output, tables):>18.1f}")
+    print(f"{'pipe table, padded':<24}{sum(map(count_tokens, padded)):>14,}{'':>11}"
+          f"{timed(pipeline.parse_output, padded):>18.1f}")
+    print(f"{'strict JSON':<24}{sum(map(count_tokens, jsons)):>14,}{lost_json:>11,}"
+          f"{timed(lambda j: parse_structured(j), jsons):>18.1f}")
+    print(f"{'strict JSON, streamed':<24}{'':>14}{'':>11}{timed(stream, jsons):>18.1f}")
+
+if __name__ == "__main__":
+    main()
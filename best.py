@@ -16,6 +16,12 @@ import re
 from io import BytesIO
 from urllib.parse import quote_plus
 from dotenv import load_dotenv
+from attom_client import AttomClient
+from attom_spec import AttomExtractor
+from counties import CountyDirectory
+from merge_engine import merge_frames
+from store import find_report, records_from_document, save_report
+from structured import is_structured, parse_structured, response_format
 
 # --------------------------------------------------------------
 # ENVIRONMENT HANDLING
@@ -34,6 +40,7 @@ client = OpenAI(api_key=OPENAI_API_KEY)
 mongo_client = MongoClient(MONGO_URI)
 db = mongo_client["revalix_property_intelligence"]
 collection = db["property_results"]
+county_directory = CountyDirectory(overlay_path=os.getenv("COUNTY_DIRECTORY_PATH", os.path.join(".cache", "counties.sqlite")))
 
 # --------------------------------------------------------------
 # STREAMLIT CONFIG + GLASS UI
@@ -126,64 +133,46 @@ df_sections = get_field_sections(df_fields)
 # --------------------------------------------------------------
 # ATTOM FETCH & FLATTEN
 # --------------------------------------------------------------
-def safe_get(d, keys):
-    for k in keys:
-        if isinstance(d, dict) and k in d:
-            d = d[k]
-        else:
-            return None
-    return d
-
-def fetch_attom_data(address):
+async def fetch_attom_data(address):
     try:
-        parts = address.split(",")
-        address1 = parts[0].strip()
-        address2 = ",".join(parts[1:]).strip() if len(parts) > 1 else ""
-        url = (
-            "https://api.gateway.attomdata.com/propertyapi/v1.0.0/property/basicprofile"
-            f"?address1={quote_plus(address1)}&address2={quote_plus(address2)}"
-        )
-        headers = {"apikey": ATTOM_API_KEY, "accept": "application/json"}
-        res = requests.get(url, headers=headers, timeout=30)
-        res.raise_for_status()
-        data = res.json()
-        return data.get("property", [])
+        async with AttomClient(ATTOM_API_KEY) as attom:
+            return await attom.basic_profile(address)
     except Exception as e:
         print("ATTOM fetch error:", e)
         return []
 
+BEST_ATTOM_PATHS = {
+    "Property ID": "identifier.apn",
+    "Property Type": "summary.propType",
+    "Property Subtype": "summary.propSubType",
+    "Address Line 1": "address.line1",
+    "City": "address.locality",
+    "County": "area.countrySecSubd",
+    "State": "address.countrySubd",
+    "Postal Code": "address.postal1",
+    "Latitude": "location.latitude",
+    "Longitude": "location.longitude",
+    "Land Area": "lot.lotSize1",
+    "Year Built": "summary.yearBuilt",
+    "Building Condition": "building.construction.condition",
+    "Stories": "building.summary.levels",
+    "Bedrooms": "building.rooms.beds",
+    "Bathrooms": "building.rooms.bathsTotal",
+    "Owner Name": "assessment.owner.owner1.fullName",
+    "Appraised Value": "assessment.assessed.assdTtlValue",
+    "Market Value": "assessment.market.mktTtlValue",
+    "Purchase Price": "sale.saleAmountData.saleAmt",
+    "Purchase Date": "sale.saleAmountData.saleRecDate",
+    "Property Tax": "assessment.tax.taxAmt",
+    "Tax Year": "assessment.tax.taxYear",
+    "Cooling Type": "utilities.coolingType",
+    "Heating Type": "utilities.heatingType",
+    "Energy Type": "utilities.energyType",
+}
+best_attom_extractor = AttomExtractor(BEST_ATTOM_PATHS)
+
 def flatten_attom_properties(properties):
-    rows = []
-    for p in properties:
-        r = {}
-        r["Property ID"] = safe_get(p, ["identifier", "apn"])
-        r["Property Type"] = safe_get(p, ["summary", "propType"])
-        r["Property Subtype"] = safe_get(p, ["summary", "propSubType"])
-        r["Address Line 1"] = safe_get(p, ["address", "line1"])
-        r["City"] = safe_get(p, ["address", "locality"])
-        r["County"] = safe_get(p, ["area", "countrySecSubd"])
-        r["State"] = safe_get(p, ["address", "countrySubd"])
-        r["Postal Code"] = safe_get(p, ["address", "postal1"])
-        r["Latitude"] = safe_get(p, ["location", "latitude"])
-        r["Longitude"] = safe_get(p, ["location", "longitude"])
-        r["Land Area"] = safe_get(p, ["lot", "lotSize1"])
-        r["Year Built"] = safe_get(p, ["summary", "yearBuilt"])
-        r["Building Condition"] = safe_get(p, ["building", "construction", "condition"])
-        r["Stories"] = safe_get(p, ["building", "summary", "levels"])
-        r["Bedrooms"] = safe_get(p, ["building", "rooms", "beds"])
-        r["Bathrooms"] = safe_get(p, ["building", "rooms", "bathsTotal"])
-        r["Owner Name"] = safe_get(p, ["assessment", "owner", "owner1", "fullName"])
-        r["Appraised Value"] = safe_get(p, ["assessment", "assessed", "assdTtlValue"])
-        r["Market Value"] = safe_get(p, ["assessment", "market", "mktTtlValue"])
-        r["Purchase Price"] = safe_get(p, ["sale", "saleAmountData", "saleAmt"])
-        r["Purchase Date"] = safe_get(p, ["sale", "saleAmountData", "saleRecDate"])
-        r["Property Tax"] = safe_get(p, ["assessment", "tax", "taxAmt"])
-        r["Tax Year"] = safe_get(p, ["assessment", "tax", "taxYear"])
-        r["Cooling Type"] = safe_get(p, ["utilities", "coolingType"])
-        r["Heating Type"] = safe_get(p, ["utilities", "heatingType"])
-        r["Energy Type"] = safe_get(p, ["utilities", "energyType"])
-        rows.append(r)
-    return pd.DataFrame(rows)
+    return best_attom_extractor.frame(properties)
 
 # --------------------------------------------------------------
 # UTILITIES
@@ -200,6 +189,12 @@ def detect_county_and_state(address):
         pass
     return "", ""
 
+def parse_answer(raw_output, fields=None):
+    """Rows from a structured (JSON schema) answer, or from a pipe table for older answers."""
+    if is_structured(raw_output):
+        return parse_structured(raw_output, fields)
+    return parse_table(raw_output)
+
 def parse_table(raw_output):
     records = []
     for line in raw_output.split("\n"):
@@ -231,9 +226,8 @@ ATTOM verified data (use this to cross-check or fill missing values):
 Use trusted real estate sources: Zillow, Redfin, County Assessor, ATTOM, Realtor.
 {county_info}
 
-Return strictly:
-| Field | Value | Source |
-If not available, mark as NotFound.
+Answer with the JSON object the schema describes: for each field, "value"
+(null if not available) and "source".
 """
 
 # --------------------------------------------------------------
@@ -246,6 +240,7 @@ async def call_api_async(session, address, field_list, section_name, county, cou
         "model": "gpt-4.1-mini",
         "messages": [{"role": "user", "content": prompt}],
         "temperature": 0.0,
+        "response_format": response_format([f for f, _ in field_list]),
     }
     try:
         async with session.post("https://api.openai.com/v1/chat/completions", json=payload, headers=headers, timeout=60) as resp:
@@ -259,23 +254,12 @@ async def call_api_async(session, address, field_list, section_name, county, cou
 # MERGE + SAVE
 # --------------------------------------------------------------
 def merge_and_save(df_ai, df_fields, property_address, df_attom):
-    if df_ai.empty:
-        df_ai = pd.DataFrame(columns=["Field", "Value", "Source"])
+    df_attom_melt = None
     if not df_attom.empty:
         df_attom_melt = df_attom.melt(var_name="Field", value_name="Value")
         df_attom_melt["Source"] = "ATTOM Verified"
-        df_ai = pd.concat([df_attom_melt, df_ai], ignore_index=True)
-    merged = (
-        df_ai.groupby("Field", as_index=False)
-        .agg({
-            "Value": lambda v: next((x for x in v if x and x != "NotFound"), "NotFound"),
-            "Source": lambda s: next((x for x in s if x and x != ""), "Verified Data"),
-        })
-    )
-    df_final = pd.merge(df_fields[["Field"]], merged, on="Field", how="left")
-    df_final["Value"].fillna("NotFound", inplace=True)
-    df_final["Source"].fillna("Verified Data", inplace=True)
-    collection.replace_one({"address": property_address}, {"address": property_address, "records": df_final.to_dict(orient="records")}, upsert=True)
+    df_final = merge_frames(df_fields[["Field"]], attom=df_attom_melt, gpt=df_ai)
+    save_report(collection, property_address, df_final.to_dict(orient="records"))
     return df_final
 
 # --------------------------------------------------------------
@@ -294,12 +278,13 @@ async def run_missing_retry(property_address, df_final, df_fields, county, count
         "model": "gpt-4.1-mini",
         "messages": [{"role": "user", "content": prompt}],
         "temperature": 0.0,
+        "response_format": response_format([f for f, _ in missing_defs]),
     }
     async with aiohttp.ClientSession() as session:
         async with session.post("https://api.openai.com/v1/chat/completions", json=payload, headers=headers) as resp:
             data = await resp.json()
             content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-            df_new = pd.DataFrame(parse_table(content))
+            df_new = pd.DataFrame(parse_answer(content, missing))
             for _, row in df_new.iterrows():
                 df_final.loc[df_final["Field"] == row["Field"], ["Value", "Source"]] = [row["Value"], row["Source"]]
     st.success("✨ Missing fields updated successfully.")
@@ -316,16 +301,22 @@ with tab1:
         if not property_address.strip():
             st.warning("⚠️ Please enter an address.")
         else:
+            async def fetch_context():
+                return await asyncio.gather(
+                    fetch_attom_data(property_address),
+                    asyncio.to_thread(detect_county_and_state, property_address),
+                )
+
             with st.spinner("Fetching verified ATTOM data..."):
-                attom_props = fetch_attom_data(property_address)
+                attom_props, (county, state) = asyncio.run(fetch_context())
                 df_attom = flatten_attom_properties(attom_props) if attom_props else pd.DataFrame()
                 if not df_attom.empty:
                     st.success(f"✅ ATTOM data found with {len(df_attom.columns)} fields.")
                 else:
                     st.warning("⚠️ No ATTOM data found, GPT-only mode.")
 
-            county, state = detect_county_and_state(property_address)
-            county_url = f"https://www.{county.lower().replace(' ', '')}{state.lower().replace(' ', '')}.gov" if county and state else ""
+            county_url = county_directory.website(county=county, state=state) or (
+                f"https://www.{county.lower().replace(' ', '')}{state.lower().replace(' ', '')}.gov" if county and state else "")
 
             async def process_sections():
                 async with aiohttp.ClientSession() as session:
@@ -339,7 +330,7 @@ with tab1:
             results = asyncio.run(process_sections())
             all_records = []
             for content in results:
-                all_records.extend(parse_table(content))
+                all_records.extend(parse_answer(content))
 
             df_ai = pd.DataFrame(all_records)
             df_final = merge_and_save(df_ai, df_fields, property_address, df_attom)
@@ -361,9 +352,9 @@ with tab2:
     st.markdown("### 📜 View Saved Reports")
     search_address = st.text_input("🏠 Search by Address:")
     if st.button("🔍 Retrieve Report", use_container_width=True):
-        doc = collection.find_one({"address": search_address})
+        doc = find_report(collection, search_address)
         if doc:
-            df_past = pd.DataFrame(doc["records"])[["Field", "Value"]]
+            df_past = pd.DataFrame(records_from_document(doc))[["Field", "Value"]]
             st.success(f"✅ Showing saved report for {search_address}")
             st.dataframe(df_past, use_container_width=True)
         else:
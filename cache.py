@@ -0,0 +1,241 @@
+# ==============================================================
+# 🗄️ ReValix Local Response Cache
+# SQLite-backed caches for GPT section answers and raw ATTOM payloads
+# ==============================================================
+
+import hashlib, json, os, sqlite3, threading, time
+
+# --------------------------------------------------------------
+# KEYS
+# --------------------------------------------------------------
+def normalize_key_text(text):
+    """Case/whitespace-insensitive form of an address used inside cache keys."""
+    return " ".join(str(text or "").lower().replace(",", " , ").split())
+
+def content_key(*parts):
+    """Stable SHA-256 over JSON-serialisable parts (address, field chunk, version...)."""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+# --------------------------------------------------------------
+# CACHE
+# --------------------------------------------------------------
+class ResponseCache:
+    """Persistent key → text cache.
+
+    Entries older than ``ttl_seconds`` are treated as misses and dropped.
+    When the stored payload exceeds ``max_bytes`` the least recently read
+    entries are evicted first. The payload total lives in the database
+    (kept by triggers), so every process sharing the file sees the same
+    size. Hit/miss counters are per process.
+    """
+
+    def __init__(self, path, ttl_seconds=30 * 86400, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at)")
+        # Payload total updated in the same transaction as each write, so a write doesn't re-sum the table.
+        self._db.executescript(
+            "BEGIN IMMEDIATE;"
+            "CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);"
+            "INSERT OR IGNORE INTO totals (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM entries;"
+            "CREATE TRIGGER IF NOT EXISTS entries_bytes_insert AFTER INSERT ON entries"
+            " BEGIN UPDATE totals SET bytes = bytes + NEW.size WHERE id = 0; END;"
+            "CREATE TRIGGER IF NOT EXISTS entries_bytes_delete AFTER DELETE ON entries"
+            " BEGIN UPDATE totals SET bytes = bytes - OLD.size WHERE id = 0; END;"
+            "CREATE TRIGGER IF NOT EXISTS entries_bytes_update AFTER UPDATE OF size ON entries"
+            " BEGIN UPDATE totals SET bytes = bytes + NEW.size - OLD.size WHERE id = 0; END;"
+            "COMMIT;"
+        )
+
+    def get(self, key, max_age=None):
+        """Cached text or None; with ``max_age`` (seconds) older entries miss too, but stay stored."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            if max_age is not None and now - created_at > max_age:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            # One write transaction: other processes can't move the total between the write and the eviction.
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # An upsert, not INSERT OR REPLACE: REPLACE deletes without firing the delete trigger.
+                self._db.execute(
+                    "INSERT INTO entries (key, value, created_at, accessed_at, size) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT(key) DO UPDATE SET value = excluded.value, created_at = excluded.created_at,"
+                    " accessed_at = excluded.accessed_at, size = excluded.size",
+                    (key, value, now, now, size),
+                )
+                self._evict()
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _bytes(self):
+        return self._db.execute("SELECT bytes FROM totals WHERE id = 0").fetchone()[0]
+
+    def _evict(self):
+        total = self._bytes()
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+        }
+
+# --------------------------------------------------------------
+# ATTOM RESPONSE CACHE
+# --------------------------------------------------------------
+def parse_vintage_date(value):
+    """Epoch seconds for an ATTOM vintage date ("2024-03-15", "2024/03/15"), else None."""
+    if not value:
+        return None
+    text = str(value).strip()[:10]
+    for fmt in ("%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y"):
+        try:
+            return time.mktime(time.strptime(text, fmt))
+        except ValueError:
+            continue
+    return None
+
+def _text_or_none(value):
+    return None if value is None else str(value)
+
+
+class AttomCache:
+    """Persistent raw ATTOM ``property`` payloads keyed by normalized address, indexed by APN/FIPS.
+
+    A cached payload is served while its vintage (``pubDate``, else
+    ``lastModified``, else the fetch time) is younger than ``max_age_seconds``.
+    Past that it is refetched, but at most once per ``recheck_seconds`` so a
+    parcel whose ATTOM vintage is simply old does not bypass the cache.
+    """
+
+    def __init__(self, path, max_age_seconds=90 * 86400, recheck_seconds=7 * 86400):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self.recheck_seconds = recheck_seconds
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS attom ("
+            " address_key TEXT PRIMARY KEY, apn TEXT, fips TEXT, payload TEXT NOT NULL,"
+            " last_modified TEXT, pub_date TEXT, fetched_at REAL NOT NULL, checked_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_attom_apn ON attom(apn, fips)")
+
+    def _row(self, where, args):
+        return self._db.execute(
+            f"SELECT payload, last_modified, pub_date, fetched_at, checked_at FROM attom WHERE {where}", args
+        ).fetchone()
+
+    def is_fresh(self, last_modified, pub_date, fetched_at, checked_at, now=None):
+        now = now or time.time()
+        vintage = parse_vintage_date(pub_date) or parse_vintage_date(last_modified) or fetched_at
+        if now - vintage <= self.max_age_seconds:
+            return True
+        return now - checked_at <= self.recheck_seconds
+
+    def get(self, address=None, apn=None, fips=None):
+        """Return the cached property list if present and fresh, else None."""
+        with self._lock:
+            row = None
+            if address:
+                row = self._row("address_key = ?", (normalize_key_text(address),))
+            if row is None and apn:
+                fips = _text_or_none(fips)
+                row = self._row("apn = ? AND (fips = ? OR ? IS NULL)", (str(apn), fips, fips))
+            if row is None:
+                self.misses += 1
+                return None
+            payload, last_modified, pub_date, fetched_at, checked_at = row
+            if not self.is_fresh(last_modified, pub_date, fetched_at, checked_at):
+                self.misses += 1
+                self.refreshes += 1
+                return None
+            self.hits += 1
+            return json.loads(payload)
+
+    def set(self, address, properties):
+        if not properties:
+            return
+        first = properties[0]
+        identifier = first.get("identifier") or {}
+        vintage = first.get("vintage") or {}
+        now = time.time()
+        payload = json.dumps(properties, ensure_ascii=False)
+        key = normalize_key_text(address)
+        with self._lock:
+            prev = self._db.execute(
+                "SELECT payload, fetched_at FROM attom WHERE address_key = ?", (key,)
+            ).fetchone()
+            # Same vintage as before: keep the original fetch time, only mark it re-checked.
+            fetched_at = prev[1] if prev and prev[0] == payload else now
+            self._db.execute(
+                "INSERT OR REPLACE INTO attom (address_key, apn, fips, payload, last_modified, pub_date, fetched_at, checked_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, _text_or_none(identifier.get("apn")), _text_or_none(identifier.get("fips")), payload,
+                 vintage.get("lastModified"), vintage.get("pubDate"), fetched_at, now),
+            )
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM attom").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "refreshes": self.refreshes, "entries": entries}
@@ -0,0 +1,185 @@
+# ==============================================================
+# 🧩 ReValix Adaptive Field Chunking
+# Pack GPT section requests by token budget, related-field groups
+# and the historical fill rate of each field
+# ==============================================================
+
+import threading, time
+
+from store import decode_field_key
+
+# --------------------------------------------------------------
+# FIELD GROUPS (first field of each block in load_field_template order)
+# --------------------------------------------------------------
+FIELD_GROUP_STARTS = {
+    "Property ID": "Identification",
+    "Address Line 1": "Location",
+    "Land Area(Acre)": "Land & Site",
+    "Building Name": "Building",
+    "Total Rooms": "Interior & Systems",
+    "Occupied By": "Occupancy",
+    "Unit No. / Unit Name": "Unit",
+    "Lease Status": "Unit Lease",
+    "Owner Name(s)": "Ownership & Title",
+    "Grantor": "Transfer",
+    "Purchase Price / Sale Price": "Valuation",
+    "Current Rent / Lease Rate": "Income",
+    "Mortgage Loan": "Financing",
+    "Current Tax Year": "Tax",
+    "Power Backup": "Amenities",
+    "Market Segment": "Market",
+    "RBA": "Market Supply",
+    "Market Employment by Industry": "Market Economy",
+    "Population in 1, 3 & 5 miles": "Demographics",
+    "AI Condition Index": "AI Scores",
+}
+
+# Descriptions hinting at a long narrative answer instead of a single value.
+LONG_ANSWER_HINTS = ("summary", "narrative", "history", "distribution", "clauses", "by industry", "details")
+
+# --------------------------------------------------------------
+# TOKEN ESTIMATES (~4 characters per token for English prompts)
+# --------------------------------------------------------------
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+def field_prompt_tokens(field, desc):
+    return estimate_tokens(f"{field}: {desc}\n")
+
+def field_response_tokens(field, desc):
+    long_answer = any(h in f"{field} {desc}".lower() for h in LONG_ANSWER_HINTS)
+    # "| Field | Value | Source |" row: field name + value + a short source citation
+    return estimate_tokens(field) + (60 if long_answer else 8) + 8
+
+def field_groups(template_fields):
+    """{field: group} for the full template, carrying the last group start forward."""
+    groups, current = {}, "Other"
+    for f in template_fields:
+        current = FIELD_GROUP_STARTS.get(f, current)
+        groups[f] = current
+    return groups
+
+def assign_groups(fields, groups=None):
+    """Group name for each of ``fields`` (a template subset) using the template-wide ``groups``."""
+    fallback = field_groups(fields)
+    groups = groups or {}
+    return [groups.get(f, fallback[f]) for f in fields]
+
+# --------------------------------------------------------------
+# FILL-RATE STATS (learned from saved reports)
+# --------------------------------------------------------------
+class FillRateStats:
+    """Per-field share of saved reports where the value was found, refreshed every ``ttl`` seconds."""
+
+    def __init__(self, loader, ttl=3600):
+        self.loader = loader
+        self.ttl = ttl
+        self.rates = {}
+        self.loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if time.time() - self.loaded_at > self.ttl:
+                try:
+                    self.rates = self.loader()
+                except Exception as e:
+                    print("Fill-rate load error:", e)
+                self.loaded_at = time.time()
+            return self.rates
+
+def fill_rates_from_collection(collection, sample_size=2000):
+    """{field: (attempts, found)} over the most recent ``sample_size`` saved reports (schema v2)."""
+    pipeline = [
+        {"$match": {"schema_version": {"$gte": 2}}},
+        {"$sort": {"updated_at": -1}},
+        {"$limit": sample_size},
+        {"$project": {"f": {"$objectToArray": "$fields"}}},
+        {"$unwind": "$f"},
+        {"$group": {
+            "_id": "$f.k",
+            "attempts": {"$sum": 1},
+            # value is None for NotFound; anything else sorts above null.
+            "found": {"$sum": {"$cond": [{"$gt": ["$f.v.value", None]}, 1, 0]}},
+        }},
+    ]
+    return {decode_field_key(d["_id"]): (d["attempts"], d["found"]) for d in collection.aggregate(pipeline)}
+
+# --------------------------------------------------------------
+# PLANNER
+# --------------------------------------------------------------
+def plan_chunks(fields, fill_rates=None, groups=None, max_prompt_tokens=450, max_response_tokens=900, max_fields=30,
+                min_samples=50, low_fill_rate=0.15, skip_fill_rate=0.0, long_shot_max_fields=60):
+    """Split ``[(field, description), ...]`` into GPT requests.
+
+    Returns ``(chunks, skipped)``: ``chunks`` is a list of field lists for
+    fetch_section, ``skipped`` the fields not worth asking for at all.
+
+    - Fields are packed in template order, keeping each related group
+      (``groups``, from field_groups) together unless it alone exceeds the
+      token budget.
+    - Fields seen at least ``min_samples`` times whose fill rate is at or below
+      ``skip_fill_rate`` are skipped (0.0 by default: only never-found fields).
+    - Fields below ``low_fill_rate`` are sent name-only in large "long-shot"
+      chunks, since their descriptions rarely change the answer.
+    """
+    fill_rates = fill_rates or {}
+    regular, long_shots, skipped = [], [], []
+    for (field, desc), group in zip(fields, assign_groups([f for f, _ in fields], groups)):
+        attempts, found = fill_rates.get(field, (0, 0))
+        rate = found / attempts if attempts else None
+        if rate is not None and attempts >= min_samples and rate <= skip_fill_rate:
+            skipped.append(field)
+        elif rate is not None and attempts >= min_samples and rate < low_fill_rate:
+            long_shots.append((field, ""))
+        else:
+            regular.append((group, field, desc))
+
+    chunks = []
+    current, prompt_tok, resp_tok = [], 0, 0
+
+    def fits(items):
+        p = sum(field_prompt_tokens(f, d) for _, f, d in items)
+        r = sum(field_response_tokens(f, d) for _, f, d in items)
+        return (len(current) + len(items) <= max_fields
+                and prompt_tok + p <= max_prompt_tokens
+                and resp_tok + r <= max_response_tokens)
+
+    def flush():
+        nonlocal current, prompt_tok, resp_tok
+        if current:
+            chunks.append([(f, d) for _, f, d in current])
+        current, prompt_tok, resp_tok = [], 0, 0
+
+    def add(items):
+        nonlocal prompt_tok, resp_tok
+        current.extend(items)
+        prompt_tok += sum(field_prompt_tokens(f, d) for _, f, d in items)
+        resp_tok += sum(field_response_tokens(f, d) for _, f, d in items)
+
+    groups = []
+    for item in regular:
+        if groups and groups[-1][0][0] == item[0]:
+            groups[-1].append(item)
+        else:
+            groups.append([item])
+
+    for group in groups:
+        if fits(group):
+            add(group)
+            continue
+        flush()
+        if fits(group):
+            add(group)
+            continue
+        # Group larger than one request: split it field by field.
+        for item in group:
+            if not fits([item]):
+                flush()
+            add([item])
+    flush()
+
+    for i in range(0, len(long_shots), long_shot_max_fields):
+        chunks.append(long_shots[i:i+long_shot_max_fields])
+
+    return chunks, skipped
@@ -0,0 +1,61 @@
+# ==============================================================
+# 🔌 ReValix Connection Manager
+# One background event loop + keep-alive HTTP pools per process
+# ==============================================================
+
+import asyncio, aiohttp, atexit, threading
+
+from pipeline import UpstreamLimits, ensure_collection_indexes, make_attom_client
+
+class ConnectionManager:
+    """Process-wide owner of the I/O event loop and pooled upstream sessions.
+
+    Streamlit re-executes the script on every interaction, so ``asyncio.run``
+    per click throws away every TLS connection. The manager instead runs one
+    loop on a daemon thread and keeps these alive for the life of the process:
+
+    - ``openai``: aiohttp session for chat completions (fetch_section)
+    - ``attom``: AttomClient with its own pooled session and rate limiter
+    - ``limits``: UpstreamLimits shared by every user of this process
+
+    Report jobs and batch runs both run on this loop with these. The Mongo
+    indexes are built on the loop's executor in the background (``indexes``
+    is that future), so creating the manager never waits on MongoDB.
+    """
+
+    def __init__(self, openai_connections=64):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="revalix-io", daemon=True)
+        self.thread.start()
+        self.openai, self.attom, self.limits = self.run(self._open(openai_connections))
+        self.indexes = self.submit(asyncio.to_thread(ensure_collection_indexes))
+        atexit.register(self.close)
+
+    async def _open(self, openai_connections):
+        openai = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=openai_connections, keepalive_timeout=120, ttl_dns_cache=300)
+        )
+        attom = make_attom_client()
+        await attom.session()
+        return openai, attom, UpstreamLimits(openai=openai_connections)
+
+    def submit(self, coro):
+        """Schedule ``coro`` on the I/O loop and return a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Run ``coro`` on the I/O loop and block the calling thread for its result."""
+        return self.submit(coro).result(timeout)
+
+    async def _close_sessions(self):
+        await self.openai.close()
+        await self.attom.close()
+
+    def close(self):
+        if not self.loop.is_running():
+            return
+        try:
+            self.run(self._close_sessions(), timeout=10)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=5)
@@ -0,0 +1,239 @@
+# ==============================================================
+# 🏛️ ReValix County Directory
+# Bundled FIPS → county table (data/county_directory.csv) and ZIP →
+# county table (data/zip_counties.csv) with an SQLite overlay that
+# memoizes websites learned from the GPT fallback
+# ==============================================================
+
+import csv, os, re, sqlite3, threading, time
+
+from address import STATES, STATE_CODES
+
+DEFAULT_DIRECTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "county_directory.csv")
+# Primary county per ZIP, from the MIT-licensed ``zipcodes`` package data joined to the FIPS table by name.
+DEFAULT_ZIP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "zip_counties.csv")
+
+# Trailing words ATTOM, Nominatim and the Census table disagree on.
+COUNTY_SUFFIX_RE = re.compile(r"\s+(COUNTY|PARISH|BOROUGH|CENSUS AREA|MUNICIPALITY|CITY AND BOROUGH|MUNICIPIO)$")
+URL_RE = re.compile(r"https?://[^\s\"'<>)\]]+", re.IGNORECASE)
+
+# --------------------------------------------------------------
+# KEYS
+# --------------------------------------------------------------
+def normalize_fips(value):
+    """5-digit county FIPS string, or None ("8031" → "08031")."""
+    digits = re.sub(r"\D", "", str(value or ""))
+    if not digits or len(digits) > 5:
+        return None
+    return digits.zfill(5)
+
+def normalize_state(value):
+    text = " ".join(str(value or "").upper().replace(".", "").split())
+    if text in STATE_CODES:
+        return text
+    return STATES.get(text)
+
+def county_name_keys(name):
+    """Exact upper-cased name first, then the name without "County"/"Parish"/...."""
+    text = " ".join(str(name or "").upper().replace(".", "").replace("SAINT ", "ST ").split())
+    if not text:
+        return []
+    bare = COUNTY_SUFFIX_RE.sub("", text)
+    return [text, bare] if bare != text else [text]
+
+def normalize_zip(value):
+    """5-digit ZIP string, or None ("80212-1234" → "80212")."""
+    m = re.match(r"\s*(\d{5})(?:-?\d{4})?\s*$", str(value or ""))
+    return m.group(1) if m else None
+
+def place_key(city):
+    return " ".join(str(city or "").upper().replace(".", "").replace("SAINT ", "ST ").split())
+
+def extract_url(text):
+    """First http(s) URL in a free-text answer, without trailing punctuation."""
+    m = URL_RE.search(str(text or ""))
+    return m.group(0).rstrip(".,;") if m else None
+
+# --------------------------------------------------------------
+# DIRECTORY
+# --------------------------------------------------------------
+class CountyDirectory:
+    """In-memory county index keyed by FIPS, by (county name, state) and by ZIP.
+
+    The bundled CSVs are read once, on first use. The county table lists
+    every county but has websites for only a few; the ZIP table gives each
+    ZIP's primary county, so the county (and its site) is known from the
+    address alone, before ATTOM answers. Websites learned later
+    (``remember``) are kept apart from the bundled table, keyed by (county
+    name, state), or by (city, state) for an address whose county can't be
+    told, and persisted to an optional SQLite overlay at ``overlay_path``,
+    so a county costs at most one GPT lookup per deployment and a learned
+    site never overrides a bundled one. ZIPs the bundled table lacks are
+    learned from ATTOM's FIPS (``learn_zip``). Without an overlay
+    everything stays in memory, which is what offline tests want.
+    """
+
+    def __init__(self, directory_path=DEFAULT_DIRECTORY_PATH, overlay_path=None, zip_path=DEFAULT_ZIP_PATH):
+        self.directory_path = directory_path
+        self.overlay_path = overlay_path
+        self.zip_path = zip_path
+        self.by_fips = {}
+        self.by_name = {}
+        self.by_zip = {}
+        self.learned_sites = {}
+        self.learned_places = {}
+        self.hits = 0
+        self.misses = 0
+        self.learned = 0
+        self._db = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _index(self, fips, state, county, website):
+        entry = {"fips": fips, "state": state, "county": county, "website": website or ""}
+        if fips:
+            self.by_fips[fips] = entry
+        for i, key in enumerate(county_name_keys(county)):
+            # Exact names always win; bare names ("RICHMOND") only where unambiguous.
+            if i == 0:
+                self.by_name[(key, state)] = entry
+            else:
+                self.by_name.setdefault((key, state), entry)
+        return entry
+
+    def _load(self):
+        if self._loaded:
+            return
+        with open(self.directory_path, newline="", encoding="utf-8") as fh:
+            for row in csv.DictReader(fh):
+                self._index(row["fips"], row["state"], row["county"], row.get("website"))
+        if self.zip_path and os.path.exists(self.zip_path):
+            with open(self.zip_path, newline="", encoding="utf-8") as fh:
+                self.by_zip = {row["zip"]: row["fips"] for row in csv.DictReader(fh)}
+        if self.overlay_path:
+            if os.path.dirname(self.overlay_path):
+                os.makedirs(os.path.dirname(self.overlay_path), exist_ok=True)
+            self._db = sqlite3.connect(self.overlay_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # "county_sites", not the older "counties"/"places" tables: those could hold sites learned per city.
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS county_sites ("
+                " state TEXT NOT NULL, county TEXT NOT NULL, website TEXT NOT NULL,"
+                " learned_at REAL NOT NULL, PRIMARY KEY (state, county))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS place_sites ("
+                " state TEXT NOT NULL, city TEXT NOT NULL, website TEXT NOT NULL,"
+                " learned_at REAL NOT NULL, PRIMARY KEY (state, city))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS zip_counties ("
+                " zip TEXT PRIMARY KEY, fips TEXT NOT NULL, learned_at REAL NOT NULL)"
+            )
+            for state, county, website in self._db.execute("SELECT state, county, website FROM county_sites"):
+                self.learned_sites[(county, state)] = website
+            for state, city, website in self._db.execute("SELECT state, city, website FROM place_sites"):
+                self.learned_places[(city, state)] = website
+            for zip_code, fips in self._db.execute("SELECT zip, fips FROM zip_counties"):
+                self.by_zip.setdefault(zip_code, fips)
+        self._loaded = True
+
+    def _find(self, fips, county, state, zip_code=None):
+        entry = self.by_fips.get(fips) if fips else None
+        if entry is None and state:
+            for key in county_name_keys(county):
+                entry = self.by_name.get((key, state))
+                if entry:
+                    break
+        if entry is None and zip_code:
+            entry = self.by_fips.get(self.by_zip.get(zip_code))
+            # A ZIP from the wrong state (a typo in the address) says nothing about the county.
+            if entry and state and entry["state"] != state:
+                entry = None
+        return entry
+
+    def lookup(self, fips=None, county=None, state=None, zip_code=None, city=None):
+        """Directory entry (dict with fips/state/county/website) or None.
+
+        FIPS first, then the county name, then the ZIP's county. A county
+        without a bundled website gets the one learned for it, if any; when
+        no county is found, the site learned for ``city`` stands in.
+        """
+        fips, state, zip_code = normalize_fips(fips), normalize_state(state), normalize_zip(zip_code)
+        with self._lock:
+            self._load()
+            entry = self._find(fips, county, state, zip_code)
+            names = county_name_keys(entry["county"] if entry else county)
+            state = entry["state"] if entry else state
+            if (entry and entry["website"]) or not state:
+                return entry
+            learned = self.learned_sites.get((names[0], state)) if names else None
+            if learned:
+                return {**(entry or {"fips": fips, "state": state, "county": county}), "website": learned}
+            if not names and place_key(city):
+                learned = self.learned_places.get((place_key(city), state))
+                if learned:
+                    return {"fips": None, "state": state, "county": None, "website": learned}
+            return entry
+
+    def website(self, fips=None, county=None, state=None, zip_code=None, city=None):
+        entry = self.lookup(fips, county, state, zip_code, city)
+        with self._lock:
+            if entry and entry["website"]:
+                self.hits += 1
+                return entry["website"]
+            self.misses += 1
+            return None
+
+    def remember(self, website, fips=None, county=None, state=None, zip_code=None, city=None):
+        """Memoize a website for the county (found as ``lookup`` finds it), else for (city, state).
+
+        Returns False when neither can be keyed. The bundled entry itself is
+        never changed, and a city is only keyed when its county is unknown.
+        """
+        website = extract_url(website)
+        fips, state, zip_code = normalize_fips(fips), normalize_state(state), normalize_zip(zip_code)
+        with self._lock:
+            self._load()
+            entry = self._find(fips, county, state, zip_code)
+        names = county_name_keys(entry["county"] if entry else county)
+        state = entry["state"] if entry else state
+        city = place_key(city)
+        if not website or not state or not (names or city):
+            return False
+        now = time.time()
+        with self._lock:
+            self.learned += 1
+            if names:
+                self.learned_sites[(names[0], state)] = website
+                if self._db is not None:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO county_sites (state, county, website, learned_at) VALUES (?, ?, ?, ?)",
+                        (state, names[0], website, now),
+                    )
+            else:
+                self.learned_places[(city, state)] = website
+                if self._db is not None:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO place_sites (state, city, website, learned_at) VALUES (?, ?, ?, ?)",
+                        (state, city, website, now),
+                    )
+        return True
+
+    def learn_zip(self, zip_code, fips):
+        """Remember ATTOM's county for a ZIP the bundled table lacks; False when it already has one."""
+        zip_code, fips = normalize_zip(zip_code), normalize_fips(fips)
+        with self._lock:
+            self._load()
+            if not zip_code or fips not in self.by_fips or zip_code in self.by_zip:
+                return False
+            self.by_zip[zip_code] = fips
+            if self._db is not None:
+                self._db.execute("INSERT OR IGNORE INTO zip_counties (zip, fips, learned_at) VALUES (?, ?, ?)",
+                                 (zip_code, fips, time.time()))
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "learned": self.learned,
+                    "counties": len(self.by_fips), "zips": len(self.by_zip)}
@@ -0,0 +1,88 @@
+# ==============================================================
+# ⏳ ReValix Field Freshness
+# Per-field time-to-live so re-enriching a saved property only asks
+# for values that expired or were never found
+# ==============================================================
+
+from datetime import datetime, timezone
+
+from chunking import assign_groups
+from store import is_found
+
+DAY = 86400
+
+# Field group (chunking.FIELD_GROUP_STARTS) → days a found value stays valid; None = never expires.
+GROUP_TTL_DAYS = {
+    "Identification": None,
+    "Location": None,
+    "Land & Site": 365 * 3,
+    "Building": 365,
+    "Interior & Systems": 365,
+    "Occupancy": 90,
+    "Unit": 365,
+    "Unit Lease": 90,
+    "Ownership & Title": 90,
+    "Transfer": 90,
+    "Valuation": 90,
+    "Income": 90,
+    "Financing": 90,
+    "Tax": 365,
+    "Amenities": 365,
+    "Market": 30,
+    "Market Supply": 30,
+    "Market Economy": 90,
+    "Demographics": 90,
+    "AI Scores": 30,
+}
+
+# Fields that age differently from the rest of their group.
+FIELD_TTL_DAYS = {
+    "Age of Building": 365,
+    "Year of Construction": None,
+    "Occupancy Status": 90,
+    "Property Tax": 365,
+    "No. of days on market": 7,
+    "Listing Price": 7,
+}
+
+DEFAULT_TTL_DAYS = 90
+
+def field_ttl_seconds(field, group):
+    """Seconds a found value of ``field`` stays fresh, or None when it never expires."""
+    days = FIELD_TTL_DAYS[field] if field in FIELD_TTL_DAYS else GROUP_TTL_DAYS.get(group, DEFAULT_TTL_DAYS)
+    return None if days is None else days * DAY
+
+def chunk_ttl_seconds(fields, groups=None):
+    """Shortest TTL among ``fields``: how long a cached answer for all of them stays usable (None: forever)."""
+    ttls = [field_ttl_seconds(f, g) for f, g in zip(fields, assign_groups(list(fields), groups))]
+    ttls = [t for t in ttls if t is not None]
+    return min(ttls) if ttls else None
+
+def _timestamp(value):
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+def fields_to_refresh(records, fields, groups=None, now=None):
+    """Template ``fields`` whose saved record is missing, NotFound or past its TTL.
+
+    Records without an ``Updated`` timestamp (saved before incremental mode)
+    count as expired unless their field never expires.
+    """
+    now = now if now is not None else datetime.now(timezone.utc).timestamp()
+    saved = {r.get("Field"): r for r in records or []}
+    stale = []
+    for field, group in zip(fields, assign_groups(list(fields), groups)):
+        rec = saved.get(field)
+        if rec is None or not is_found(rec.get("Value")):
+            stale.append(field)
+            continue
+        ttl = field_ttl_seconds(field, group)
+        if ttl is None:
+            continue
+        updated = _timestamp(rec.get("Updated"))
+        if updated is None or now - updated > ttl:
+            stale.append(field)
+    return stale
@@ -0,0 +1,292 @@
+# ==============================================================
+# 🧵 ReValix Report Jobs
+# Persistent SQLite job queue for report generation and a worker
+# pool on the shared I/O loop, so a run outlives the Streamlit
+# script (and the browser tab) that asked for it
+# ==============================================================
+
+import asyncio, json, os, socket, sqlite3, threading, time, uuid
+
+from cache import normalize_key_text
+from pipeline import UpstreamLimits, enrich_property
+from store import records_from_document
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(".cache", "jobs.sqlite"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Seconds between idle queue polls (jobs enqueued by another process) and progress flushes.
+JOB_POLL_SECONDS = 1.0
+JOB_FLUSH_SECONDS = 0.5
+# A running job whose worker stopped heartbeating for this long goes back to the queue.
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "90"))
+JOB_MAX_ATTEMPTS = 3
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_DAYS", "7")) * 86400
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# --------------------------------------------------------------
+# QUEUE
+# --------------------------------------------------------------
+class JobStore:
+    """Jobs table: one row per requested report with its status, progress and result.
+
+    ``queued`` → ``running`` (claimed by one worker, heartbeated) → ``done``
+    or ``failed``. Jobs left running by a worker that died are re-queued by
+    ``requeue_stale`` until ``JOB_MAX_ATTEMPTS``. Any process on the host
+    can enqueue, claim or read; SQLite's write lock makes claims atomic.
+    """
+
+    def __init__(self, path=JOB_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, address TEXT NOT NULL, address_key TEXT NOT NULL, options TEXT NOT NULL,"
+            " status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, worker TEXT,"
+            " created_at REAL NOT NULL, started_at REAL, heartbeat_at REAL, finished_at REAL,"
+            " progress TEXT, result TEXT, error TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_address ON jobs(address_key, status)")
+
+    def enqueue(self, address, options=None):
+        """Job id for ``address``; an identical request still queued or running is reused."""
+        key = normalize_key_text(address)
+        options = json.dumps(options or {}, sort_keys=True)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE address_key = ? AND options = ? AND status IN (?, ?)",
+                    (key, options, *ACTIVE_STATUSES),
+                ).fetchone()
+                job_id = row["id"] if row else uuid.uuid4().hex
+                if row is None:
+                    self._db.execute(
+                        "INSERT INTO jobs (id, address, address_key, options, status, created_at)"
+                        " VALUES (?, ?, ?, ?, 'queued', ?)",
+                        (job_id, address, key, options, time.time()),
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def claim(self, worker):
+        """Oldest queued job, now running on ``worker``; None when the queue is empty."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1").fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, heartbeat_at = ?,"
+                        " attempts = attempts + 1 WHERE id = ?",
+                        (worker, now, now, row["id"]),
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return None if row is None else self.get(row["id"])
+
+    def heartbeat(self, job_id, worker, progress=None):
+        """Mark a job running on ``worker`` alive, storing its latest ``progress``."""
+        with self._lock:
+            if progress is None:
+                self._db.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                                 (time.time(), job_id, worker))
+            else:
+                self._db.execute(
+                    "UPDATE jobs SET heartbeat_at = ?, progress = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                    (time.time(), json.dumps(progress, default=str), job_id, worker),
+                )
+
+    def finish(self, job_id, worker, result):
+        return self._end(job_id, worker, "done", result=json.dumps(result, default=str))
+
+    def fail(self, job_id, worker, error):
+        return self._end(job_id, worker, "failed", error=str(error))
+
+    def _end(self, job_id, worker, status, result=None, error=None):
+        """Close a job still running on ``worker``; False when it was re-queued or finished elsewhere."""
+        with self._lock:
+            return self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?"
+                " WHERE id = ? AND worker = ? AND status = 'running'",
+                (status, result, error, time.time(), job_id, worker),
+            ).rowcount == 1
+
+    def get(self, job_id):
+        """Job dict (``progress``/``options``/``result`` decoded), or None."""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for col in ("options", "progress", "result"):
+            job[col] = json.loads(job[col]) if job[col] else None
+        return job
+
+    def position(self, job_id):
+        """Queued jobs ahead of ``job_id``."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued'"
+                " AND created_at < (SELECT created_at FROM jobs WHERE id = ?)", (job_id,),
+            ).fetchone()[0]
+
+    def requeue_stale(self, stale_seconds=JOB_STALE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS):
+        """Re-queue running jobs whose worker went quiet (fail them after ``max_attempts``); returns the count."""
+        cutoff = time.time() - stale_seconds
+        with self._lock:
+            failed = self._db.execute(
+                "UPDATE jobs SET status = 'failed', error = 'worker lost', finished_at = ?"
+                " WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?",
+                (time.time(), cutoff, max_attempts),
+            ).rowcount
+            requeued = self._db.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND heartbeat_at < ?",
+                (cutoff,),
+            ).rowcount
+        return requeued + failed
+
+    def prune(self, max_age=JOB_RETENTION_SECONDS):
+        """Delete finished jobs older than ``max_age`` seconds."""
+        with self._lock:
+            return self._db.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (time.time() - max_age,),
+            ).rowcount
+
+    def counts(self):
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+# --------------------------------------------------------------
+# WORKERS
+# --------------------------------------------------------------
+def job_result(result):
+    """JSON-safe summary of an enrich_property result for the jobs table."""
+    df_final = result["df_final"]
+    return {
+        "normalized": result["normalized"],
+        "county_site": result["county_site"],
+        "records": df_final[["Field", "Value", "Source"]].values.tolist(),
+        "filled": int((df_final["Value"] != "NotFound").sum()),
+        "refreshed": result["refreshed"],
+        "retries": result["retries"],
+        "coalesced": result["coalesced"],
+    }
+
+class JobWorkers:
+    """``concurrency`` workers on a ConnectionManager's I/O loop, running queued jobs.
+
+    Workers use the manager's pooled sessions but their own
+    UpstreamLimits, so queued reports can't starve other users of the
+    process. Stage events and streamed rows become the job's ``progress``
+    (flushed every ``JOB_FLUSH_SECONDS``, which is also the heartbeat).
+    """
+
+    def __init__(self, store, connections, concurrency=JOB_WORKERS, limits=None):
+        self.store = store
+        self.conns = connections
+        self.concurrency = max(1, concurrency)
+        self.limits = limits
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.wakeup = None
+        self.tasks = []
+
+    def start(self):
+        self.conns.run(self._start())
+        return self
+
+    async def _start(self):
+        self.limits = self.limits or UpstreamLimits()
+        self.wakeup = asyncio.Event()
+        self.tasks = [asyncio.ensure_future(self._worker(f"{self.name}#{n}")) for n in range(self.concurrency)]
+        self.tasks.append(asyncio.ensure_future(self._maintain()))
+
+    def submit(self, address, **options):
+        """Queue a report for ``address`` (enrich_property keyword options) and wake a worker; returns the job id."""
+        job_id = self.store.enqueue(address, options)
+        self.conns.loop.call_soon_threadsafe(self.wakeup.set)
+        return job_id
+
+    async def _worker(self, name):
+        """One worker loop; ``name`` is unique per loop, so only the claiming loop can close the job."""
+        while True:
+            # Clear before claiming: a submit after the claim still wakes us.
+            self.wakeup.clear()
+            try:
+                job = await asyncio.to_thread(self.store.claim, name)
+            except Exception as e:
+                print("Job claim error:", e)
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _maintain(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.store.requeue_stale)
+                await asyncio.to_thread(self.store.prune)
+            except Exception as e:
+                print("Job maintenance error:", e)
+            await asyncio.sleep(JOB_STALE_SECONDS / 3)
+
+    async def _run(self, job):
+        progress = {"stage": None, "rows": []}
+
+        def on_stage(name, result):
+            progress["stage"] = name
+            if name == "normalized":
+                progress["normalized"] = result
+            elif name in ("county_site", "county_fill") and result:
+                progress["county_site"] = result
+            elif name == "lease_wait":
+                progress["waiting_for"] = result
+            elif name == "saved" and result[0] is not None:
+                progress["refreshing"] = len(result[1])
+                progress["rows"].extend([r["Field"], r["Value"]] for r in records_from_document(result[0]))
+
+        def on_rows(rows):
+            progress["rows"].extend([r["Field"], r["Value"]] for r in rows)
+
+        async def flush():
+            while True:
+                await asyncio.sleep(JOB_FLUSH_SECONDS)
+                try:
+                    await asyncio.to_thread(self.store.heartbeat, job["id"], job["worker"], progress)
+                except Exception as e:
+                    print("Job progress error:", e)
+
+        flusher = asyncio.ensure_future(flush())
+        try:
+            result = await enrich_property(self.conns.openai, self.conns.attom, job["address"], self.limits,
+                                           on_stage=on_stage, on_rows=on_rows, **job["options"])
+            if result["saved"] is not None:
+                await asyncio.wrap_future(result["saved"])
+            end, outcome = self.store.finish, job_result(result)
+        except Exception as e:
+            end, outcome = self.store.fail, f"{type(e).__name__}: {e}"
+        finally:
+            flusher.cancel()
+        try:
+            if not await asyncio.to_thread(end, job["id"], job["worker"], outcome):
+                print("Job result dropped (re-queued while running):", job["id"])
+        except Exception as e:
+            print("Job result error:", e)
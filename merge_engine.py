@@ -0,0 +1,113 @@
+# ==============================================================
+# 🧮 ReValix Vectorized Merge Engine
+# First valid value per (property, field) by source priority, for a
+# whole batch of properties in one NumPy pass
+# ==============================================================
+
+import numpy as np
+import pandas as pd
+
+# Lower rank wins; rows of equal rank keep their original order.
+SOURCE_PRIORITY = {"attom": 0, "gpt": 1}
+
+INVALID_VALUES = ["", "NotFound"]
+
+def stack_sources(property_id, **frames):
+    """Long frame [Property, Field, Value, Source, Rank] from ``attom=df, gpt=df`` answer frames."""
+    return _stack([(property_id, frames)])
+
+def _stack(properties):
+    """One long frame for ``[(property_id, {origin: df})]``, built from column arrays."""
+    columns = {"Property": [], "Field": [], "Value": [], "Source": [], "Rank": []}
+    for property_id, frames in properties:
+        for origin, df in frames.items():
+            if df is None or df.empty:
+                continue
+            columns["Field"].append(df["Field"].to_numpy(dtype=object))
+            columns["Value"].append(df["Value"].to_numpy(dtype=object))
+            columns["Source"].append(df["Source"].to_numpy(dtype=object))
+            columns["Property"].append(np.full(len(df), property_id, dtype=object))
+            columns["Rank"].append(np.full(len(df), SOURCE_PRIORITY[origin], dtype=np.int64))
+    if not columns["Field"]:
+        return pd.DataFrame(columns=list(columns))
+    return pd.DataFrame({name: np.concatenate(parts) for name, parts in columns.items()})
+
+def _first_by_rank(cell, rank, mask, n_cells):
+    """Row index of the best-ranked masked row per cell, -1 where there is none."""
+    rows = np.flatnonzero(mask)
+    best = np.full(n_cells, -1, dtype=np.int64)
+    if rows.size == 0:
+        return best
+    # Sort by (cell, rank, row); the first row of each cell run is the winner.
+    order = rows[np.lexsort((rows, rank[rows], cell[rows]))]
+    cells, first = np.unique(cell[order], return_index=True)
+    best[cells] = order[first]
+    return best
+
+def resolve(long_df, fields, properties=None, default_value="NotFound", default_source="Verified Data"):
+    """Merge answers for many properties at once.
+
+    ``long_df`` has columns Property, Field, Value, Source and optionally Rank
+    (default: row order). For every (property, template field) the value is
+    the best-ranked one that is not NaN/""/"NotFound"; the source is,
+    independently, the best-ranked non-blank source, as merge_all always did.
+    Returns a frame with one row per property × field, in ``fields`` order.
+    """
+    fields = pd.Index(list(dict.fromkeys(fields)))
+    if properties is None:
+        properties = pd.unique(long_df["Property"]) if len(long_df) else []
+    properties = pd.Index(list(properties))
+    n_fields, n_cells = len(fields), len(properties) * len(fields)
+
+    field_code = fields.get_indexer(long_df["Field"])
+    prop_code = properties.get_indexer(long_df["Property"])
+    known = (field_code >= 0) & (prop_code >= 0)
+    cell = np.where(known, prop_code * n_fields + field_code, 0)
+    rank = long_df["Rank"].to_numpy() if "Rank" in long_df else np.zeros(len(long_df), dtype=np.int64)
+
+    values = long_df["Value"].to_numpy(dtype=object)
+    sources = long_df["Source"].to_numpy(dtype=object)
+    value_ok = known & long_df["Value"].notna().to_numpy() & ~long_df["Value"].isin(INVALID_VALUES).to_numpy()
+    source_text = long_df["Source"].astype("string").str.strip()
+    source_ok = known & long_df["Source"].notna().to_numpy() & (source_text != "").fillna(False).to_numpy(dtype=bool)
+
+    best_value = _first_by_rank(cell, rank, value_ok, n_cells)
+    best_source = _first_by_rank(cell, rank, source_ok, n_cells)
+    out_values = np.full(n_cells, default_value, dtype=object)
+    out_sources = np.full(n_cells, default_source, dtype=object)
+    out_values[best_value >= 0] = values[best_value[best_value >= 0]]
+    out_sources[best_source >= 0] = sources[best_source[best_source >= 0]]
+
+    return pd.DataFrame({
+        "Property": np.repeat(properties.to_numpy(dtype=object), n_fields),
+        "Field": np.tile(fields.to_numpy(dtype=object), len(properties)),
+        "Value": out_values,
+        "Source": out_sources,
+    })
+
+def merge_frames(fields_df, **frames):
+    """Single-property merge: ``fields_df`` (Field, Description, ...) + resolved Value/Source."""
+    resolved = resolve(stack_sources(0, **frames), fields_df["Field"], properties=[0])
+    df_final = fields_df.reset_index(drop=True).copy()
+    by_field = resolved.set_index("Field")
+    df_final["Value"] = by_field["Value"].reindex(df_final["Field"]).to_numpy()
+    df_final["Source"] = by_field["Source"].reindex(df_final["Field"]).to_numpy()
+    return df_final
+
+def merge_batch(items, fields_df):
+    """``[df_final, ...]`` for ``[(property, df_attom_map, df_gpt), ...]``, merged in one pass."""
+    items = list(items)
+    if not items:
+        return []
+    # Positions, not addresses, identify properties: a portfolio may list one twice.
+    long_df = _stack([(i, {"attom": a, "gpt": g}) for i, (_, a, g) in enumerate(items)])
+    base = fields_df.drop_duplicates("Field").reset_index(drop=True)
+    resolved = resolve(long_df, base["Field"], properties=range(len(items)))
+    n_fields = len(base)
+    base_columns = {name: base[name].to_numpy() for name in base.columns}
+    values, sources = resolved["Value"].to_numpy(), resolved["Source"].to_numpy()
+    return [
+        pd.DataFrame({**base_columns, "Value": values[i * n_fields:(i + 1) * n_fields],
+                      "Source": sources[i * n_fields:(i + 1) * n_fields]})
+        for i in range(len(items))
+    ]
@@ -0,0 +1,1148 @@
+# ==============================================================
+# 🏙️ ReValix AI Property Intelligence - Core Pipeline
+# Streamlit-free enrichment steps shared by app.py and batch.py
+# ==============================================================
+
+import pandas as pd
+import asyncio, json, os, re, threading
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+from address import RULES_VERSION, canonicalize_address
+from attom_client import AttomClient
+from attom_spec import ATTOM_FIELD_MAP, attom_extractor
+from attom_context import compact_attom_context
+from scheduler import OpenAIScheduler
+from freshness import chunk_ttl_seconds, fields_to_refresh
+from retry import retry_missing
+from singleflight import MongoLease, SingleFlight
+from structured import JsonFieldParser, is_structured, parse_structured, response_format
+from store import (
+    SCHEMA_VERSION, address_key, ensure_indexes, find_report, find_reports, is_found, records_from_document, save_report,
+    update_report_fields,
+)
+from chunking import FillRateStats, field_groups, fill_rates_from_collection, plan_chunks
+from counties import CountyDirectory, extract_url, normalize_fips
+from merge_engine import merge_batch, merge_frames, resolve, stack_sources
+from cache import AttomCache, ResponseCache, content_key, normalize_key_text
+
+# --------------------------------------------------------------
+# ENVIRONMENT & CLIENT SETUP
+# --------------------------------------------------------------
+load_dotenv()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+ATTOM_API_KEY = os.getenv("ATTOM_API_KEY")
+MONGO_URI = os.getenv("MONGO_URI")
+
+class LazyClient:
+    """Stand-in that builds the real object with ``factory()`` on first use, once per process.
+
+    Importing pipeline (every Streamlit rerun, the API, batch workers) then
+    costs no SDK import, client construction or mongodb+srv DNS lookup.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._obj = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._obj is None:
+            with self._lock:
+                if self._obj is None:
+                    self._obj = self._factory()
+        return self._obj
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    def __getitem__(self, name):
+        return self.get()[name]
+
+def make_openai_client():
+    from openai import OpenAI   # the SDK import alone is ~0.4 s
+    return OpenAI(api_key=OPENAI_API_KEY)
+
+client = LazyClient(make_openai_client)
+mongo_client = LazyClient(lambda: MongoClient(MONGO_URI))
+db = LazyClient(lambda: mongo_client["revalix_property_intelligence"])
+collection = LazyClient(lambda: db["property_results"])
+
+# --------------------------------------------------------------
+# GPT SECTION + ATTOM CACHES
+# --------------------------------------------------------------
+# Bump SECTION_PROMPT_VERSION whenever the fetch_section prompt changes so
+# cached answers for the old wording are no longer reused.
+SECTION_MODEL = "gpt-4.1-mini"
+# "json": strict json_schema answers (structured.py); "table": the older | Field | Value | Source | text.
+SECTION_RESPONSE_MODE = os.getenv("SECTION_RESPONSE_MODE", "json")
+SECTION_PROMPT_VERSION = "section-v3" if SECTION_RESPONSE_MODE == "json" else "section-v2"
+
+gpt_cache = ResponseCache(
+    os.getenv("GPT_CACHE_PATH", os.path.join(".cache", "gpt_sections.sqlite")),
+    ttl_seconds=float(os.getenv("GPT_CACHE_TTL_DAYS", "30")) * 86400,
+    max_bytes=int(float(os.getenv("GPT_CACHE_MAX_MB", "256")) * 1024 * 1024),
+)
+
+attom_cache = AttomCache(
+    os.getenv("ATTOM_CACHE_PATH", os.path.join(".cache", "attom.sqlite")),
+    max_age_seconds=float(os.getenv("ATTOM_CACHE_MAX_AGE_DAYS", "90")) * 86400,
+    recheck_seconds=float(os.getenv("ATTOM_CACHE_RECHECK_DAYS", "7")) * 86400,
+)
+
+# Raw input → normalized address; the same strings come back in every portfolio.
+address_cache = ResponseCache(
+    os.getenv("ADDRESS_CACHE_PATH", os.path.join(".cache", "addresses.sqlite")),
+    ttl_seconds=float(os.getenv("ADDRESS_CACHE_TTL_DAYS", "365")) * 86400,
+    max_bytes=int(float(os.getenv("ADDRESS_CACHE_MAX_MB", "64")) * 1024 * 1024),
+)
+
+county_directory = CountyDirectory(
+    overlay_path=os.getenv("COUNTY_DIRECTORY_PATH", os.path.join(".cache", "counties.sqlite")),
+)
+
+openai_scheduler = OpenAIScheduler(
+    rpm=float(os.getenv("OPENAI_RPM", "500")),
+    tpm=float(os.getenv("OPENAI_TPM", "200000")),
+)
+
+fill_rate_stats = FillRateStats(lambda: fill_rates_from_collection(collection))
+
+# Single-flight for enrich_property: in-process flights, plus Mongo leases across processes.
+enrichment_flights = SingleFlight()
+report_leases = MongoLease(LazyClient(lambda: db["enrichment_leases"]))
+
+def section_cache_key(address, section_fields, model=None):
+    return content_key(normalize_key_text(address), [list(f) for f in section_fields], SECTION_PROMPT_VERSION,
+                       model or SECTION_MODEL)
+
+# --------------------------------------------------------------
+# FIELD TEMPLATE
+# --------------------------------------------------------------
+def load_field_template():
+    """Return field schema (Field + Description)."""
+
+    data = [
+        ("Property ID", "Unique identifier such as parcel number, APN, or internal ID. Alphanumeric."),
+        ("External Reference ID", "External system ID from lender, bank, or registry. Alphanumeric."),
+        ("Property Name", "Building, project, or complex name."),
+        ("Property Type", "Primary property category. Example: Residential, Commercial, Industrial, Special Purpose."),
+        ("Property Subtype", "Specific subtype. Example: Single Family Home, Office Building, Warehouse, Retail."),
+        ("Ownership Type", "Legal tenure. Example: Freehold, Leasehold, Co-op, Perpetual Lease."),
+        ("Occupancy Status", "Current usage. Example: Occupied, Vacant, Under Construction."),
+        ("Registration Status", "Official registry condition. Example: Registered, Unregistered."),
+        ("Registry Reference", "Official deed or registration reference number."),
+        ("Building Code / Permit ID", "Municipal or permit identification number."),
+        ("Geo ID", "Geographical identifier or census code."),
+        ("Address Line 1", "Street number and name, apartment or unit if any."),
+        ("Street Name", "Street name only."),
+        ("City", "City or municipality name."),
+        ("County", "County or parish name."),
+        ("Township", "Township or local administrative division."),
+        ("State", "Two-letter state or province code."),
+        ("Postal Code", "Postal or ZIP code."),
+        ("Latitude", "Latitude coordinate (decimal format)."),
+        ("Longitude", "Longitude coordinate (decimal format)."),
+        ("Facing Direction", "Orientation of property front. Example: North, South, East, West."),
+        ("Neighborhood Type", "Land-use mix. Example: Residential, Commercial, Mixed-Use, Institutional."),
+        ("Landmark", "Nearest major point of reference (school, road, mall)."),
+        ("Connectivity Score", "Numeric accessibility or transport score."),
+        ("Legal Description", "Formal land description (Lot & Block, Metes & Bounds, etc.)."),
+        ("Census Tract", "Census or statistical area ID."),
+        ("Market", "Market  name . Example: Akron, Austin."),
+        ("Submarket", "Sub-region within market."),
+        ("Submarket Cluster", "Functional cluster: Industrial, Retail, Residential."),
+        ("CBSA", "Core-Based Statistical Area ID."),
+        ("DMA", "Designated Market Area ID."),
+        ("State Class Code", "Local classification code."),
+        ("Neighborhood Code", "Local or assessor neighborhood code."),
+        ("Neighborhood Name", "Common neighborhood name."),
+        ("Map Facet", "Map feature or layer reference."),
+        ("Key Map", "Map book or key map ID."),
+        ("Tax District", "Tax jurisdiction or authority name."),
+        ("Tax Code", "Local tax classification code refered by assessor."),
+        ("Volume", "Building volume in cubic feet or meters."),
+        ("Location Type", "Urban, Suburban, or Rural classification."),
+        ("Land Area(Acre)", "Total site area in acres. Numeric only."),
+        ("Plot No. / Survey No.", "Official plot or survey number available with the assessor."),
+        ("Land Use Code", "Land use or zoning code assigned by authorities."),
+        ("Land Market Value Per Square Foot", "Market land value per square foot in USD."),
+        ("Plot Shape", "Shape type. Example: Rectangular, Irregular, Square."),
+        ("Topography", "Terrain level. Example: level, sloped, hilly."),
+        ("Grade", "Relative elevation to street level. Example: Above, At, Below."),
+        ("Soil Type", "Dominant soil type. Example: Clay, Sandy, Loamy."),
+        ("Dimensions", "Frontage and depth (in feet/meters)."),
+        ("Ground Coverage", "Percentage of land area covered by building."),
+        ("Easements/Right of Way", "Access rights if applicable."),
+        ("Encroachments", "Encroachment presence or details."),
+        ("Land Use Compliance / Zoning", "Local zoning or compliance status."),
+        ("FSI / FAR Allowed", "Permitted floor space index or ratio."),
+        ("Flood Zone", "FEMA flood classification. Example: AE, X, V."),
+        ("Flood Map Number", "Flood map panel number."),
+        ("Flood Map Date", "Flood map effective date (YYYY-MM-DD)."),
+        ("Flood Plain Area", "Floodplain type. Example: 100-year, 500-year, Floodway."),
+        ("Flood Risk Area", "Flood risk category. Example: Low, Moderate, High."),
+        ("Site Improvements", "On-site enhancements such as paving or landscaping."),
+        ("Off-Site Improvements", "Nearby infrastructure like curbs, lights, sidewalks."),
+        ("Immediate access to Highways/Freeways", "Yes/No; if Yes, specify route names."),
+        ("Lot Position", "Corner or Non-Corner position."),
+        ("Site Utility", "Overall site usability. Example: Good, Average, Poor."),
+        ("Frontage Rating", "Frontage quality: Good, Average, Poor."),
+        ("Access Rating", "Access quality: Good, Average, Poor."),
+        ("Visibility Rating", "Visibility rating: Good, Average, Poor."),
+        ("Location Rating", "Location rating: Good, Average, Poor."),
+        ("Building Name", "Name of the building or tower."),
+        ("Year of Construction", "Construction completion year (YYYY)."),
+        ("Building Style code", "Code for architectural or construction style."),
+        ("Building Design", "Design style name. Example: Colonial, Modern."),
+        ("Age of Building", "Building age in years."),
+        ("Stories", "Total number of above-ground floors."),
+        ("Buildings", "Number of buildings in property."),
+        ("Exterior", "Exterior material. Example: Brick, Concrete, Metal."),
+        ("Structural System", "Primary structure type. Example: Steel, RC, Timber."),
+        ("No. of Floors", "Number of floors in structure."),
+        ("Lift Count", "Number of elevators."),
+        ("Fire Safety Systems", "Presence of sprinklers, alarms, extinguishers, etc."),
+        ("Security Systems", "Presence of CCTV, guards, access control."),
+        ("Building Code", "Assessor or municipal classification code."),
+        ("Building Condition", "Overall condition. Example: Excellent, Good, Fair, Poor."),
+        ("GBA", "Gross Building Area in square feet (total built-up space). Numeric only."),
+        ("NRA", "Net Rentable Area in square feet (leaseable space). Numeric only."),
+        ("Year of Renovation", "Last renovation or major upgrade year (YYYY)."),
+        ("Useful Life", "Expected total useful life of the structure in years."),
+        ("Effective Age", "Functional or physical age of building in years."),
+        ("Remaining Economic Life", "Estimated years of use remaining."),
+        ("Building Class", "Quality classification. Example: A, B, C, D."),
+        ("Foundation", "Type of foundation: Slab, Piling, Concrete, Crawl Space."),
+        ("Total Rooms", "Total count of rooms in entire property."),
+        ("Total Bedroom", "Total number of bedrooms."),
+        ("Total Bath", "Total number of bathrooms."),
+        ("Interior Flooring", "Floor finish. Example: Tile, Vinyl, Wood, Carpet."),
+        ("Ceiling", "Ceiling material/type. Example: Drywall, Exposed, Suspended."),
+        ("Ceiling Height", "Floor-to-ceiling height in feet or meters."),
+        ("Interior Finish %", "Percentage of finished interior area."),
+        ("Dock Doors", "Type or count of dock doors. Example: Roll-Up, Leveler."),
+        ("Roofing", "Roof type and material. Example: Shingle, Metal, Concrete."),
+        ("Heating", "Heating system type. Example: Central, Forced Air, Heat Pump."),
+        ("Cooling", "Cooling system type. Example: Central, Split, Window."),
+        ("Other Improvements/Extra Features", "Other physical improvements like patios, sheds, or decks."),
+        ("Occupied By", "Owner or Tenant. Indicate who occupies the property."),
+        ("Number of Tenants", "Count of distinct tenants or occupants."),
+        ("Lease Structure", "Lease type. Example: Gross, Net, Modified Gross, Percentage, Full Service."),
+        ("Occupancy at the time of sale", "Percent of occupied area at time of sale. Numeric."),
+        ("Exempt %", "Portion of property exempt from tax. Percentage."),
+        ("Prorated Bldg %", "Percentage of total value assigned to building."),
+        ("Parking Ratio", "Parking spaces per 1,000 sqft or per unit."),
+        ("Parking Spaces", "Total number of parking spaces."),
+        ("Assessment Information", "Assessed values for land, building, and total with assessment year."),
+        ("Unit No. / Unit Name", "Specific unit, flat, or suite identifier."),
+        ("Floor No.", "Floor level number within the building."),
+        ("Unit Type", "Usage type of unit. Example: Office, Retail, 2BR Apartment."),
+        ("Use Type", "Usage classification. Example: Residential, Commercial, Mixed-Use."),
+        ("Carpet Area", "Usable floor area inside walls in sqft."),
+        ("Built-up Area", "Built-up area including walls and balconies."),
+        ("Super Built-up Area", "Built-up area plus proportionate share of common spaces."),
+        ("No. of Rooms", "Number of rooms in the individual unit."),
+        ("Bedrooms", "Number of bedrooms in the unit."),
+        ("Bathrooms", "Number of bathrooms in the unit."),
+        ("Ceiling Height (Unit)", "Ceiling height specific to this unit (feet/meters)."),
+        ("Furniture", "Furnishing status: Furnished, Semi-Furnished, Unfurnished."),
+        ("Unit Condition", "Condition of unit: Finished, Shell, Under Construction."),
+        ("Balcony / Terrace", "Presence and size of balcony or terrace."),
+        ("Occupied Exempt Units", "Percentage of occupied units that are tax-exempt."),
+        ("Occupied Rent-Regulated Units", "Percentage of occupied units with rent regulation."),
+        ("Vacant Units", "Percentage of vacant units."),
+        ("Lease Status", "Status of lease: Active, Expired, Terminated."),
+        ("Tenant Name (or ID)", "Tenant full name or tenant ID."),
+        ("Lease Start Date", "Start date of lease (YYYY-MM-DD)."),
+        ("Lease End Date", "Lease expiry date (YYYY-MM-DD)."),
+        ("Lease Term", "Duration of lease in months or years."),
+        ("Renewal Options", "Whether renewal options exist and their terms."),
+        ("Special Clauses", "Special clauses like early termination or exclusivity."),
+        ("Appliances Included", "List of appliances included in lease or sale."),
+        ("HVAC Type", "Heating, ventilation, and cooling configuration."),
+        ("Parking Assigned", "Number of parking spots assigned to the unit."),
+        ("Storage Unit Assigned", "Whether a storage space is assigned. Yes/No and size if available."),
+        ("Internet/Cable Ready", "Availability of internet/cable. Yes/No."),
+        ("ADA Accessibility", "Compliance with accessibility standards. Yes/No."),
+        ("Photos / Floor Plans", "Links, filenames, or references to photos/floor plans."),
+        ("Owner Name(s)", "Registered owner or entity name(s)."),
+        ("Title Status", "Title clarity. Example: Clear, Disputed, Encumbered."),
+        ("Registration No.", "Official registration or deed number."),
+        ("Registration Date", "Date of registration (YYYY-MM-DD)."),
+        ("Registrar Office", "Location or jurisdiction of registrar."),
+        ("Encumbrance Certificate", "Certificate or reference number for encumbrance check."),
+        ("Mortgages / Liens", "Mortgage or lien information including lender, amount, and date."),
+        ("Occupancy Certificate", "Certificate number and issue date."),
+        ("Fire NOC", "Fire department clearance number and issue date."),
+        ("Compliance to Local By-laws", "Whether property complies with local rules. Yes/No."),
+        ("Grantor", "Seller who sold the property to the current owner or buyer."),
+        ("Grantee", "Buyer or transferee name."),
+        ("Condition of Sale", "Nature of sale. Example: Arm’s Length, Foreclosure, Distressed, Investments, Family Transfer."),
+        ("Rights Transferred", "Legal rights transferred. Example: Fee Simple, Leasehold, Easement, Covenant, leased Fee."),
+        ("Qualified", "Whether verified and qualified. Example: Qualified, Pending."),
+        ("Type of Deed / Instrument", "Type of conveyance deed. Example: Warranty, Quitclaim."),
+        ("Covenants / Warranties", "Type of covenants or warranties in deed."),
+        ("Recording Information", "Book, page, and stamp details of recording."),
+        ("Miscellaneous Clauses", "Any additional clauses like restrictions or easements."),
+        ("Purchase Price / Sale Price", "Sale or purchase price with currency (numeric)."),
+        ("Purchase Date / Sale Date", "Transaction date (YYYY-MM-DD)."),
+        ("Current Market Value", "Estimated market value in USD or local currency."),
+        ("Current Appraised Value", "Value as per latest professional appraisal."),
+        ("Current Land Value", "Land portion of current appraised value."),
+        ("Current Improvements Value", "Improvement or building portion of current value."),
+        ("Appraised Value History", "Appraisal values for last three years."),
+        ("Listing Price", "Quoted listing or asking price."),
+        ("No. of days on market", "Days the property has been listed for sale."),
+        ("Assessed Value", "Official tax-assessed value for the property."),
+        ("Land Assessed Value", "Tax-assessed land value portion."),
+        ("Improvements Assessed Value", "Tax-assessed improvements value portion."),
+        ("Assessed Value History", "Historical assessed values for past three years."),
+        ("Guideline / Circle Rate", "Government benchmark or minimum valuation rate."),
+        ("Current Rent / Lease Rate", "Actual rent rate per month or per sqft."),
+        ("Market Rent", "Factual market rent available on the sources."),
+        ("Lease Duration", "Length of lease in months or years."),
+        ("Security Deposit Held", "Amount of security deposit held by landlord."),
+        ("CAM Charges (Commercial)", "Common area maintenance charges if applicable."),
+        ("Property Tax", "Annual property tax amount in USD or local currency."),
+        ("Utilities Included", "Utilities covered in rent. Example: Water, Electricity, Gas, Internet."),
+        ("Subsidies / Vouchers", "Any government or rent subsidy applied. Yes/No and type."),
+        ("Vacancy rate (Property)", "Percent of property currently vacant. Numeric with % sign."),
+        ("Tenant Incentives / TI Allowance", "Tenant improvement allowance or incentives offered."),
+        ("Leasing Commission", "Commission paid to leasing agent or broker."),
+        ("Reimbursements", "Amounts reimbursed by tenants for expenses."),
+        ("CapEx", "Capital expenditures made on property in currency."),
+        ("Cap Rate", "Capitalization rate as percentage refered in various sources."),
+        ("Discount rate", "Discount rate used for valuation calculations in % found in various sources."),
+        ("Mortgage Loan", "Total mortgage or loan amount in currency."),
+        ("Loan Date", "Date when loan originated (YYYY-MM-DD)."),
+        ("Originator", "Name of lender, bank, or financial institution."),
+        ("Mortgage Rate", "Interest rate percentage for the loan found in various sources."),
+        ("Rate Type", "Interest type. Example: Fixed, Variable, Adjustable found in various sources."),
+        ("Loan Term", "Duration of loan in months or years found in various sources."),
+        ("Monthly Mortgage Payment", "Monthly payment amount due in currency found in various sources."),
+        ("Debt Service", "Total annual debt service in currency found in various sources."),
+        ("Debt Service Coverage Ratio (DSCR)", "Net operating income divided by debt service. Numeric ratio found in various sources."),
+        ("Equity Rate", "Return on equity rate in % found in various sources."),
+        ("Current Tax Year", "Assessment or tax year (YYYY) give the current year data."),
+        ("Gross Tax", "Total annual gross tax amount. get latest data."),
+        ("Special Assessments", "Special district or improvement assessment charges get latest data."),
+        ("Other Deductions", "Any deductions applied to property tax."),
+        ("Net Tax", "Net payable tax after deductions get latest data."),
+        ("Full Rate", "Mill or property tax rate applied on gross amount."),
+        ("Effective Rate", "Mill or tax rate applied on net assessed value."),
+        ("Tax History", "Annual property tax payments over last 3 years and get latest data."),
+        ("Power Backup", "Availability of backup power. Example: Generator, Solar, UPS."),
+        ("Water Supply", "Water source type. Example: Municipal, Borewell, Both."),
+        ("Sewage System", "Waste disposal system. Example: Municipal, Septic, On-site Treatment."),
+        ("Security", "Security features. Example: CCTV, Gated, Guarded."),
+        ("Internet Connectivity", "Connection type. Example: Fiber, DSL, Satellite."),
+        ("Common Areas", "Shared spaces like lobby, lounge, or terrace."),
+        ("Recreational Amenities", "Amenities such as gym, pool, clubhouse."),
+        ("Green Area", "Percent of plot with green or landscaped area."),
+        ("Parking", "Parking type. Example: Open, Covered, Multi-level."),
+        ("Lighting", "Lighting provisions. Example: Street, Common Area, Smart Lighting."),
+        ("Market Segment", "Price or quality segment. Example: Luxury, Mid, Affordable."),
+        ("Price Trend (12m)", "12-month appreciation or depreciation rate %."),
+        ("Supply-Demand Index", "Local supply-demand ratio or index value."),
+        ("Sales Trend", "Change in sales over 6m or 12m period. Percent."),
+        ("Sales to Asking Price Differential", "Difference between sale and asking price in %."),
+        ("For Sale Trend", "Change in active listings over 6m/12m period."),
+        ("Transaction Type", "Type of transaction. Example: Individual, Portfolio, Entity Sale."),
+        ("Comparable Properties", "Nearby comparable property IDs or addresses."),
+        ("Avg. Comparable Price", "Average comparable price per sqft."),
+        ("Price Deviation", "Difference from comparable average price in %."),
+        ("Rent Trend", "Change in rental rates over 6m or 12m period."),
+        ("Direct & Sublet Rent Trend", "Variation between direct and sublet rents over time."),
+        ("Vacancy Rate (Market)", "Market-wide vacancy percentage."),
+        ("24 Months Lease Renewal Rate", "Percentage of leases renewed in last 24 months."),
+        ("RBA", "Rentable Building Area (total). Numeric in sqft."),
+        ("Availability Rate", "Percentage of leasable space available."),
+        ("Net Absorption SF", "Net occupied area change during period in sqft."),
+        ("Months on Market (Market)", "Average listing duration in months."),
+        ("Months to Lease (Market)", "Average time to lease space in months."),
+        ("Months Vacant (Market)", "Average vacancy duration in months."),
+        ("Probability of Leasing", "Likelihood of leasing within a given time frame (in months)."),
+        ("Deliveries SF", "Square footage of newly delivered buildings."),
+        ("Demolitions SF", "Square footage of demolished space."),
+        ("Under Construction SF", "Square footage under active construction."),
+        ("Under Construction Rate", "Percentage of inventory under construction."),
+        ("Preleased Rate", "Percentage of under-construction space pre-leased."),
+        ("Start Date (Project)", "Project construction start date (YYYY-MM-DD)."),
+        ("Complete Date (Project)", "Project completion date (YYYY-MM-DD)."),
+        ("Developer/Owner", "Name of developer or current owner entity."),
+        ("Sales Volume", "Total area sold or transaction volume in sqft."),
+        ("Market Sale Price per SF", "Average market sale price per square foot."),
+        ("Market Asking Rent per SF", "Average asking rent per square foot."),
+        ("Market Cap Rate", "Market capitalization rate percentage."),
+        ("Market Employment by Industry", "Breakdown of employment by major industry sectors."),
+        ("Unemployment Rate (Market)", "Current unemployment rate in %."),
+        ("Net Employment Change", "Employment gain or loss (numeric)."),
+        ("Predicted Value Range", "AI-predicted minimum and maximum property value range."),
+        ("AI Condition Score", "AI-generated property condition score (0–100)."),
+        ("Asset Value by Owner Type", "Distribution of asset ownership by owner type in %."),
+        ("Sales by Buyer Type", "Share of sales by buyer type in %."),
+        ("Sales by Seller Type", "Share of sales by seller type in %."),
+        ("Marketing and Exposure Time", "Average months property remains listed or marketed."),
+        ("Traffic Count", "Average daily vehicle traffic near property."),
+        ("Population in 1, 3 & 5 miles", "Population counts within 1, 3, and 5-mile radii."),
+        ("Population Growth", "Population growth rate %."),
+        ("Population", "Total population current level and change rates."),
+        ("Households", "Total number of households and change trends."),
+        ("Average Household Size", "Average household members count."),
+        ("Total Housing Units", "Number of total housing units."),
+        ("Owner Occupied Housing Units", "Count or % of owner-occupied housing."),
+        ("Renter Occupied Housing Units", "Count or % of renter-occupied housing."),
+        ("Vacant Housing Units", "Count or % of vacant housing units."),
+        ("Labor Force", "Total working population size."),
+        ("Unemployment", "Unemployment rate %."),
+        ("Median Household Income", "Median household income in USD."),
+        ("Per Capita Income", "Per capita income in USD."),
+        ("Median Home Price", "Median home sale price in USD."),
+        ("Latest Population 25+ by Educational Attainment", "Distribution of adult education levels."),
+        ("AI Condition Index", "AI-computed index of property condition (0–100)."),
+        ("Structural Integrity Score", "AI-generated score for structural soundness (0–100)."),
+        ("Market Confidence Index", "AI or ML-based market stability score (0–100)."),
+        ("Price Prediction (Now)", "AI-predicted current market value in USD."),
+        ("Price Prediction (12M Ahead)", "AI-predicted value 12 months ahead in USD."),
+        ("Market Liquidity Score", "AI-based time-to-sell estimate score (0–100)."),
+        ("Risk Classification", "Risk level. Example: Low, Moderate, High."),
+        ("Anomaly Detection", "Flag for data inconsistency. Example: Yes/No."),
+        ("Automated Summary", "AI-generated narrative summary of property attributes.")
+    ]
+
+    return pd.DataFrame(data, columns=["Field", "Description"])
+
+FIELD_GROUPS = field_groups(load_field_template()["Field"])
+
+# --------------------------------------------------------------
+# STEP 1: ADDRESS NORMALIZATION USING GPT
+# --------------------------------------------------------------
+def normalize_address_with_gpt(raw_address):
+    prompt = f"""
+Normalize this address into standard US postal format:
+Return strictly 2 lines:
+<address1>
+<city, state ZIP>
+
+Input: "{raw_address}"
+"""
+    resp = client.chat.completions.create(
+        model="gpt-4.1-mini",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.0,
+    )
+    lines = resp.choices[0].message.content.strip().split("\n")
+    return ", ".join(lines).strip()
+
+def address_cache_key(raw_address):
+    return content_key("address", RULES_VERSION, normalize_key_text(raw_address))
+
+def normalize_address_local(raw_address):
+    """Cached or rule-based normalization; None when only GPT can handle the input."""
+    key = address_cache_key(raw_address)
+    cached = address_cache.get(key)
+    if cached:
+        return cached
+    normalized = canonicalize_address(raw_address)
+    if normalized:
+        address_cache.set(key, normalized)
+    return normalized
+
+def normalize_address(raw_address):
+    """Local canonicalizer first; GPT only for inputs it can't parse confidently."""
+    normalized = normalize_address_local(raw_address)
+    if normalized:
+        return normalized
+    gpt_address = normalize_address_with_gpt(raw_address)
+    # Re-canonicalize so GPT and rule-based results share one spelling (and one cache/Mongo key).
+    normalized = canonicalize_address(gpt_address) or gpt_address
+    if normalized:
+        address_cache.set(address_cache_key(raw_address), normalized)
+    return normalized
+
+# --------------------------------------------------------------
+# STEP 2: ATTOM FETCH
+# --------------------------------------------------------------
+def make_attom_client(session=None):
+    """ATTOM client throttled to our plan; create one per event loop and share it."""
+    return AttomClient(
+        ATTOM_API_KEY,
+        rate_per_sec=float(os.getenv("ATTOM_RATE_PER_SEC", "5")),
+        burst=int(os.getenv("ATTOM_BURST", "10")),
+        session=session,
+    )
+
+async def fetch_attom_data_async(attom, address, use_cache=True):
+    if use_cache:
+        cached = attom_cache.get(address)
+        if cached is not None:
+            return cached
+    try:
+        properties = await attom.basic_profile(address)
+        attom_cache.set(address, properties)
+        return properties
+    except Exception as e:
+        print("ATTOM Error:", e)
+        return []
+
+def fetch_attom_data(address, use_cache=True):
+    """Blocking wrapper around fetch_attom_data_async for callers without a running loop."""
+    async def fetch_once():
+        async with make_attom_client() as attom:
+            return await fetch_attom_data_async(attom, address, use_cache)
+    return asyncio.run(fetch_once())
+
+# --------------------------------------------------------------
+# STEP 3: FLATTEN ATTOM DATA
+# --------------------------------------------------------------
+def flatten_attom(p_list):
+    """One row per ATTOM property payload, one column per attom_spec.ATTOM_SPEC path."""
+    return attom_extractor.frame(p_list)
+
+# --------------------------------------------------------------
+# STEP 4: MAPPING (report field → column in attom_spec.ATTOM_FIELD_MAP)
+# --------------------------------------------------------------
+def map_attom_to_fields(df_attom):
+    mapped = []
+    if df_attom.empty:
+        return pd.DataFrame(mapped, columns=["Field", "Value", "Source"])
+    row = df_attom.iloc[0]
+    for field, attom_field in ATTOM_FIELD_MAP.items():
+        if attom_field in row.index:
+            val = row[attom_field]
+            if pd.notna(val):
+                mapped.append({"Field": field, "Value": val, "Source": "ATTOM"})
+    return pd.DataFrame(mapped, columns=["Field", "Value", "Source"])
+
+# --------------------------------------------------------------
+# STEP 5: COUNTY DISCOVERY (DIRECTORY, GPT FALLBACK)
+# --------------------------------------------------------------
+def get_county_site(address, county=None, state=None):
+    where = f"\nCounty: {county}, {state}" if county and state else ""
+    prompt = f"""
+Find the official county government website for this address:
+Address: {address}{where}
+Return only the full URL (like https://www.kingcountywa.gov)
+"""
+    resp = client.chat.completions.create(
+        model="gpt-4.1-mini",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.0,
+    )
+    return resp.choices[0].message.content.strip()
+
+ADDRESS_TAIL_RE = re.compile(r",\s*([^,]+?),\s*([A-Za-z]{2})\s+(\d{5})(?:-\d{4})?\s*$")
+
+def county_keys(address, df_attom=None):
+    """(fips, county, state, zip, city): FIPS and county from the ATTOM row (when given), the rest from the address."""
+    row = df_attom.iloc[0] if df_attom is not None and not df_attom.empty else {}
+    fips, county, state = (row.get(c) if hasattr(row, "get") else None
+                           for c in ("FIPS Code", "Country Sec Subd", "Address State"))
+    m = ADDRESS_TAIL_RE.search(str(address or ""))
+    city, zip_code = (m.group(1), m.group(3)) if m else (None, None)
+    if not state:
+        state = m.group(2) if m else None
+    return fips, county, state, zip_code, city
+
+def attom_fips(df_attom):
+    """ATTOM's 5-digit county FIPS for the report identity, or None."""
+    return normalize_fips(county_keys(None, df_attom)[0])
+
+def lookup_county_site(address, df_attom=None):
+    """County website from the bundled directory (or one learned for the county), or None when GPT has to be asked.
+
+    Without ``df_attom`` the county is the one of the address's ZIP.
+    """
+    return county_directory.website(*county_keys(address, df_attom))
+
+def ask_county_site(address, df_attom=None):
+    """GPT fallback; the answer is memoized for the county (or the city, when the county is unknown)."""
+    keys = county_keys(address, df_attom)
+    entry = county_directory.lookup(*keys) or {}
+    answer = get_county_site(address, entry.get("county") or keys[1], entry.get("state") or keys[2])
+    county_directory.remember(answer, *keys)
+    return extract_url(answer) or answer
+
+def resolve_county_site(address, df_attom=None):
+    """Directory lookup first; GPT fallback whose answer is memoized for the county."""
+    return lookup_county_site(address, df_attom) or ask_county_site(address, df_attom)
+
+def refine_county_site(address, df_attom, county_site):
+    """The site of ATTOM's county when the directory knows it, else ``county_site``; no GPT call.
+
+    A ZIP the bundled table lacks learns ATTOM's FIPS. ``county_site`` (found
+    for the address's county) is never taught to ATTOM's county.
+    """
+    fips, county, state, zip_code, _ = county_keys(address, df_attom)
+    if not (fips or county):
+        return county_site
+    if zip_code and fips:
+        county_directory.learn_zip(zip_code, fips)
+    return (county_directory.lookup(fips, county, state) or {}).get("website") or county_site
+
+# --------------------------------------------------------------
+# STEP 6–8: ASYNC GPT FETCH FOR REMAINING FIELDS
+# --------------------------------------------------------------
+SECTION_ANSWER_INSTRUCTIONS = {
+    "json": 'Answer with the JSON object the schema describes: for each field, "value" (null when no verified '
+            'value exists) and "source" (where it came from).',
+    "table": "Return only this format:\n| Field | Value | Source |",
+}
+
+def build_section_prompt(address, section_fields, county_site, attom_summary):
+    field_defs = "\n".join([f"{f}: {d}" if d else f for f, d in section_fields])
+    return f"""
+You are an expert property intelligence assistant.
+Retrieve factual data for:
+{address}
+
+Use verified real estate and government sources.
+County site: {county_site}
+
+The following fields are needed:
+{field_defs}
+
+ATTOM verified info (for context): {attom_summary}
+
+{SECTION_ANSWER_INSTRUCTIONS[SECTION_RESPONSE_MODE]}
+"""
+
+def section_payload(address, section_fields, county_site, df_attom, model=None):
+    """Chat-completions request body for one field chunk (shared by fetch_section and the Batch API)."""
+    attom_summary = compact_attom_context(df_attom, [f for f, _ in section_fields], FIELD_GROUPS)
+    prompt = build_section_prompt(address, section_fields, county_site, attom_summary)
+    payload = {"model": model or SECTION_MODEL, "messages": [{"role": "user", "content": prompt}], "temperature": 0.0}
+    if SECTION_RESPONSE_MODE == "json":
+        payload["response_format"] = response_format([f for f, _ in section_fields])
+    return payload
+
+async def fetch_section(session, address, section_fields, county_site, df_attom, use_cache=True, on_rows=None,
+                        model=None):
+    """GPT answer table for one field chunk (cached).
+
+    A cached answer is used only while it is younger than the shortest
+    freshness TTL of the chunk's fields, so a 7-day field is never answered
+    from a 30-day-old entry. With ``on_rows`` the completion is streamed and ``on_rows(rows)`` gets
+    each parsed table row as soon as its line is complete (cache hits: all
+    rows at once).
+    """
+    cache_key = section_cache_key(address, section_fields, model)
+    if use_cache:
+        cached = gpt_cache.get(cache_key, chunk_ttl_seconds([f for f, _ in section_fields], FIELD_GROUPS))
+        if cached is not None:
+            if on_rows:
+                on_rows(parse_section(cached, section_fields))
+            return cached
+
+    headers = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
+    payload = section_payload(address, section_fields, county_site, df_attom, model)
+    try:
+        if on_rows is None:
+            content = await openai_scheduler.chat(session, payload, headers)
+        else:
+            parser = (JsonFieldParser([f for f, _ in section_fields]) if SECTION_RESPONSE_MODE == "json"
+                      else TableRowParser())
+
+            def on_delta(text):
+                rows = parser.feed(text)
+                if rows:
+                    on_rows(rows)
+
+            content = await openai_scheduler.chat_stream(session, payload, headers, on_delta)
+            rows = parser.close()
+            if rows:
+                on_rows(rows)
+        if content and parse_section(content, section_fields):
+            gpt_cache.set(cache_key, content)
+        return content
+    except Exception as e:
+        print("Section Error:", e)
+        return ""
+
+def parse_row(line):
+    """``{"Field", "Value", "Source"}`` for one ``| Field | Value | Source |`` line, else None."""
+    if "|" in line and not line.lower().startswith("| field"):
+        parts = [p.strip() for p in line.split("|") if p.strip()]
+        if len(parts) == 3:
+            return {"Field": parts[0], "Value": parts[1], "Source": parts[2]}
+    return None
+
+def parse_output(txt):
+    return [row for row in map(parse_row, txt.split("\n")) if row]
+
+def parse_section(content, section_fields=None):
+    """Rows of a section answer in either mode: strict JSON (validated) or a markdown table."""
+    if is_structured(content):
+        return parse_structured(content, None if section_fields is None else [f for f, _ in section_fields])
+    return parse_output(content or "")
+
+class TableRowParser:
+    """Incremental parse_output: ``feed`` streamed text, get back the rows whose lines completed."""
+
+    def __init__(self):
+        self.pending = ""
+        self.rows = []
+
+    def feed(self, text):
+        *lines, self.pending = (self.pending + text).split("\n")
+        rows = [row for row in map(parse_row, lines) if row]
+        self.rows.extend(rows)
+        return rows
+
+    def close(self):
+        """Rows from a last line without a trailing newline."""
+        return self.feed("\n") if self.pending else []
+
+# --------------------------------------------------------------
+# FINAL MERGE + SAVE
+# --------------------------------------------------------------
+def combine_sources(df_attom_map, df_gpt):
+    """One row per field: the first found value (ATTOM before GPT) and the first non-blank source."""
+    long_df = stack_sources(0, attom=df_attom_map, gpt=df_gpt)
+    fields = sorted(pd.unique(long_df["Field"])) if len(long_df) else []
+    return resolve(long_df, fields, properties=[0]).drop(columns=["Property"])
+
+def final_frame(df_attom_map, df_gpt, fields_df, attempts=None):
+    df_final = merge_frames(fields_df, attom=df_attom_map, gpt=df_gpt)
+    df_final["Updated"] = datetime.now(timezone.utc)
+    df_final["Attempts"] = df_final["Field"].map(attempts or {}).fillna(0).astype(int)
+    return df_final
+
+def merge_all(df_attom_map, df_gpt, fields_df, address, writer=None, attempts=None, fips=None):
+    df_final = final_frame(df_attom_map, df_gpt, fields_df, attempts)
+
+    # Save to MongoDB (schema v2, see store.py); queued when a BulkWriter is given
+    save_report(collection, address, df_final.to_dict("records"), writer=writer, fips=fips)
+    return df_final
+
+def merge_all_batch(items, fields_df, writer=None, fips=None):
+    """``merge_all`` for many properties: ``[(address, df_attom_map, df_gpt), ...]`` merged in one pass.
+
+    ``fips`` is ``{address: ATTOM FIPS}``. Returns the df_final frames in
+    ``items`` order; each report is saved (or queued on ``writer``).
+    """
+    items = list(items)
+    fips = fips or {}
+    now = datetime.now(timezone.utc)
+    finals = merge_batch(items, fields_df)
+    for (address, _, _), df_final in zip(items, finals):
+        df_final["Updated"] = now
+        save_report(collection, address, df_final.to_dict("records"), now, writer=writer, fips=fips.get(address))
+    return finals
+
+def merge_answered_batch(items, fields_df, writer=None, fips=None):
+    """``merge_all_batch`` for properties some of whose GPT requests were lost.
+
+    A property with a saved report gets a field-level ``$set`` of only the
+    values found this run, so fields whose answers were lost keep their saved
+    values; one without a saved report is saved whole.
+    """
+    items = list(items)
+    if not items:
+        return []
+    fips = fips or {}
+    now = datetime.now(timezone.utc)
+    finals = merge_batch(items, fields_df)
+    saved = find_reports(collection, [address for address, _, _ in items], {"address_key": 1, "fields": 1})
+    for (address, _, _), df_final in zip(items, finals):
+        df_final["Updated"] = now
+        records = df_final.to_dict("records")
+        doc = saved.get(address_key(address))
+        if doc is None:
+            save_report(collection, address, records, now, writer=writer, fips=fips.get(address))
+            continue
+        found = [r for r in records if is_found(r["Value"])]
+        values = {r["Field"]: r["Value"] for r in records_from_document(doc)}
+        values.update((r["Field"], r["Value"]) for r in found)
+        update_report_fields(collection, address, found, values, now, writer=writer, fips=fips.get(address))
+    return finals
+
+def ensure_collection_indexes():
+    """Create the property_results indexes (idempotent); failures only cost speed."""
+    try:
+        ensure_indexes(collection)
+        report_leases.ensure_indexes()
+    except Exception as e:
+        print("Mongo index error:", e)
+
+def load_saved_report(address):
+    """Saved report document for ``address`` (v2, or v1 until migrated), or None."""
+    return find_report(collection, address)
+
+def merge_incremental(saved_doc, df_attom_map, df_gpt, fields_df, address, refresh_fields, writer=None,
+                      attempts=None, fips=None):
+    """Overlay freshly found values for ``refresh_fields`` on the saved report and write only those.
+
+    ``attempts`` ({field: GPT requests this run}) is added to the saved counts;
+    ``fips`` (ATTOM's, None when ATTOM wasn't asked) replaces the saved one.
+    Returns (df_final, ack future from ``writer`` or None).
+    """
+    attempts = attempts or {}
+    merged = combine_sources(df_attom_map, df_gpt)
+    merged = merged[merged["Field"].isin(refresh_fields)]
+    saved = {r["Field"]: r for r in records_from_document(saved_doc)}
+    now = datetime.now(timezone.utc)
+    changed = []
+    for rec in merged.to_dict("records"):
+        f = rec["Field"]
+        tried = saved.get(f, {}).get("Attempts", 0) + attempts.get(f, 0)
+        # A value that is still NotFound keeps the saved value; only its attempt count moves.
+        if f not in saved or rec["Value"] != "NotFound":
+            changed.append({**rec, "Updated": now, "Attempts": tried})
+        elif attempts.get(f):
+            changed.append({**saved[f], "Attempts": tried})
+    for f in set(refresh_fields) - set(merged["Field"]) - set(saved):
+        changed.append({"Field": f, "Value": "NotFound", "Source": "Verified Data", "Updated": now,
+                        "Attempts": attempts.get(f, 0)})
+    for rec in changed:
+        saved[rec["Field"]] = {**saved.get(rec["Field"], {}), **rec}
+
+    rows = [saved.get(f, {"Field": f, "Value": "NotFound", "Source": "Verified Data"}) for f in fields_df["Field"]]
+    df_final = pd.merge(fields_df, pd.DataFrame(rows).drop(columns=["Description"], errors="ignore"), on="Field", how="left")
+    df_final["Value"] = df_final["Value"].fillna("NotFound")
+    df_final["Source"] = df_final["Source"].fillna("Verified Data")
+    df_final["Attempts"] = df_final["Attempts"].fillna(0).astype(int) if "Attempts" in df_final else 0
+
+    if saved_doc.get("schema_version") == SCHEMA_VERSION:
+        saved = update_report_fields(collection, address, changed, dict(zip(df_final["Field"], df_final["Value"])),
+                                     now, writer=writer, fips=fips)
+    else:
+        # v1 document: write the whole report once in the new schema.
+        saved = save_report(collection, address, df_final.to_dict("records"), now, writer=writer, fips=fips)
+    return df_final, saved
+
+# --------------------------------------------------------------
+# FULL PROPERTY ENRICHMENT (dependency graph)
+# --------------------------------------------------------------
+class UpstreamLimits:
+    """Process-wide concurrency caps per upstream, shared by all in-flight properties."""
+
+    def __init__(self, openai=32, attom=4, mongo=4):
+        self.openai = asyncio.Semaphore(openai)
+        self.attom = asyncio.Semaphore(attom)
+        self.mongo = asyncio.Semaphore(mongo)
+
+
+async def run_stage_graph(stages, on_stage=None):
+    """Run ``{name: (deps, async fn(**dep_results))}`` with every stage started as soon as its deps finish.
+
+    Returns ``{name: result}``. ``on_stage(name, result)`` fires as each stage completes.
+    """
+    tasks = {}
+
+    async def run(name):
+        deps, fn = stages[name]
+        args = {d: await tasks[d] for d in deps}
+        result = await fn(**args)
+        if on_stage:
+            on_stage(name, result)
+        return result
+
+    for name in stages:
+        tasks[name] = asyncio.ensure_future(run(name))
+    try:
+        results = await asyncio.gather(*tasks.values())
+    except BaseException:
+        for t in tasks.values():
+            t.cancel()
+        raise
+    return dict(zip(tasks, results))
+
+
+def first_pass_context(section_fields, df_attom):
+    """ATTOM frame a first-pass chunk is sent with: none for fields ATTOM can never provide (see enrich_normalized)."""
+    return df_attom if any(f in ATTOM_FIELD_MAP for f, _ in section_fields) else pd.DataFrame()
+
+def unmapped_fields(wanted):
+    """Rows of ``wanted`` (Field, Description) ATTOM can never provide."""
+    return wanted[~wanted["Field"].isin(list(ATTOM_FIELD_MAP))]
+
+def missing_mapped_fields(wanted, df_attom_map):
+    """Rows of ``wanted`` ATTOM could provide but didn't map for this property."""
+    return wanted[wanted["Field"].isin(list(ATTOM_FIELD_MAP)) & ~wanted["Field"].isin(df_attom_map["Field"])]
+
+
+def chunk_fields(df, chunk_size=10, fill_rates=None):
+    """Field chunks for fetch_section: adaptive (chunking.plan_chunks) unless ``chunk_size`` is given."""
+    pairs = df[["Field", "Description"]].values.tolist()
+    if chunk_size:
+        return [pairs[i:i+chunk_size] for i in range(0, len(pairs), chunk_size)]
+    chunks, _ = plan_chunks(pairs, fill_rates, FIELD_GROUPS)
+    return chunks
+
+
+async def enrich_property(session, attom, raw_addr, limits=None, chunk_size=None, on_stage=None, incremental=False,
+                          writer=None, on_rows=None, retry_policy=None, coalesce=True):
+    """Normalize ``raw_addr`` and enrich it once, however many callers ask for it at the same time.
+
+    Calls for the same property (store.address_key of the normalized
+    address) and the same result-changing options (flight_options) share
+    one run. In this process later callers await the leader's result and
+    get its stage and row events from the moment they join
+    (``result["coalesced"] == "process"``). Across processes the leader
+    holds a MongoLease on the address; the others wait for it and read the
+    report it saved when it ran the same options (``"lease"``).
+    ``coalesce=False`` always runs. The other options are enrich_normalized's.
+    """
+    limits = limits or UpstreamLimits()
+    normalized = await asyncio.to_thread(normalize_address_local, raw_addr)
+    if not normalized:
+        async with limits.openai:
+            normalized = await asyncio.to_thread(normalize_address, raw_addr)
+    if on_stage:
+        on_stage("normalized", normalized)
+
+    def enrich(stage_cb, rows_cb):
+        return enrich_normalized(session, attom, normalized, limits, chunk_size, stage_cb, incremental, writer,
+                                 rows_cb, retry_policy)
+
+    if not coalesce:
+        result, joined = await enrich(on_stage, on_rows), False
+    else:
+        key = address_key(normalized)
+        options = flight_options(incremental, chunk_size, retry_policy)
+
+        async def lead(flight):
+            # Streaming is the leader's choice; joiners with on_rows get rows only if it streams.
+            return await run_leased(key, normalized, lambda: enrich(flight.on_stage, on_rows and flight.on_rows),
+                                    limits, flight.on_stage, options)
+
+        result, joined = await enrichment_flights.run((key, options), lead, on_stage, on_rows)
+    if joined:
+        # Joiners share the leader's run, not its frame.
+        return {**result, "address": raw_addr, "df_final": result["df_final"].copy(), "coalesced": "process"}
+    return {**result, "address": raw_addr, "coalesced": result.get("coalesced")}
+
+
+def flight_options(incremental, chunk_size, retry_policy):
+    """The enrich_property options that change its result, as a stable string (cf. jobs.JobStore.enqueue)."""
+    return json.dumps({"incremental": bool(incremental), "chunk_size": chunk_size,
+                       "retry": vars(retry_policy) if retry_policy is not None else None}, sort_keys=True)
+
+
+async def run_leased(key, normalized, enrich, limits, on_stage=None, options=None):
+    """``await enrich()`` under the cross-process lease for ``key``.
+
+    While another process holds the lease, wait for it (``on_stage("lease_wait",
+    holder)``) and return the report it saved when it ran the same
+    ``options``; if it gave up without saving or ran other options, take the
+    lease and run. Without a reachable lease collection, just run.
+    """
+    while True:
+        try:
+            async with limits.mongo:
+                token = await asyncio.to_thread(report_leases.acquire, key, options)
+        except Exception as e:
+            print("Lease error:", e)
+            return await enrich()
+        if token:
+            break
+        lease = await asyncio.to_thread(report_leases.current, key)
+        if lease and on_stage:
+            on_stage("lease_wait", lease.get("holder"))
+        lease = await report_leases.wait_released(key) or lease
+        async with limits.mongo:
+            doc = await asyncio.to_thread(load_saved_report, normalized)
+        # Both datetimes come back from the same client, so they compare directly.
+        if lease and lease.get("options") == options and doc and doc.get("updated_at") \
+                and doc["updated_at"] >= lease["acquired_at"]:
+            return report_result(doc, normalized)
+
+    def release(_=None):
+        try:
+            report_leases.release(key, token)
+        except Exception as e:
+            print("Lease release error:", e)
+
+    keep_alive = asyncio.ensure_future(report_leases.keep_alive(key, token))
+    try:
+        result = await enrich()
+    except BaseException:
+        asyncio.get_running_loop().run_in_executor(None, release)
+        raise
+    finally:
+        keep_alive.cancel()
+    # Hold the lease until a queued write is acknowledged, so waiters read the new report.
+    if isinstance(result["saved"], Future):
+        result["saved"].add_done_callback(release)
+    else:
+        await asyncio.to_thread(release)
+    return result
+
+
+def report_result(doc, normalized):
+    """enrich_property result for a report another process has just saved."""
+    df_fields = load_field_template()
+    records = pd.DataFrame(records_from_document(doc), columns=["Field", "Value", "Source", "Updated", "Attempts"])
+    df_final = pd.merge(df_fields, records, on="Field", how="left")
+    df_final["Value"] = df_final["Value"].fillna("NotFound")
+    df_final["Source"] = df_final["Source"].fillna("Verified Data")
+    df_final["Attempts"] = df_final["Attempts"].fillna(0).astype(int)
+    return {
+        "normalized": normalized,
+        "county_site": "",
+        "df_attom": pd.DataFrame(),
+        "df_final": df_final,
+        "saved": None,
+        "refreshed": None,
+        "attempts": {f: n for f, n in zip(df_final["Field"], df_final["Attempts"]) if n},
+        "retries": {"requests": 0, "lost": 0, "unanswered": 0, "recovered": 0, "budget": 0},
+        "coalesced": "lease",
+    }
+
+
+async def enrich_normalized(session, attom, normalized, limits=None, chunk_size=None, on_stage=None,
+                            incremental=False, writer=None, on_rows=None, retry_policy=None):
+    """Enrich one normalized address, overlapping every stage that does not depend on another.
+
+        saved ──┬── attom ────────────┬── county_fill ── gpt_mapped ──┬── gpt_retry ── df_final
+                └── county_site ──┬───┘                               │
+                                  └── gpt_unmapped ───────────────────┘
+
+    The county site is resolved from the address's ZIP county in the
+    bundled directory, next to ATTOM; GPT is asked only for counties it
+    has no website for, once per county. ``county_fill`` refines it from
+    ATTOM's FIPS without calling GPT (a ZIP can span counties).
+    Fields ATTOM can never provide (not in ATTOM_FIELD_MAP) are sent as soon
+    as the county site is known, with the address as their only context;
+    fields ATTOM could map are asked for only when it didn't, with the ATTOM
+    attributes relevant to them (attom_context). The retry pass sends that
+    context with every field. Fields are packed into requests by
+    chunking.plan_chunks using the fill rates of saved reports, unless a
+    fixed ``chunk_size`` is given.
+    With ``incremental`` and a saved report, only fields that are NotFound or
+    past their freshness TTL are asked for (bypassing the section cache) and
+    written back field by field.
+    With a ``writer`` (writer.BulkWriter) the report write is queued instead of
+    sent inline; ``result["saved"]`` is the future for its acknowledgement.
+    With ``on_rows`` the GPT sections are streamed: ``on_rows(rows)`` gets
+    the mapped ATTOM rows as soon as ATTOM answers, then each GPT row as its
+    table line arrives (rows are ``{"Field", "Value", "Source"}`` dicts).
+    Fields the sections lost or left NotFound are re-asked by
+    retry.retry_missing within ``retry_policy``'s per-property budget;
+    ``result["attempts"]`` has the request count per field (also stored
+    with the report) and ``result["retries"]`` the retry stats.
+    Blocking client calls run in worker threads and every upstream call waits
+    on the matching semaphore in ``limits``.
+    """
+    limits = limits or UpstreamLimits()
+    df_fields = load_field_template()
+
+    async def gpt_sections(saved, fields, county_site, df_attom, fill_rates):
+        """``[(chunk, parsed rows)]`` for every request the fields were packed into."""
+        async def limited_section(c):
+            async with limits.openai:
+                # Refreshing a saved report skips the section cache: it may hold the very answers being refreshed.
+                return await fetch_section(session, normalized, c, county_site, df_attom, use_cache=saved[0] is None,
+                                           on_rows=on_rows)
+
+        chunks = chunk_fields(fields, chunk_size, fill_rates)
+        results = await asyncio.gather(*[limited_section(c) for c in chunks])
+        return [(chunk, parse_section(res, chunk)) for chunk, res in zip(chunks, results)]
+
+    async def load_saved():
+        """(saved document, fields to ask for) — (None, all fields) for a full run."""
+        if not incremental:
+            return None, df_fields
+        async with limits.mongo:
+            doc = await asyncio.to_thread(load_saved_report, normalized)
+        if doc is None:
+            return None, df_fields
+        stale = fields_to_refresh(records_from_document(doc), df_fields["Field"].tolist(), FIELD_GROUPS)
+        return doc, df_fields[df_fields["Field"].isin(stale)]
+
+    async def fetch_attom(saved):
+        if saved[1].empty:
+            return pd.DataFrame(), pd.DataFrame(columns=["Field", "Value", "Source"])
+        async with limits.attom:
+            attom_data = await fetch_attom_data_async(attom, normalized)
+        df_attom = flatten_attom(attom_data)
+        df_attom_map = map_attom_to_fields(df_attom)
+        if on_rows:
+            on_rows(df_attom_map[df_attom_map["Field"].isin(saved[1]["Field"])].to_dict("records"))
+        return df_attom, df_attom_map
+
+    async def find_county(saved):
+        if saved[1].empty:
+            return ""
+        site = await asyncio.to_thread(lookup_county_site, normalized)
+        if site:
+            return site
+        async with limits.openai:
+            return await asyncio.to_thread(ask_county_site, normalized)
+
+    async def fill_county(saved, county_site, attom):
+        if saved[1].empty:
+            return ""
+        return await asyncio.to_thread(refine_county_site, normalized, attom[0], county_site)
+
+    async def load_fill_rates():
+        async with limits.mongo:
+            return await asyncio.to_thread(fill_rate_stats.get)
+
+    async def ask_unmapped(saved, county_site, fill_rates):
+        # First pass: the address only, so these start before ATTOM answers; retries get the ATTOM context.
+        return await gpt_sections(saved, unmapped_fields(saved[1]), county_site, pd.DataFrame(), fill_rates)
+
+    async def ask_mapped(saved, county_fill, attom, fill_rates):
+        df_attom, df_attom_map = attom
+        return await gpt_sections(saved, missing_mapped_fields(saved[1], df_attom_map), county_fill, df_attom,
+                                  fill_rates)
+
+    async def retry(saved, county_fill, attom, fill_rates, gpt_unmapped, gpt_mapped):
+        """Re-ask only the fields the sections lost or left NotFound: (rows, attempts, stats)."""
+        descriptions = dict(zip(df_fields["Field"], df_fields["Description"]))
+
+        async def ask(chunk, model):
+            # Long-shot fields were sent without a description; a retry gets the full one.
+            chunk = [(f, descriptions.get(f) or desc) for f, desc in chunk]
+            async with limits.openai:
+                res = await fetch_section(session, normalized, chunk, county_fill, attom[0],
+                                          use_cache=False, on_rows=on_rows, model=model)
+            return parse_section(res, chunk)
+
+        priority = {f: found / tried for f, (tried, found) in (fill_rates or {}).items() if tried}
+        return await retry_missing(gpt_unmapped + gpt_mapped, ask, retry_policy, priority)
+
+    async def merge(saved, attom, gpt_unmapped, gpt_mapped, gpt_retry):
+        """(df_final, write ack future or None)."""
+        rows = [r for _, chunk_rows in gpt_unmapped + gpt_mapped for r in chunk_rows] + gpt_retry[0]
+        df_gpt = pd.DataFrame(rows, columns=["Field", "Value", "Source"])
+        attempts = gpt_retry[1]
+        fips = attom_fips(attom[0])
+        doc, wanted = saved
+        if doc is None and writer is not None:
+            df_final = final_frame(attom[1], df_gpt, df_fields, attempts)
+            return df_final, save_report(collection, normalized, df_final.to_dict("records"), writer=writer, fips=fips)
+        async with limits.mongo:
+            if doc is None:
+                return await asyncio.to_thread(merge_all, attom[1], df_gpt, df_fields, normalized, None, attempts,
+                                               fips), None
+            return await asyncio.to_thread(merge_incremental, doc, attom[1], df_gpt, df_fields, normalized,
+                                           wanted["Field"].tolist(), writer, attempts, fips)
+
+    out = await run_stage_graph({
+        "saved": ([], load_saved),
+        "attom": (["saved"], fetch_attom),
+        "county_site": (["saved"], find_county),
+        "county_fill": (["saved", "county_site", "attom"], fill_county),
+        "fill_rates": ([], load_fill_rates),
+        "gpt_unmapped": (["saved", "county_site", "fill_rates"], ask_unmapped),
+        "gpt_mapped": (["saved", "county_fill", "attom", "fill_rates"], ask_mapped),
+        "gpt_retry": (["saved", "county_fill", "attom", "fill_rates", "gpt_unmapped", "gpt_mapped"], retry),
+        "df_final": (["saved", "attom", "gpt_unmapped", "gpt_mapped", "gpt_retry"], merge),
+    }, on_stage=on_stage)
+
+    return {
+        "normalized": normalized,
+        "county_site": out["county_fill"],
+        "df_attom": out["attom"][0],
+        "df_final": out["df_final"][0],
+        "saved": out["df_final"][1],
+        "refreshed": None if out["saved"][0] is None else len(out["saved"][1]),
+        "attempts": out["gpt_retry"][1],
+        "retries": out["gpt_retry"][2],
+    }
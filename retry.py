@@ -0,0 +1,99 @@
+# ==============================================================
+# 🔁 ReValix Targeted NotFound Retries
+# Re-ask only what a section run left missing: lost fields in their
+# own chunk, unanswered fields in small (optionally escalated) chunks, on a
+# per-property request budget
+# ==============================================================
+
+import asyncio, os
+
+from store import is_found
+
+# Extra GPT requests one property may spend on retries (0 disables them).
+RETRY_BUDGET = int(os.getenv("RETRY_BUDGET", "4"))
+# Stronger model for the re-chunked unanswered fields (e.g. "gpt-4.1"); "" keeps the section model.
+RETRY_MODEL = os.getenv("RETRY_MODEL", "")
+
+class RetryPolicy:
+    """How a property's missing fields are retried.
+
+    - lost: asked but absent from the answer (transport error, empty or
+      unparseable reply). Same chunk, same model, up to ``lost_attempts``
+      more times; the request itself failed, not the question.
+    - unanswered: answered NotFound. Re-asked once in chunks of
+      ``chunk_size`` so each field gets more attention, with
+      ``escalate_model`` when set.
+
+    Every retry request costs one unit of ``budget``; lost fields go first,
+    and each round's requests run concurrently.
+    """
+
+    def __init__(self, budget=None, lost_attempts=1, chunk_size=5, escalate_model=None):
+        self.budget = RETRY_BUDGET if budget is None else budget
+        self.lost_attempts = lost_attempts
+        self.chunk_size = chunk_size
+        self.escalate_model = (RETRY_MODEL if escalate_model is None else escalate_model) or None
+
+def classify(chunk, rows):
+    """(lost, unanswered) ``[(field, description)]`` of one chunk given its parsed rows."""
+    answered = {}
+    for row in rows:
+        answered.setdefault(row["Field"], is_found(row["Value"]))
+        answered[row["Field"]] |= is_found(row["Value"])
+    lost = [f for f in chunk if f[0] not in answered]
+    unanswered = [f for f in chunk if answered.get(f[0]) is False]
+    return lost, unanswered
+
+async def retry_missing(outcomes, ask, policy=None, priority=None):
+    """Retry what ``outcomes`` left missing; returns (extra rows, attempts, stats).
+
+    ``outcomes`` is ``[(chunk, rows)]`` from the first pass; ``ask(chunk,
+    model)`` re-asks one chunk uncached and returns its parsed rows.
+    ``attempts`` counts the requests each field has been part of, first
+    pass included. ``priority`` ({field: score}, e.g. historical fill rate)
+    decides which unanswered fields the budget is spent on first.
+    """
+    policy = policy or RetryPolicy()
+    attempts = {f: 1 for chunk, _ in outcomes for f, _ in chunk}
+    stats = {"requests": 0, "lost": 0, "unanswered": 0, "recovered": 0, "budget": policy.budget}
+    extra = []
+    lost_chunks, unanswered = [], []
+    for chunk, rows in outcomes:
+        lost, missing = classify(chunk, rows)
+        if lost:
+            lost_chunks.append(lost)
+        unanswered.extend(missing)
+    stats["lost"] = sum(len(c) for c in lost_chunks)
+    stats["unanswered"] = len(unanswered)
+
+    async def spend(chunks, model):
+        """Ask ``chunks`` concurrently (as many as the budget allows); [(chunk, rows)]."""
+        chunks = chunks[:max(0, policy.budget - stats["requests"])]
+        stats["requests"] += len(chunks)
+        for chunk in chunks:
+            for f, _ in chunk:
+                attempts[f] += 1
+        results = await asyncio.gather(*[ask(chunk, model) for chunk in chunks])
+        for rows in results:
+            extra.extend(rows)
+        return list(zip(chunks, results))
+
+    for _ in range(policy.lost_attempts):
+        asked = await spend(lost_chunks, None)
+        still_lost = lost_chunks[len(asked):]
+        for chunk, rows in asked:
+            lost, missing = classify(chunk, rows)
+            if lost:
+                still_lost.append(lost)
+            unanswered.extend(missing)
+        lost_chunks = still_lost
+    # Whatever is still lost gets the unanswered treatment.
+    unanswered.extend(f for chunk in lost_chunks for f in chunk)
+
+    if priority:
+        unanswered.sort(key=lambda f: -priority.get(f[0], 0))
+    size = policy.chunk_size
+    await spend([unanswered[i:i + size] for i in range(0, len(unanswered), size)], policy.escalate_model)
+
+    stats["recovered"] = len({r["Field"] for r in extra if is_found(r["Value"])})
+    return extra, attempts, stats
@@ -0,0 +1,212 @@
+# ==============================================================
+# 🚦 ReValix OpenAI Request Scheduler
+# RPM/TPM admission control driven by x-ratelimit-* headers, with
+# jittered retry on 429/5xx instead of dropping the section
+# ==============================================================
+
+import asyncio, aiohttp, json, random, re, threading, time
+
+OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
+
+class OpenAIRequestError(Exception):
+    """A chat completion that failed permanently or ran out of retries."""
+
+# --------------------------------------------------------------
+# HELPERS
+# --------------------------------------------------------------
+def parse_reset(value):
+    """Seconds from an x-ratelimit-reset-* value such as "20ms", "1s", "6m0s", "1h2m3.5s"."""
+    if not value:
+        return 0.0
+    units = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    return sum(float(n) * units[u] for n, u in re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", str(value)))
+
+def estimate_request_tokens(payload, default_completion_tokens=1000):
+    """Tokens OpenAI will count against TPM: prompt (~4 chars/token) + max completion."""
+    chars = sum(len(m.get("content") or "") for m in payload.get("messages", []))
+    return chars // 4 + payload.get("max_tokens", default_completion_tokens)
+
+# --------------------------------------------------------------
+# SCHEDULER
+# --------------------------------------------------------------
+class OpenAIScheduler:
+    """Process-wide admission control for chat completions.
+
+    Local buckets refill at ``rpm``/``tpm`` per minute; every response's
+    ``x-ratelimit-remaining-*`` headers clamp them to what the server reports,
+    and an exhausted budget blocks new requests until the reported reset.
+    State is guarded by a thread lock and waits use ``asyncio.sleep``, so one
+    scheduler serves every event loop in the process.
+    """
+
+    def __init__(self, rpm=500, tpm=200000, max_retries=5, backoff_base=1.0, backoff_max=60.0):
+        self.rpm = float(rpm)
+        self.tpm = float(tpm)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.request_budget = self.rpm
+        self.token_budget = self.tpm
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.counters = {"requests": 0, "retries": 0, "throttled": 0, "rate_limited": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.updated = now
+        self.request_budget = min(self.rpm, self.request_budget + elapsed * self.rpm / 60)
+        self.token_budget = min(self.tpm, self.token_budget + elapsed * self.tpm / 60)
+
+    def _reserve(self, tokens):
+        """Take budget for one request; return 0, or the seconds to wait before retrying."""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        tokens = min(tokens, self.tpm)
+        if self.request_budget >= 1 and self.token_budget >= tokens:
+            self.request_budget -= 1
+            self.token_budget -= tokens
+            return 0.0
+        wait_requests = (1 - self.request_budget) * 60 / self.rpm if self.request_budget < 1 else 0
+        wait_tokens = (tokens - self.token_budget) * 60 / self.tpm if self.token_budget < tokens else 0
+        return max(wait_requests, wait_tokens)
+
+    async def acquire(self, tokens):
+        throttled = False
+        while True:
+            with self._lock:
+                wait = self._reserve(tokens)
+                if wait and not throttled:
+                    self.counters["throttled"] += 1
+            if not wait:
+                return
+            throttled = True
+            await asyncio.sleep(wait + random.uniform(0, 0.05))
+
+    def settle(self, estimated, actual):
+        """Refund the difference between the estimate and the tokens actually used."""
+        if actual is None:
+            return
+        with self._lock:
+            self.token_budget = min(self.tpm, self.token_budget + estimated - actual)
+
+    def observe(self, headers):
+        """Clamp local budgets to the server's x-ratelimit-* view."""
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if remaining_requests is not None:
+                self.request_budget = min(self.request_budget, float(remaining_requests))
+                if float(remaining_requests) < 1:
+                    reset = parse_reset(headers.get("x-ratelimit-reset-requests"))
+                    self.blocked_until = max(self.blocked_until, now + reset)
+            if remaining_tokens is not None:
+                self.token_budget = min(self.token_budget, float(remaining_tokens))
+                if float(remaining_tokens) < self.tpm * 0.01:
+                    reset = parse_reset(headers.get("x-ratelimit-reset-tokens"))
+                    self.blocked_until = max(self.blocked_until, now + reset)
+
+    def _retry_delay(self, attempt, headers=None):
+        headers = headers or {}
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            try:
+                return float(headers["retry-after"])
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def chat(self, session, payload, headers, url=OPENAI_CHAT_URL, timeout=120):
+        """POST a chat completion under admission control; return the message content."""
+        estimated = estimate_request_tokens(payload)
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(estimated)
+            with self._lock:
+                self.counters["requests"] += 1
+            retry_headers = None
+            try:
+                async with session.post(url, json=payload, headers=headers,
+                                        timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+                    self.observe(r.headers)
+                    if r.status == 429 or r.status >= 500:
+                        with self._lock:
+                            self.counters["rate_limited" if r.status == 429 else "failed"] += 1
+                        retry_headers = r.headers
+                        if attempt >= self.max_retries:
+                            raise OpenAIRequestError(f"HTTP {r.status} after {attempt + 1} attempts")
+                    else:
+                        data = await r.json()
+                        if r.status >= 400:
+                            raise OpenAIRequestError(f"HTTP {r.status}: {data.get('error', {}).get('message', '')}")
+                        self.settle(estimated, (data.get("usage") or {}).get("total_tokens"))
+                        return data.get("choices", [{}])[0].get("message", {}).get("content", "")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= self.max_retries:
+                    raise OpenAIRequestError(f"{type(e).__name__} after {attempt + 1} attempts") from e
+            with self._lock:
+                self.counters["retries"] += 1
+            await asyncio.sleep(self._retry_delay(attempt, retry_headers))
+
+    async def chat_stream(self, session, payload, headers, on_delta, url=OPENAI_CHAT_URL, timeout=120):
+        """``chat`` with ``stream=True``: ``on_delta(text)`` gets content as it arrives; returns all of it.
+
+        Retries only happen before the first content delta, so ``on_delta``
+        never sees the same text twice; a stream cut off later raises.
+        """
+        payload = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+        estimated = estimate_request_tokens(payload)
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(estimated)
+            with self._lock:
+                self.counters["requests"] += 1
+            retry_headers = None
+            parts = []
+            try:
+                async with session.post(url, json=payload, headers=headers,
+                                        timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+                    self.observe(r.headers)
+                    if r.status == 429 or r.status >= 500:
+                        with self._lock:
+                            self.counters["rate_limited" if r.status == 429 else "failed"] += 1
+                        retry_headers = r.headers
+                        if attempt >= self.max_retries:
+                            raise OpenAIRequestError(f"HTTP {r.status} after {attempt + 1} attempts")
+                    elif r.status >= 400:
+                        data = await r.json()
+                        raise OpenAIRequestError(f"HTTP {r.status}: {data.get('error', {}).get('message', '')}")
+                    else:
+                        usage = None
+                        # Server-sent events: one "data: {json}" line per chunk, then "data: [DONE]".
+                        async for raw in r.content:
+                            line = raw.decode("utf-8", "replace").strip()
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            chunk = json.loads(data)
+                            usage = chunk.get("usage") or usage
+                            for choice in chunk.get("choices") or []:
+                                text = (choice.get("delta") or {}).get("content")
+                                if text:
+                                    parts.append(text)
+                                    on_delta(text)
+                        self.settle(estimated, (usage or {}).get("total_tokens"))
+                        return "".join(parts)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError, aiohttp.ClientPayloadError) as e:
+                if parts:
+                    raise OpenAIRequestError(f"stream interrupted after {len(parts)} chunks: {e}") from e
+                if attempt >= self.max_retries:
+                    raise OpenAIRequestError(f"{type(e).__name__} after {attempt + 1} attempts") from e
+            with self._lock:
+                self.counters["retries"] += 1
+            await asyncio.sleep(self._retry_delay(attempt, retry_headers))
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
@@ -0,0 +1,245 @@
+# ==============================================================
+# 🔎 ReValix Address Search Index
+# In-memory token/trigram index over saved reports for ranked fuzzy
+# search, prefix autocomplete, ZIP/APN lookups and dedupe checks
+# ==============================================================
+
+import bisect, math, re, threading, time
+from array import array
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from address import DIRECTIONALS, STATES, STREET_SUFFIXES, UNIT_DESIGNATORS, canonicalize_address
+from cache import normalize_key_text
+
+ZIP_IN_TEXT_RE = re.compile(r"\b(\d{5})(?:-\d{4})?\b")
+ZIP_ONLY_RE = re.compile(r"^\d{5}(?:-\d{4})?$")
+HOUSE_RE = re.compile(r"^\s*(\d+[A-Z]?(?:-\d+[A-Z]?)?)\b", re.IGNORECASE)
+UNIT_RE = re.compile(r"(?:\b(?:%s)\b\.?|#)\s*([A-Z0-9-]+)" % "|".join(k for k in UNIT_DESIGNATORS if k != "#"),
+                     re.IGNORECASE)
+
+# Word → canonical abbreviation, so "Winona Court" and "winona ct" share tokens and trigrams.
+TOKEN_ALIASES = {
+    **{k.lower(): v.lower() for k, v in STREET_SUFFIXES.items()},
+    **{k.lower(): v.lower() for k, v in DIRECTIONALS.items()},
+    **{k.lower(): v.lower() for k, v in UNIT_DESIGNATORS.items() if k != "#"},
+    **{k.lower(): v.lower() for k, v in STATES.items() if " " not in k},
+}
+
+# --------------------------------------------------------------
+# NORMALIZATION
+# --------------------------------------------------------------
+def search_tokens(text):
+    """Lower-cased, punctuation-free tokens with USPS abbreviations applied."""
+    words = re.findall(r"[a-z0-9]+", str(text or "").lower())
+    return [TOKEN_ALIASES.get(w, w) for w in words]
+
+def search_text(text):
+    return " ".join(search_tokens(text))
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def normalize_apn(value):
+    return re.sub(r"[^0-9a-z]", "", str(value or "").lower())
+
+def identity_parts(address):
+    """(house number, unit, ZIP) of an address; two spellings are one property only when all three agree."""
+    canonical = canonicalize_address(address) or str(address or "")
+    street = canonical.split(",")[0]
+    house = HOUSE_RE.match(street)
+    unit = UNIT_RE.search(street)
+    zips = ZIP_IN_TEXT_RE.findall(canonical)
+    return (house.group(1).upper() if house else None, unit.group(1).upper() if unit else None,
+            zips[-1] if zips else None)
+
+# --------------------------------------------------------------
+# INDEX
+# --------------------------------------------------------------
+class AddressIndex:
+    """Ranked address lookup over saved reports.
+
+    Every report gets an integer id; postings map trigrams, whole tokens,
+    ZIPs and APNs to ids. A query scores candidates from its rarest trigrams
+    (IDF-weighted overlap), boosted when its last word is a prefix of an
+    indexed token (autocomplete) and when house number / ZIP agree.
+    ``sync(collection)`` loads new or updated reports via the updated_at index.
+    """
+
+    def __init__(self):
+        self.entries = []              # id → {"address", "key", "text", "apn", "zip", "updated_at"}
+        self.ids_by_key = {}
+        # Postings are array("I") of ids: ~4 bytes per entry at a million reports.
+        self.grams = defaultdict(lambda: array("I"))
+        self.token_ids = defaultdict(lambda: array("I"))
+        self.sorted_tokens = []
+        self.zips = defaultdict(lambda: array("I"))
+        self.apns = defaultdict(lambda: array("I"))
+        self.synced_at = None
+        self.last_sync = 0.0
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._tokens_dirty = False
+
+    def __len__(self):
+        return len(self.entries)
+
+    # ---------------- building ----------------
+    def add(self, address, apn=None, updated_at=None):
+        if not address:
+            return None
+        canonical = canonicalize_address(address) or address
+        key = normalize_key_text(canonical)     # == store.address_key(address)
+        text = search_text(canonical)
+        zip_match = ZIP_IN_TEXT_RE.search(text)
+        with self._lock:
+            doc_id = self.ids_by_key.get(key)
+            if doc_id is not None:
+                entry = self.entries[doc_id]
+                entry["updated_at"] = updated_at or entry["updated_at"]
+                if apn and normalize_apn(apn) != entry["apn"]:
+                    entry["apn"] = normalize_apn(apn)
+                    self.apns[entry["apn"]].append(doc_id)
+                return doc_id
+            doc_id = len(self.entries)
+            self.entries.append({"address": address, "key": key, "text": text, "apn": normalize_apn(apn),
+                                 "zip": zip_match.group(1) if zip_match else None, "updated_at": updated_at})
+            self.ids_by_key[key] = doc_id
+            for g in trigrams(text):
+                self.grams[g].append(doc_id)
+            for tok in set(text.split()):
+                if tok not in self.token_ids:
+                    self._tokens_dirty = True
+                self.token_ids[tok].append(doc_id)
+            if zip_match:
+                self.zips[zip_match.group(1)].append(doc_id)
+            if apn:
+                self.apns[normalize_apn(apn)].append(doc_id)
+            return doc_id
+
+    def sync(self, collection, min_interval=30):
+        """Pull reports written since the last sync (full load the first time).
+
+        Returns the number of reports read; 0 while another sync is running.
+        """
+        if time.time() - self.last_sync < min_interval or not self._sync_lock.acquire(blocking=False):
+            return 0
+        try:
+            return self._sync(collection)
+        finally:
+            self._sync_lock.release()
+
+    def _sync(self, collection):
+        query = {"updated_at": {"$gt": self.synced_at}} if self.synced_at else {}
+        added = 0
+        newest = self.synced_at
+        for doc in collection.find(query, {"address": 1, "apn": 1, "updated_at": 1}):
+            self.add(doc.get("address"), doc.get("apn"), doc.get("updated_at"))
+            added += 1
+            if isinstance(doc.get("updated_at"), datetime) and (newest is None or doc["updated_at"] > newest):
+                newest = doc["updated_at"]
+        self.synced_at = newest
+        self.last_sync = time.time()
+        return added
+
+    @classmethod
+    def from_collection(cls, collection):
+        index = cls()
+        index.sync(collection, min_interval=0)
+        return index
+
+    # ---------------- querying ----------------
+    def _prefix_ids(self, prefix, limit=5000):
+        """Ids whose tokens start with ``prefix`` (the word being typed); empty when too broad."""
+        if self._tokens_dirty:
+            self.sorted_tokens = sorted(self.token_ids)
+            self._tokens_dirty = False
+        ids = set()
+        i = bisect.bisect_left(self.sorted_tokens, prefix)
+        while i < len(self.sorted_tokens) and self.sorted_tokens[i].startswith(prefix):
+            ids.update(self.token_ids[self.sorted_tokens[i]])
+            if len(ids) > limit:
+                return set()
+            i += 1
+        return ids
+
+    def _result(self, doc_id, score):
+        entry = self.entries[doc_id]
+        return {"address": entry["address"], "score": round(score, 3), "apn": entry["apn"] or None,
+                "zip": entry["zip"], "updated_at": entry["updated_at"]}
+
+    def search(self, query, limit=10, rare_grams=12, max_candidates=300, max_posting=20000):
+        """Ranked ``[{"address", "score", ...}]`` for free text, a ZIP or an APN."""
+        query = str(query or "").strip()
+        if not query:
+            return []
+        with self._lock:
+            if ZIP_ONLY_RE.match(query):
+                ids = self.zips.get(query[:5], [])
+                return [self._result(i, 1.0) for i in ids[:limit]]
+            apn_ids = self.apns.get(normalize_apn(query), []) if len(normalize_apn(query)) >= 5 else []
+            if apn_ids:
+                return [self._result(i, 1.0) for i in apn_ids[:limit]]
+
+            text = search_text(canonicalize_address(query) or query)
+            tokens = text.split()
+            if not tokens:
+                return []
+            qgrams = trigrams(text)
+            total = max(1, len(self.entries))
+            idf = {g: math.log(1 + total / (1 + len(self.grams.get(g, ())))) for g in qgrams}
+            # Candidates from the rarest trigrams only: common grams ("st ", "den") add little
+            # and cost the most to count. Exact scoring happens on the shortlist below.
+            votes = Counter()
+            rare = sorted((g for g in qgrams if g in self.grams), key=lambda g: len(self.grams[g]))
+            for n, g in enumerate(rare[:rare_grams]):
+                if n >= 3 and len(self.grams[g]) > max_posting:
+                    break
+                votes.update(self.grams[g])
+            last = tokens[-1]
+            partial = len(last) >= 2 and last not in self.token_ids
+            prefix_ids = self._prefix_ids(last) if partial else set()
+            votes.update(prefix_ids)
+            if not votes:
+                return []
+
+            query_weight = sum(idf.values())
+            house = tokens[0] if tokens[0][:1].isdigit() else None
+            zip_match = ZIP_IN_TEXT_RE.search(text)
+            scored = []
+            for doc_id, _ in votes.most_common(max_candidates):
+                entry = self.entries[doc_id]
+                grams = trigrams(entry["text"])
+                shared = sum(w for g, w in idf.items() if g in grams)
+                # Dice-style: penalize long candidates that merely contain the query.
+                score = 2 * shared / (query_weight + shared + 0.1 * max(0, len(grams) - len(qgrams)))
+                entry_tokens = entry["text"].split()
+                if doc_id in prefix_ids:
+                    score += 0.05
+                if house and entry_tokens and entry_tokens[0] != house:
+                    score *= 0.6
+                if zip_match and entry["zip"] and entry["zip"] != zip_match.group(1):
+                    score *= 0.7
+                scored.append((min(score, 1.0), doc_id))
+            scored.sort(reverse=True)
+            return [self._result(doc_id, score) for score, doc_id in scored[:limit]]
+
+    def find_duplicate(self, address, threshold=0.85, candidates=5):
+        """Saved report that is the same property as ``address``, or None.
+
+        Same address key, or a match scoring ``threshold`` whose house number,
+        unit and ZIP are identical: fuzzy scores alone can't tell "Apt 4" from
+        "Apt 5", so they only rank suggestions (``search``).
+        """
+        with self._lock:
+            doc_id = self.ids_by_key.get(normalize_key_text(canonicalize_address(address) or address))
+            if doc_id is not None:
+                return self._result(doc_id, 1.0)
+        house, unit, zip_code = parts = identity_parts(address)
+        if not house or not zip_code:
+            return None
+        for match in self.search(address, limit=candidates):
+            if match["score"] >= threshold and identity_parts(match["address"]) == parts:
+                return match
+        return None
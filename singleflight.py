@@ -0,0 +1,166 @@
+# ==============================================================
+# 🛬 ReValix Single-Flight Enrichment
+# Concurrent requests for the same property share one run: in
+# process through a shared future, across processes through a
+# lease document in MongoDB
+# ==============================================================
+
+import asyncio, os, socket, threading, uuid
+from concurrent.futures import CancelledError, Future
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+
+from store import as_utc
+
+# A lease not renewed for this long is considered abandoned (crashed holder).
+LEASE_TTL_SECONDS = float(os.getenv("ENRICH_LEASE_TTL_SECONDS", "120"))
+LEASE_POLL_SECONDS = float(os.getenv("ENRICH_LEASE_POLL_SECONDS", "1"))
+
+# --------------------------------------------------------------
+# IN PROCESS
+# --------------------------------------------------------------
+class Flight:
+    """One in-flight run: its result future and the callbacks of everyone waiting on it."""
+
+    def __init__(self):
+        self.future = Future()
+        self.stage_listeners = []
+        self.row_listeners = []
+
+    def subscribe(self, on_stage=None, on_rows=None):
+        if on_stage:
+            self.stage_listeners.append(on_stage)
+        if on_rows:
+            self.row_listeners.append(on_rows)
+
+    def on_stage(self, name, result):
+        for fn in list(self.stage_listeners):
+            fn(name, result)
+
+    def on_rows(self, rows):
+        for fn in list(self.row_listeners):
+            fn(rows)
+
+class SingleFlight:
+    """Process-wide ``key → Flight``: the first caller runs, later ones await its result.
+
+    The result is a concurrent.futures.Future, so callers on other event
+    loops (a batch run next to the Streamlit I/O loop) can join too.
+    Subscribers get the flight's stage and row events from the moment they
+    join. A failed run fails every caller waiting on it; a cancelled one
+    lets the next waiter start over.
+    """
+
+    def __init__(self):
+        self.flights = {}
+        self.counters = {"led": 0, "joined": 0}
+        self._lock = threading.Lock()
+
+    async def run(self, key, fn, on_stage=None, on_rows=None):
+        """(result, joined): ``await fn(flight)`` once per key at a time, shared with concurrent callers."""
+        while True:
+            with self._lock:
+                flight = self.flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self.flights[key] = Flight()
+                flight.subscribe(on_stage, on_rows)
+                self.counters["led" if leader else "joined"] += 1
+            if leader:
+                break
+            try:
+                return await asyncio.wrap_future(flight.future), True
+            except (CancelledError, asyncio.CancelledError):
+                if not flight.future.cancelled():
+                    raise   # this caller was cancelled, not the run it joined
+
+        try:
+            result = await fn(flight)
+        except BaseException as e:
+            with self._lock:
+                self.flights.pop(key, None)
+            if isinstance(e, asyncio.CancelledError):
+                flight.future.cancel()
+            else:
+                flight.future.set_exception(e)
+            raise
+        with self._lock:
+            self.flights.pop(key, None)
+        flight.future.set_result(result)
+        return result, False
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, "in_flight": len(self.flights)}
+
+# --------------------------------------------------------------
+# ACROSS PROCESSES
+# --------------------------------------------------------------
+class MongoLease:
+    """Expiring per-key leases: ``{_id: key, token, holder, options, acquired_at, expires_at}``.
+
+    ``acquire`` is one upsert that only matches an expired lease, so of two
+    processes racing for a key one gets DuplicateKeyError. The holder renews
+    the lease while it works and deletes it when done; a TTL index sweeps
+    leases whose holder died.
+    """
+
+    def __init__(self, collection, ttl_seconds=LEASE_TTL_SECONDS):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+
+    def ensure_indexes(self):
+        self.collection.create_index("expires_at", expireAfterSeconds=0, name="lease_expiry_ttl")
+
+    def acquire(self, key, options=None):
+        """Token for the new lease, or None while another holder's lease is live.
+
+        ``options`` (a string) tells waiters what the holder is running.
+        """
+        now = datetime.now(timezone.utc)
+        token = uuid.uuid4().hex
+        try:
+            self.collection.update_one(
+                {"_id": key, "expires_at": {"$lt": now}},
+                {"$set": {"token": token, "holder": self.holder, "options": options, "acquired_at": now,
+                          "expires_at": now + timedelta(seconds=self.ttl_seconds)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return None
+        return token
+
+    def renew(self, key, token):
+        expires = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        return self.collection.update_one({"_id": key, "token": token},
+                                          {"$set": {"expires_at": expires}}).matched_count == 1
+
+    def release(self, key, token):
+        self.collection.delete_one({"_id": key, "token": token})
+
+    def current(self, key):
+        """The live lease document for ``key``, or None."""
+        doc = self.collection.find_one({"_id": key})
+        if doc is None or as_utc(doc["expires_at"]) <= datetime.now(timezone.utc):
+            return None
+        return doc
+
+    async def keep_alive(self, key, token):
+        """Renew until cancelled (run as a task next to the leased work)."""
+        while True:
+            await asyncio.sleep(self.ttl_seconds / 3)
+            try:
+                await asyncio.to_thread(self.renew, key, token)
+            except Exception as e:
+                print("Lease renew error:", e)
+
+    async def wait_released(self, key):
+        """Poll until ``key`` has no live lease; returns the last lease seen (None if there was none)."""
+        seen = None
+        while True:
+            lease = await asyncio.to_thread(self.current, key)
+            if lease is None:
+                return seen
+            seen = lease
+            await asyncio.sleep(LEASE_POLL_SECONDS)
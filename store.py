@@ -0,0 +1,280 @@
+# ==============================================================
+# 🗃️ ReValix Property Report Store
+# Schema v2 for property_results: one document per normalized address
+# with a typed field map, APN/FIPS, a GeoJSON point and indexes
+#
+#   python store.py indexes               # create / verify indexes
+#   python store.py migrate [--dry-run]   # convert v1 "records" documents
+# ==============================================================
+
+import argparse, json, os, re
+from datetime import datetime, timezone
+from pymongo import ReplaceOne, UpdateOne
+
+from address import canonicalize_address
+from cache import normalize_key_text
+
+SCHEMA_VERSION = 2
+
+# {
+#   "schema_version": 2,
+#   "address": "4529 Winona Ct, Denver, CO 80212",      # display form
+#   "address_key": "4529 winona ct , denver , co 80212",  # unique lookup key
+#   "apn": "02194-13-012", "fips": "08031",
+#   "location": {"type": "Point", "coordinates": [lon, lat]},
+#   "updated_at": datetime,
+#   "fields": {"<encoded field>": {"value": 412500, "text": "$412,500",
+#                                  "source": "ATTOM", "updated": datetime, "attempts": 2}, ...},
+# }
+# "value" is a number when the text parses as one (identifiers and codes,
+# e.g. "Postal Code" "08031", stay strings), None when NotFound;
+# "attempts" (GPT requests asked for the field) only when it was asked.
+
+# --------------------------------------------------------------
+# KEYS
+# --------------------------------------------------------------
+def encode_field_key(name):
+    """Mongo-safe key for a template field ("No. of Floors" → "No%2E of Floors")."""
+    key = str(name).replace("%", "%25").replace(".", "%2E")
+    return "%24" + key[1:] if key.startswith("$") else key
+
+def decode_field_key(key):
+    return key.replace("%24", "$").replace("%2E", ".").replace("%25", "%")
+
+def address_key(address):
+    """Unique key shared by every spelling of the same address."""
+    return normalize_key_text(canonicalize_address(address) or address)
+
+# --------------------------------------------------------------
+# VALUES
+# --------------------------------------------------------------
+NUMBER_RE = re.compile(r"^-?\d+(\.\d+)?$")
+# Fields whose digits are an identifier, not a quantity ("Property ID", "Postal Code", "Floor No.", not "No. of Floors").
+IDENTIFIER_FIELD_RE = re.compile(r"\b(?:ID|Code|Reference|Tract)\b|\b(?:No\.|Number)(?! of)", re.IGNORECASE)
+
+def is_found(value):
+    return value is not None and str(value).strip() not in ("", "NotFound", "nan", "None")
+
+def typed_value(text, field=None):
+    """int/float for numeric answers ("$412,500", "12.5%"), the stripped text otherwise, None when NotFound.
+
+    Identifier and code fields (``field`` matching IDENTIFIER_FIELD_RE) always keep their text.
+    """
+    if not is_found(text):
+        return None
+    if field is not None and IDENTIFIER_FIELD_RE.search(field):
+        return str(text).strip()
+    if isinstance(text, (int, float)) and not isinstance(text, bool):
+        return text
+    s = str(text).strip()
+    compact = s.replace(",", "").replace("$", "").rstrip("%").strip()
+    if NUMBER_RE.match(compact):
+        return float(compact) if "." in compact else int(compact)
+    return s
+
+def field_entry(value, source, updated, attempts=None, field=None):
+    found = is_found(value)
+    entry = {
+        "value": typed_value(value, field),
+        "text": str(value).strip() if found else "NotFound",
+        "source": source or "Verified Data",
+        "updated": updated,
+    }
+    # GPT requests the field has been part of (retries included); absent for ATTOM-only fields.
+    if attempts:
+        entry["attempts"] = int(attempts)
+    return entry
+
+def as_utc(dt):
+    """Mongo returns naive UTC datetimes unless the client is tz_aware."""
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+def _float_or_none(value):
+    try:
+        return float(str(value).replace(",", "").strip())
+    except (TypeError, ValueError):
+        return None
+
+def identity_fields(values, fips=None):
+    """apn / location derived from ``{field: text}`` report values; ``fips`` (ATTOM's, not a template field) as given."""
+    out = {"apn": None, "fips": None, "location": None}
+    if is_found(values.get("Property ID")):
+        out["apn"] = str(values["Property ID"]).strip()
+    if is_found(fips):
+        digits = re.sub(r"\D", "", str(fips))
+        out["fips"] = digits.zfill(5) if digits else None
+    lat, lon = _float_or_none(values.get("Latitude")), _float_or_none(values.get("Longitude"))
+    if lat is not None and lon is not None and -90 <= lat <= 90 and -180 <= lon <= 180:
+        out["location"] = {"type": "Point", "coordinates": [lon, lat]}
+    return out
+
+# --------------------------------------------------------------
+# DOCUMENTS
+# --------------------------------------------------------------
+def build_document(address, records, now=None, fips=None):
+    """Schema v2 document from ``[{Field, Value, Source, Updated?}, ...]`` records and the county ``fips``."""
+    now = now or datetime.now(timezone.utc)
+    fields = {}
+    for rec in records:
+        fields[encode_field_key(rec["Field"])] = field_entry(rec.get("Value"), rec.get("Source"), rec.get("Updated") or now,
+                                                             rec.get("Attempts"), rec["Field"])
+    doc = {
+        "schema_version": SCHEMA_VERSION,
+        "address": address,
+        "address_key": address_key(address),
+        "updated_at": now,
+        "fields": fields,
+    }
+    doc.update(identity_fields({r["Field"]: r.get("Value") for r in records}, fips))
+    return doc
+
+def field_set(records, now=None):
+    """``$set`` body for a field-level update of a v2 document."""
+    now = now or datetime.now(timezone.utc)
+    sets = {"updated_at": now}
+    for rec in records:
+        sets[f"fields.{encode_field_key(rec['Field'])}"] = field_entry(rec.get("Value"), rec.get("Source"),
+                                                                      rec.get("Updated") or now, rec.get("Attempts"),
+                                                                      rec["Field"])
+    return sets
+
+def records_from_document(doc):
+    """``[{Field, Value, Source, Updated, Attempts}]`` from a v2 document (or the records of a v1 one)."""
+    if doc is None:
+        return None
+    if "fields" not in doc:
+        return list(doc.get("records", []))
+    return [
+        {"Field": decode_field_key(k), "Value": e.get("text", "NotFound"), "Source": e.get("source", ""),
+         "Updated": e.get("updated"), "Attempts": e.get("attempts", 0)}
+        for k, e in doc["fields"].items()
+    ]
+
+# --------------------------------------------------------------
+# COLLECTION ACCESS
+# --------------------------------------------------------------
+def ensure_indexes(collection):
+    """Indexes for lookups by address, parcel, location and recency."""
+    return [
+        collection.create_index("address_key", name="address_key_unique", unique=True,
+                                partialFilterExpression={"address_key": {"$type": "string"}}),
+        collection.create_index([("fips", 1), ("apn", 1)], name="fips_apn"),
+        collection.create_index([("location", "2dsphere")], name="location_2dsphere"),
+        collection.create_index([("updated_at", -1)], name="updated_at_desc"),
+    ]
+
+def find_report(collection, address, projection=None):
+    """Saved report for any spelling of ``address``; v1 documents are matched on the exact string."""
+    return (collection.find_one({"address_key": address_key(address)}, projection)
+            or collection.find_one({"address": address, "schema_version": {"$exists": False}}, projection))
+
+def find_reports(collection, addresses, projection=None):
+    """``{address_key: report}`` for many addresses in one query (v2 documents only)."""
+    keys = list({address_key(a) for a in addresses})
+    return {doc["address_key"]: doc for doc in collection.find({"address_key": {"$in": keys}}, projection)}
+
+def report_upsert(address, records, now=None, fips=None):
+    """(address_key, ReplaceOne) writing the whole report."""
+    doc = build_document(address, records, now, fips)
+    return doc["address_key"], ReplaceOne({"address_key": doc["address_key"]}, doc, upsert=True)
+
+def report_field_update(address, records, values=None, now=None, fips=None):
+    """(address_key, UpdateOne) with a field-level ``$set`` of ``records``.
+
+    ``values`` ({field: text} of the whole report) also refreshes apn/location,
+    and ``fips`` the saved FIPS (kept as is when None).
+    """
+    sets = field_set(records, now)
+    if values is not None:
+        sets.update(identity_fields(values, fips))
+    if sets.get("fips") is None:
+        sets.pop("fips", None)
+    key = address_key(address)
+    return key, UpdateOne({"address_key": key}, {"$set": sets})
+
+def _write(collection, key, op, writer):
+    """Queue ``op`` on a BulkWriter (returns its ack future) or write it now."""
+    if writer is not None:
+        return writer.submit(op, key)
+    collection.bulk_write([op])
+    return None
+
+def save_report(collection, address, records, now=None, writer=None, fips=None):
+    return _write(collection, *report_upsert(address, records, now, fips), writer)
+
+def update_report_fields(collection, address, records, values=None, now=None, writer=None, fips=None):
+    return _write(collection, *report_field_update(address, records, values, now, fips), writer)
+
+# --------------------------------------------------------------
+# MIGRATION (v1 {"address", "records": [...]} → v2)
+# --------------------------------------------------------------
+def merge_field_maps(old, new):
+    """Field-wise merge: a found value beats NotFound, otherwise the newer entry wins."""
+    out = dict(old)
+    for k, entry in new.items():
+        prev = out.get(k)
+        if prev is None or entry["value"] is not None or prev["value"] is None:
+            out[k] = entry
+    return out
+
+def migrate(collection, dry_run=False, batch_size=500, now=None):
+    """Rewrite v1 documents in place; duplicate spellings of one address are merged into one document."""
+    now = now or datetime.now(timezone.utc)
+    stats = {"scanned": 0, "migrated": 0, "merged": 0, "skipped": 0}
+    seen = set()
+    legacy = collection.find({"schema_version": {"$exists": False}, "records": {"$exists": True}}).sort("_id", 1)
+    for doc in legacy.batch_size(batch_size):
+        stats["scanned"] += 1
+        address = doc.get("address")
+        if not address or not isinstance(doc.get("records"), list):
+            stats["skipped"] += 1
+            continue
+        # v1 reports have no per-field timestamps; the ObjectId time is when they were first written.
+        written = doc["_id"].generation_time if hasattr(doc["_id"], "generation_time") else now
+        records = [{**r, "Updated": r.get("Updated") or written} for r in doc["records"] if r.get("Field")]
+        new_doc = build_document(canonicalize_address(address) or address, records, now=written)
+        existing = collection.find_one({"address_key": new_doc["address_key"]})
+        if dry_run:
+            stats["merged" if existing or new_doc["address_key"] in seen else "migrated"] += 1
+            seen.add(new_doc["address_key"])
+            continue
+        if existing is not None and existing["_id"] != doc["_id"]:
+            new_doc["fields"] = merge_field_maps(existing["fields"], new_doc["fields"])
+            new_doc.update(identity_fields({r["Field"]: r["Value"] for r in records_from_document(new_doc)},
+                                           existing.get("fips")))
+            new_doc["updated_at"] = max(as_utc(existing.get("updated_at") or written), as_utc(written))
+            collection.replace_one({"_id": existing["_id"]}, new_doc)
+            collection.delete_one({"_id": doc["_id"]})
+            stats["merged"] += 1
+        else:
+            collection.replace_one({"_id": doc["_id"]}, new_doc)
+            stats["migrated"] += 1
+    return stats
+
+# --------------------------------------------------------------
+# CLI
+# --------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the property_results collection.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("indexes", help="create the schema v2 indexes")
+    m = sub.add_parser("migrate", help="convert v1 documents to schema v2, then create indexes")
+    m.add_argument("--dry-run", action="store_true", help="count what would change without writing")
+    m.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    collection = MongoClient(os.getenv("MONGO_URI"))["revalix_property_intelligence"]["property_results"]
+    if args.command == "migrate":
+        print(json.dumps(migrate(collection, dry_run=args.dry_run, batch_size=args.batch_size), indent=2))
+        if args.dry_run:
+            return 0
+    print("Indexes:", ", ".join(ensure_indexes(collection)))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,134 @@
+# ==============================================================
+# 🧾 ReValix Structured Section Answers
+# Per-chunk JSON schemas for GPT answers (strict json_schema response
+# format), a fast validator and an incremental parser for streams
+# ==============================================================
+
+import json, re
+
+NOT_FOUND = "NotFound"
+
+STRUCTURAL_RE = re.compile(r'["\\\\{}\[\]]')
+
+# --------------------------------------------------------------
+# SCHEMA
+# --------------------------------------------------------------
+def section_schema(fields):
+    """``{"<field>": {"value": str | null, "source": str}, ...}`` with every field required.
+
+    Field names are the property keys, so the answer can't drop, merge or
+    mis-split a row; null is the schema's "not found".
+    """
+    fields = list(dict.fromkeys(fields))
+    return {
+        "type": "object",
+        "properties": {f: {"$ref": "#/$defs/answer"} for f in fields},
+        "required": fields,
+        "additionalProperties": False,
+        "$defs": {
+            "answer": {
+                "type": "object",
+                "properties": {"value": {"type": ["string", "null"]}, "source": {"type": "string"}},
+                "required": ["value", "source"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+def response_format(fields):
+    """Chat-completions ``response_format`` for a chunk of template fields."""
+    return {"type": "json_schema",
+            "json_schema": {"name": "property_fields", "strict": True, "schema": section_schema(fields)}}
+
+# --------------------------------------------------------------
+# VALIDATION
+# --------------------------------------------------------------
+def validate_answer(data, fields=None):
+    """(rows, problems) for a decoded answer; rows are ``{"Field", "Value", "Source"}``.
+
+    Checks only what the merge relies on, by hand rather than with a
+    generic JSON-schema validator. With ``fields`` only those are read and
+    missing ones are reported; without, every key is taken (cached answers).
+    """
+    if not isinstance(data, dict):
+        return [], ["answer is not a JSON object"]
+    rows, problems = [], []
+    for field in (data if fields is None else fields):
+        entry = data.get(field)
+        if not isinstance(entry, dict):
+            problems.append(f"{field}: missing")
+            continue
+        value, source = entry.get("value"), entry.get("source")
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (str, int, float))):
+            problems.append(f"{field}: value is {type(value).__name__}")
+            continue
+        value = "" if value is None else str(value).strip()
+        rows.append({"Field": field, "Value": value if value and value != NOT_FOUND else NOT_FOUND,
+                     "Source": source.strip() if isinstance(source, str) else ""})
+    return rows, problems
+
+def parse_structured(content, fields=None):
+    """Rows from a JSON answer; [] when it isn't valid JSON."""
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        return []
+    return validate_answer(data, fields)[0]
+
+def is_structured(content):
+    return isinstance(content, str) and content.lstrip().startswith("{")
+
+# --------------------------------------------------------------
+# STREAMING
+# --------------------------------------------------------------
+class JsonFieldParser:
+    """Incremental ``parse_structured``: ``feed`` streamed JSON, get each field once its object closes.
+
+    Tracks string/escape state and nesting depth; a top-level entry
+    (``"<field>": {...}``) is decoded as soon as its closing brace arrives.
+    """
+
+    def __init__(self, fields=None):
+        self.fields = None if fields is None else set(fields)
+        self.text = ""
+        self.depth = 0
+        self.in_string = False
+        self.escaped_at = -1      # index of a character escaped by a backslash
+        self.entry_start = None
+        self.rows = []
+
+    def feed(self, text):
+        start = len(self.text)
+        self.text += text
+        rows = []
+        # Only quotes, backslashes and brackets change state; jump between them.
+        for m in STRUCTURAL_RE.finditer(self.text, start):
+            i, ch = m.start(), m.group()
+            if i == self.escaped_at:
+                continue
+            if self.in_string:
+                if ch == "\\":
+                    self.escaped_at = i + 1
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+                if self.depth == 1 and self.entry_start is None:
+                    self.entry_start = i
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 1 and self.entry_start is not None:
+                    rows.extend(self._entry(self.text[self.entry_start:i + 1]))
+                    self.entry_start = None
+        self.rows.extend(rows)
+        return rows
+
+    def _entry(self, text):
+        rows = parse_structured("{" + text + "}")
+        return [r for r in rows if self.fields is None or r["Field"] in self.fields]
+
+    def close(self):
+        """Nothing is held back: entries are emitted as soon as they are complete."""
+        return []
@@ -0,0 +1,78 @@
+import asyncio, json, time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import pipeline
+from cache import ResponseCache
+from counties import CountyDirectory
+from store import build_document
+
+ADDRESS = "1 Main St, Dallas, TX 75201"
+
+
+@pytest.fixture
+def upstream(tmp_path, monkeypatch):
+    """Offline pipeline: no ATTOM, a temp section cache, and a fake OpenAI that records the fields it is asked."""
+    asked = []
+
+    async def chat(session, payload, headers):
+        fields = payload["response_format"]["json_schema"]["schema"]["required"]
+        asked.append(fields)
+        return json.dumps({f: {"value": "$250,000" if f == "Listing Price" else None, "source": "Fake"}
+                           for f in fields})
+
+    async def no_attom(attom, address, use_cache=True):
+        return []
+
+    monkeypatch.setattr(pipeline, "SECTION_RESPONSE_MODE", "json")
+    monkeypatch.setattr(pipeline, "gpt_cache", ResponseCache(str(tmp_path / "sections.sqlite")))
+    monkeypatch.setattr(pipeline, "county_directory", CountyDirectory())
+    monkeypatch.setattr(pipeline, "fetch_attom_data_async", no_attom)
+    monkeypatch.setattr(pipeline.openai_scheduler, "chat", chat)
+    monkeypatch.setattr(pipeline.fill_rate_stats, "get", lambda: {})
+    return asked
+
+
+def listing_price_chunk():
+    fields = pipeline.load_field_template()
+    return fields[fields["Field"] == "Listing Price"][["Field", "Description"]].values.tolist()
+
+
+def cache_stale_answer(chunk, age_days):
+    key = pipeline.section_cache_key(ADDRESS, chunk)
+    pipeline.gpt_cache.set(key, json.dumps({"Listing Price": {"value": "$199,000", "source": "Old"}}))
+    pipeline.gpt_cache._db.execute("UPDATE entries SET created_at = ? WHERE key = ?",
+                                   (time.time() - age_days * 86400, key))
+
+
+def test_expired_listing_price_is_refreshed_upstream(upstream, monkeypatch):
+    now = datetime.now(timezone.utc)
+    records = [{"Field": f, "Value": "x", "Source": "Saved", "Updated": now}
+               for f in pipeline.load_field_template()["Field"]]
+    for rec in records:
+        if rec["Field"] == "Listing Price":
+            rec.update(Value="$199,000", Updated=now - timedelta(days=8))
+    written = []
+    monkeypatch.setattr(pipeline, "load_saved_report", lambda address: build_document(ADDRESS, records, now))
+    monkeypatch.setattr(pipeline, "update_report_fields", lambda *args, **kwargs: written.append(args[2]))
+    # The same chunk answered a day ago: fresh for the cache's 30-day TTL, but not for a 7-day field.
+    cache_stale_answer(listing_price_chunk(), age_days=1)
+
+    result = asyncio.run(pipeline.enrich_normalized(None, None, ADDRESS, chunk_size=1, incremental=True))
+
+    assert ["Listing Price"] in upstream
+    assert result["refreshed"] == 1
+    final = dict(zip(result["df_final"]["Field"], result["df_final"]["Value"]))
+    assert final["Listing Price"] == "$250,000"
+    assert [r["Field"] for r in written[0]] == ["Listing Price"]
+
+
+def test_cached_chunk_older_than_its_shortest_field_ttl_is_refetched(upstream):
+    chunk = listing_price_chunk()
+    cache_stale_answer(chunk, age_days=8)
+
+    content = asyncio.run(pipeline.fetch_section(None, ADDRESS, chunk, "", pipeline.pd.DataFrame()))
+
+    assert upstream == [["Listing Price"]]
+    assert pipeline.parse_section(content, chunk)[0]["Value"] == "$250,000"
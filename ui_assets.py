@@ -0,0 +1,68 @@
+# ==============================================================
+# 🎞️ ReValix UI Assets
+# Lottie animations from bundled files or a one-time cached download,
+# fetched off the script thread so no rerun ever waits on lottiefiles
+# ==============================================================
+
+import json, os, threading
+import requests
+
+LOTTIE_URLS = {
+    "loading": "https://assets10.lottiefiles.com/packages/lf20_j1adxtyb.json",
+    "success": "https://assets2.lottiefiles.com/packages/lf20_jcikwtux.json",
+}
+# Drop <name>.json here to ship an animation with the app; downloads are kept in the cache dir.
+LOTTIE_BUNDLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "lottie")
+LOTTIE_CACHE_DIR = os.getenv("LOTTIE_CACHE_DIR", os.path.join(".cache", "lottie"))
+LOTTIE_TIMEOUT = 5
+
+class LottieAssets:
+    """Animation JSON by name: bundled file, then cached download, then one background fetch.
+
+    ``get`` never blocks: it returns None until an animation is available
+    (and for good if lottiefiles can't be reached), so callers just skip it.
+    """
+
+    def __init__(self, urls=None, bundle_dir=LOTTIE_BUNDLE_DIR, cache_dir=LOTTIE_CACHE_DIR):
+        self.urls = dict(LOTTIE_URLS if urls is None else urls)
+        self.bundle_dir = bundle_dir
+        self.cache_dir = cache_dir
+        self.animations = {}
+        for name in self.urls:
+            for folder in (bundle_dir, cache_dir):
+                animation = self._read(os.path.join(folder, f"{name}.json"))
+                if animation is not None:
+                    self.animations[name] = animation
+                    break
+
+    def start(self):
+        """Fetch whatever isn't on disk yet in a daemon thread; returns self."""
+        missing = [n for n in self.urls if n not in self.animations]
+        if missing:
+            threading.Thread(target=self._fetch_all, args=(missing,), name="revalix-lottie", daemon=True).start()
+        return self
+
+    def get(self, name):
+        return self.animations.get(name)
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _fetch_all(self, names):
+        for name in names:
+            try:
+                r = requests.get(self.urls[name], timeout=LOTTIE_TIMEOUT)
+                if r.status_code != 200:
+                    continue
+                animation = r.json()
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(os.path.join(self.cache_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+                    json.dump(animation, f)
+                self.animations[name] = animation
+            except Exception as e:
+                print("Lottie fetch error:", name, e)
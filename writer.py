@@ -0,0 +1,119 @@
+# ==============================================================
+# 📝 ReValix Buffered Mongo Writer
+# Accumulates report upserts and flushes them with unordered
+# bulk_write from a background thread, by batch size or age
+# ==============================================================
+
+import threading, time
+from concurrent.futures import Future
+
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
+
+class BulkWriter:
+    """Background ``bulk_write(ordered=False)`` batching for one collection.
+
+    ``submit(op, key)`` queues a pymongo write model and returns a
+    concurrent.futures.Future that resolves once MongoDB acknowledged it
+    (``asyncio.wrap_future`` to await it from the event loop). A batch is
+    flushed when ``max_batch`` ops are waiting or the oldest one is
+    ``max_delay`` seconds old. Ops sharing a ``key`` (one address) never go
+    into the same unordered batch, so later writes still win. ``close()``
+    drains the queue and waits for the journal (``j=True``) acknowledgement.
+    """
+
+    def __init__(self, collection, max_batch=500, max_delay=1.0, journal=True):
+        self.collection = collection.with_options(write_concern=WriteConcern(w=1, j=journal))
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.pending = []           # [(key, op, future, queued_at)]
+        self.counters = {"ops": 0, "batches": 0, "errors": 0}
+        self.closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="revalix-bulk-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, op, key=None):
+        future = Future()
+        with self._cond:
+            if self.closed:
+                raise RuntimeError("BulkWriter is closed")
+            self.pending.append((key, op, future, time.monotonic()))
+            if len(self.pending) == 1 or len(self.pending) >= self.max_batch:
+                self._cond.notify()   # start the age timer / flush a full batch
+        return future
+
+    def _take_batch(self):
+        """Up to ``max_batch`` queued ops with distinct keys, in submission order."""
+        batch, keys, rest = [], set(), []
+        for item in self.pending:
+            key = item[0]
+            if len(batch) < self.max_batch and (key is None or key not in keys):
+                batch.append(item)
+                if key is not None:
+                    keys.add(key)
+            else:
+                rest.append(item)
+                if key is not None:
+                    keys.add(key)   # keep later ops for this key behind the one still queued
+        self.pending = rest
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self.pending and not self.closed:
+                    self._cond.wait()
+                if not self.pending and self.closed:
+                    return
+                wait = self.pending[0][3] + self.max_delay - time.monotonic()
+                if wait > 0 and len(self.pending) < self.max_batch and not self.closed:
+                    self._cond.wait(wait)
+                    continue
+                batch = self._take_batch()
+            self._flush(batch)
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        failed = {}
+        try:
+            self.collection.bulk_write([op for _, op, _, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            failed = {err["index"]: err.get("errmsg", str(err)) for err in e.details.get("writeErrors", [])}
+            if not failed:
+                failed = {i: str(e) for i in range(len(batch))}
+        except Exception as e:
+            print("Bulk write error:", e)
+            failed = {i: str(e) for i in range(len(batch))}
+        with self._cond:
+            self.counters["batches"] += 1
+            self.counters["ops"] += len(batch) - len(failed)
+            self.counters["errors"] += len(failed)
+        for i, (_, _, future, _) in enumerate(batch):
+            if i in failed:
+                future.set_exception(RuntimeError(f"Mongo write failed: {failed[i]}"))
+            else:
+                future.set_result(True)
+
+    def flush(self, timeout=None):
+        """Send everything queued so far now and wait for its acknowledgement."""
+        with self._cond:
+            futures = [f for _, _, f, _ in self.pending]
+            for i, item in enumerate(self.pending):
+                self.pending[i] = item[:3] + (float("-inf"),)
+            self._cond.notify()
+        for f in futures:
+            f.exception(timeout)
+
+    def close(self, timeout=None):
+        with self._cond:
+            if self.closed:
+                return
+            self.closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            return {**self.counters, "queued": len(self.pending)}